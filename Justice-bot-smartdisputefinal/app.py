@@ -73,6 +73,7 @@ def create_app():
     with app.app_context():
         import models  # Import models to register them
         db.create_all()
+        models.upgrade_schema(db.engine)
         logger.info("Database tables created successfully")
     
     @login_manager.user_loader
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark keyword scoring in utils/legal_analyzer.analyze_case
+
+Builds synthetic cases with dozens of large documents and times the rule-based
+category scoring and issue detection two ways: the per-keyword regex scans
+analyze_case used to run (reproduced here), and analyze_case itself, which
+scans each document once with CATEGORY_KEYWORD_MATCHER. Checks that both
+produce the same category scores and detected issues, and times an
+incremental re-analysis after one document is added, reusing the other
+documents' stored keyword artifacts.
+
+Usage:
+    python benchmark_case_analysis.py [--documents 40] [--doc-kb 200] [--cases 3] [--repeat N]
+"""
+
+import os
+import re
+import time
+import random
+import logging
+import argparse
+from types import SimpleNamespace
+from collections import Counter
+
+from utils.legal_analyzer import LEGAL_CATEGORIES, analyze_case, document_keyword_artifact
+
+FILLER = (
+    'the applicant submits that on the date in question the respondent failed to provide the '
+    'documents requested and the matter was adjourned pending further submissions from both parties'
+).split()
+
+
+def legacy_keyword_analysis(all_texts):
+    """Category scores and detected issues as analyze_case computed them with one regex per keyword"""
+    combined_text = " ".join(all_texts)
+    keyword_freq = Counter()
+    for data in LEGAL_CATEGORIES.values():
+        for keyword in data['keywords']:
+            pattern = r'\b' + re.escape(keyword) + r'\b'
+            doc_count = sum(1 for doc in all_texts if re.search(pattern, doc, re.IGNORECASE))
+            if doc_count > 0:
+                keyword_freq[keyword] = doc_count
+
+    category_scores = {}
+    total_docs = len(all_texts) or 1
+    for category, data in LEGAL_CATEGORIES.items():
+        score = 0
+        for keyword in data['keywords']:
+            keyword_count = len(re.findall(r'\b' + re.escape(keyword) + r'\b', combined_text, re.IGNORECASE))
+            doc_freq = keyword_freq.get(keyword, 0) / total_docs
+            keyword_score = keyword_count * (1 + doc_freq) * 100
+            if len(keyword.split()) > 1:
+                keyword_score *= 1.5
+            score += keyword_score
+        category_scores[category] = round(score, 2)
+
+    detected_issues = []
+    sorted_categories = sorted(category_scores.items(), key=lambda x: x[1], reverse=True)
+    for category, score in sorted_categories[:3]:
+        if score > 0:
+            for form_key, form_data in LEGAL_CATEGORIES[category]['forms'].items():
+                issue_context = []
+                for keyword in form_data['required_keywords']:
+                    pattern = re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE)
+                    for doc_text in all_texts:
+                        for match in pattern.finditer(doc_text):
+                            start = max(0, match.start() - 50)
+                            end = min(len(doc_text), match.end() + 50)
+                            issue_context.append(doc_text[start:end])
+                if issue_context:
+                    detected_issues.append((category, form_key, len(issue_context), issue_context[:5]))
+    return category_scores, detected_issues
+
+
+def synthetic_document(rng, keywords, size_kb):
+    words = []
+    size = 0
+    while size < size_kb * 1024:
+        word = rng.choice(keywords) if rng.random() < 0.03 else rng.choice(FILLER)
+        if rng.random() < 0.1:
+            word = word.capitalize()
+        words.append(word)
+        size += len(word) + 1
+    return ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analyze_case keyword scoring")
+    parser.add_argument('--documents', type=int, default=40, help="Documents per case")
+    parser.add_argument('--doc-kb', type=int, default=200, help="Size of each document")
+    parser.add_argument('--cases', type=int, default=3, help="Number of cases")
+    parser.add_argument('--repeat', type=int, default=1, help="Runs per measurement (best is reported)")
+    parser.add_argument('--seed', type=int, default=1, help="Seed for synthetic text")
+    args = parser.parse_args()
+
+    # Rule-based analysis only; the AI path would dominate the timing
+    os.environ.pop('OPENAI_API_KEY', None)
+    logging.getLogger().setLevel(logging.ERROR)
+
+    rng = random.Random(args.seed)
+    keywords = [keyword for data in LEGAL_CATEGORIES.values() for keyword in data['keywords']]
+    print(f"{'case':<6} {'MB':>6} {'legacy s':>9} {'single-pass s':>14} {'speedup':>8} {'+1 doc s':>9}  identical")
+    for case_number in range(args.cases):
+        # Each case leans towards one category, as real cases do
+        focus = list(LEGAL_CATEGORIES.values())[case_number % len(LEGAL_CATEGORIES)]['keywords']
+        texts = [synthetic_document(rng, focus * 5 + keywords, args.doc_kb) for _ in range(args.documents)]
+        documents = [SimpleNamespace(extracted_text=text, doc_metadata={}, filename=f"{index}.pdf",
+                                     original_filename=f"doc{index}.pdf", content_type='application/pdf')
+                     for index, text in enumerate(texts)]
+        case = SimpleNamespace(id=case_number, category=None)
+        megabytes = sum(len(text) for text in texts) / (1024 * 1024)
+
+        legacy_seconds = new_seconds = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            legacy_scores, legacy_issues = legacy_keyword_analysis(texts)
+            elapsed = time.perf_counter() - started
+            legacy_seconds = elapsed if legacy_seconds is None else min(legacy_seconds, elapsed)
+
+            started = time.perf_counter()
+            analysis = analyze_case(case, documents)
+            elapsed = time.perf_counter() - started
+            new_seconds = elapsed if new_seconds is None else min(new_seconds, elapsed)
+
+        new_issues = [(issue['category'], issue['issue_type'], issue['context'])
+                      for issue in analysis['detected_issues']]
+        # One more document arrives; only it is scanned
+        artifacts = [document_keyword_artifact(text) for text in texts[:-1]]
+        started = time.perf_counter()
+        incremental = analyze_case(case, documents, artifacts + [document_keyword_artifact(texts[-1])])
+        incremental_seconds = time.perf_counter() - started
+
+        identical = (analysis['category_scores'] == legacy_scores and
+                     incremental['category_scores'] == legacy_scores and
+                     # analyze_case orders issues by score afterwards
+                     sorted(new_issues) == sorted((c, f, ctx) for c, f, _, ctx in legacy_issues))
+        print(f"{case_number:<6} {megabytes:>6.1f} {legacy_seconds:>9.2f} {new_seconds:>14.2f} "
+              f"{legacy_seconds / new_seconds:>7.1f}x {incremental_seconds:>9.2f}  {identical}")
+
+
+if __name__ == '__main__':
+    main()
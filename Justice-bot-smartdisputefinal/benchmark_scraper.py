@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the legal data scraper
+
+Serves a synthetic (or recorded) corpus of legal pages from local HTTP servers,
+one per fixture source so each behaves as its own domain, and runs
+LegalDataScraper.run_scheduled_scrape against them end to end: robots.txt,
+listing pages, document fetches, extraction, and saving to the corpus store,
+catalog, fingerprint and search indexes. Nothing touches the network, so the
+numbers can be compared between commits in CI.
+
+The fixture servers can add latency and inject errors (503s) to mimic slow or
+flaky government sites, and they honour If-None-Match so repeat runs measure
+the unchanged-document path.
+
+Reports documents per second, bytes per second, extraction CPU time and peak
+RSS (of this process and of extraction worker processes).
+
+Usage:
+    python benchmark_scraper.py [--sources N] [--documents-per-source N]
+        [--page-kb KB] [--corpus-dir DIR] [--latency-ms MS] [--error-rate P]
+        [--sequential] [--repeat N] [--json FILE] [--min-docs-per-second N]
+"""
+
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import logging
+import argparse
+import resource
+import tempfile
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.legal_data_scraper import LegalDataScraper
+
+# Configure logging; per-document INFO lines from the scraper would swamp the report
+logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.getLogger().setLevel(logging.WARNING)
+logger = logging.getLogger(__name__)
+
+# LegalDataScraper keeps at most 10 links from a generic listing page
+MAX_DOCUMENTS_PER_SOURCE = 10
+
+ACT_SUBJECTS = [
+    'Residential Tenancies', 'Employment Standards', 'Human Rights', 'Family Law',
+    'Child, Youth and Family Services', 'Occupiers\' Liability', 'Consumer Protection',
+    'Limitations', 'Courts of Justice', 'Statutory Powers Procedure'
+]
+LEGAL_WORDS = (
+    'tenant landlord notice termination tribunal order hearing application evidence '
+    'rent arrears eviction adjudicator jurisdiction section subsection paragraph '
+    'pursuant reasonable enforcement remedy appeal decision compensation damages '
+    'employer employee discrimination accommodation charter respondent applicant '
+    'court held that the and of to in a is for on by with under may shall must'
+).split()
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July',
+          'August', 'September', 'October', 'November', 'December']
+
+
+def synthetic_page(rng, number, page_kb):
+    """
+    Generate a statute-like HTML page of roughly page_kb kilobytes
+
+    Args:
+        rng (random.Random): Seeded generator, so runs serve identical corpora
+        number (int): Document number, used in the title and citation
+        page_kb (int): Approximate page size in kilobytes
+
+    Returns:
+        str: HTML page
+    """
+    subject = rng.choice(ACT_SUBJECTS)
+    year = rng.randint(1990, 2025)
+    date = f"{rng.choice(MONTHS)} {rng.randint(1, 28)}, {year}"
+    title = f"{subject} Act, {year} (No. {number})"
+
+    paragraphs = []
+    size = 0
+    section = 1
+    while size < page_kb * 1024:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = rng.choices(LEGAL_WORDS, k=rng.randint(12, 30))
+            sentences.append(' '.join(words).capitalize() + '.')
+        paragraph = f"<h3>Section {section}</h3><p>{' '.join(sentences)}</p>"
+        paragraphs.append(paragraph)
+        size += len(paragraph)
+        section += 1
+
+    return (
+        "<!DOCTYPE html><html><head>"
+        f"<title>{title}</title>"
+        f'<meta name="description" content="Consolidated text of the {subject} Act">'
+        "</head><body>"
+        "<nav><a href=\"/\">Home</a> | <a href=\"/search\">Search</a> | <a href=\"/help\">Help</a></nav>"
+        f"<main><h1>{title}</h1>"
+        f"<p>Date: {date}</p><p>Citation: S.O. {year}, c. {number}</p>"
+        f"{''.join(paragraphs)}</main>"
+        "<footer>Copyright King's Printer. Terms of use. Privacy. Accessibility.</footer>"
+        "</body></html>"
+    )
+
+
+class FixtureSite:
+    """
+    Local HTTP server standing in for one legal source
+    """
+
+    def __init__(self, pages, latency_ms=0.0, error_rate=0.0, seed=0):
+        """
+        Start serving pages on an ephemeral localhost port
+
+        Args:
+            pages (list): HTML documents served at /doc/0 ... /doc/N-1
+            latency_ms (float): Mean added latency per request (uniformly jittered +/-50%)
+            error_rate (float): Probability that a document request gets a 503
+            seed (int): Seed for latency jitter and error injection
+        """
+        self.pages = [page.encode('utf-8') for page in pages]
+        self.etags = [f'"{hashlib.sha256(page).hexdigest()[:16]}"' for page in self.pages]
+        self.listing = (
+            "<html><body><h1>Recent documents</h1><ul>"
+            + ''.join(f'<li><a href="/doc/{i}">Document {i}</a></li>' for i in range(len(pages)))
+            + "</ul></body></html>"
+        ).encode('utf-8')
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.bytes_sent = 0
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                site.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def handle(self, request):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency * self.rng.uniform(0.5, 1.5) if self.latency else 0.0
+            fail = self.rng.random() < self.error_rate
+
+        if delay:
+            time.sleep(delay)
+
+        status, body, etag = 200, b'', None
+        if request.path == '/robots.txt':
+            body = b"User-agent: *\nAllow: /\n"
+        elif request.path == '/recent':
+            body = self.listing
+        elif request.path.startswith('/doc/') and request.path[5:].isdigit() and int(request.path[5:]) < len(self.pages):
+            number = int(request.path[5:])
+            etag = self.etags[number]
+            if fail:
+                status, body = 503, b'Service Unavailable'
+                with self._lock:
+                    self.errors += 1
+            elif request.headers.get('If-None-Match') == etag:
+                status = 304
+            else:
+                body = self.pages[number]
+        else:
+            status, body = 404, b'Not Found'
+
+        request.send_response(status)
+        if etag and status != 503:
+            request.send_header('ETag', etag)
+        request.send_header('Content-Type', 'text/html; charset=utf-8')
+        request.send_header('Content-Length', str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+        with self._lock:
+            self.bytes_sent += len(body)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def load_corpus(args):
+    """
+    Build the pages for each fixture source
+
+    Returns:
+        list: One list of HTML pages per source
+    """
+    per_source = min(args.documents_per_source, MAX_DOCUMENTS_PER_SOURCE)
+    if args.corpus_dir:
+        recorded = sorted(Path(args.corpus_dir).rglob('*.html'))
+        if not recorded:
+            raise SystemExit(f"No .html files found under {args.corpus_dir}")
+        pages = [path.read_text(encoding='utf-8', errors='replace') for path in recorded]
+        # Deal recorded pages round-robin over the sources
+        return [pages[i::args.sources][:per_source] for i in range(args.sources)]
+
+    rng = random.Random(args.seed)
+    return [
+        [synthetic_page(rng, source * per_source + i, args.page_kb) for i in range(per_source)]
+        for source in range(args.sources)
+    ]
+
+
+def peak_rss_mb(who):
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    maxrss = resource.getrusage(who).ru_maxrss
+    return round(maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_benchmark(args):
+    corpus = load_corpus(args)
+    sites = [FixtureSite(pages, args.latency_ms, args.error_rate, seed=args.seed + i)
+             for i, pages in enumerate(corpus)]
+    sources = {
+        f"fixture-{i}": {
+            'name': f"Fixture source {i}",
+            'url': f"{site.base_url}/",
+            'recent_url': f"{site.base_url}/recent",
+            'type': 'fixture'
+        }
+        for i, site in enumerate(sites)
+    }
+    data_dir = tempfile.mkdtemp(prefix='scraper-benchmark-')
+
+    runs = []
+    try:
+        for run in range(args.repeat):
+            bytes_before = sum(site.bytes_sent for site in sites)
+            cpu_before = time.process_time()
+
+            scraper = LegalDataScraper(data_dir, sources=sources,
+                                       min_delay=args.min_delay, max_delay=args.max_delay)
+            summary = scraper.run_scheduled_scrape(concurrent=not args.sequential)
+
+            elapsed = summary['duration_seconds']
+            documents = summary['total_documents'] + summary['unchanged_documents']
+            bytes_served = sum(site.bytes_sent for site in sites) - bytes_before
+            runs.append({
+                'run': run + 1,
+                'seconds': round(elapsed, 3),
+                'documents': documents,
+                'saved_documents': summary['total_documents'],
+                'unchanged_documents': summary['unchanged_documents'],
+                'documents_per_second': round(documents / elapsed, 2) if elapsed else 0.0,
+                'bytes': bytes_served,
+                'bytes_per_second': round(bytes_served / elapsed) if elapsed else 0,
+                'extract_cpu_seconds': summary['extract_cpu_seconds'],
+                'process_cpu_seconds': round(time.process_time() - cpu_before, 3),
+                'pipeline_stats': summary.get('pipeline_stats', {})
+            })
+    finally:
+        for site in sites:
+            site.close()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    return {
+        'config': {
+            'sources': args.sources,
+            'documents_per_source': min(args.documents_per_source, MAX_DOCUMENTS_PER_SOURCE),
+            'page_kb': None if args.corpus_dir else args.page_kb,
+            'corpus_dir': args.corpus_dir,
+            'latency_ms': args.latency_ms,
+            'error_rate': args.error_rate,
+            'mode': 'sequential' if args.sequential else 'concurrent'
+        },
+        'runs': runs,
+        'injected_errors': sum(site.errors for site in sites),
+        'peak_rss_mb': peak_rss_mb(resource.RUSAGE_SELF),
+        'peak_worker_rss_mb': peak_rss_mb(resource.RUSAGE_CHILDREN)
+    }
+
+
+def print_report(report):
+    config = report['config']
+    print(f"Scraper benchmark: {config['sources']} sources x {config['documents_per_source']} documents, "
+          f"{config['mode']}, latency {config['latency_ms']}ms, error rate {config['error_rate']}")
+    print(f"{'run':>4} {'seconds':>8} {'docs':>6} {'saved':>6} {'docs/s':>8} {'KB/s':>9} {'extract cpu':>12}")
+    for run in report['runs']:
+        print(f"{run['run']:>4} {run['seconds']:>8.2f} {run['documents']:>6} {run['saved_documents']:>6} "
+              f"{run['documents_per_second']:>8.2f} {run['bytes_per_second'] / 1024:>9.1f} "
+              f"{run['extract_cpu_seconds']:>11.3f}s")
+    print(f"Injected errors: {report['injected_errors']}")
+    print(f"Peak RSS: {report['peak_rss_mb']} MB (extraction workers: {report['peak_worker_rss_mb']} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LegalDataScraper against local fixture sites")
+    parser.add_argument('--sources', type=int, default=8, help="Number of fixture sources (one server each)")
+    parser.add_argument('--documents-per-source', type=int, default=MAX_DOCUMENTS_PER_SOURCE,
+                        help=f"Documents listed per source (at most {MAX_DOCUMENTS_PER_SOURCE})")
+    parser.add_argument('--page-kb', type=int, default=40, help="Approximate size of synthetic pages")
+    parser.add_argument('--corpus-dir', help="Serve recorded .html pages from this directory instead")
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Mean added latency per request")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of document requests answered with 503")
+    parser.add_argument('--min-delay', type=float, default=0.0, help="Scraper per-domain minimum delay")
+    parser.add_argument('--max-delay', type=float, default=0.0, help="Scraper per-domain maximum delay")
+    parser.add_argument('--sequential', action='store_true', help="Use the sequential scraper instead of the crawl engine")
+    parser.add_argument('--repeat', type=int, default=2,
+                        help="Number of runs; runs after the first exercise the unchanged-document path")
+    parser.add_argument('--seed', type=int, default=1, help="Seed for the synthetic corpus and fault injection")
+    parser.add_argument('--json', help="Also write the report to this file")
+    parser.add_argument('--min-docs-per-second', type=float,
+                        help="Exit with status 1 if the first run is slower than this")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.min_docs_per_second and report['runs'][0]['documents_per_second'] < args.min_docs_per_second:
+        logger.error(f"Throughput {report['runs'][0]['documents_per_second']} docs/s is below "
+                     f"the required {args.min_docs_per_second} docs/s")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
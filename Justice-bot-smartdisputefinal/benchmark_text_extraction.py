@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark text extraction backends per format
+
+Generates synthetic evidence documents (PDF with a text layer, DOCX with
+paragraphs and a table, plain text, and a PNG scan when Tesseract is
+installed), then times every backend registered for each format in
+utils/text_extraction.py, plus the registry itself with a cold and a warm
+extraction cache. The registry should list each format's fastest backend
+first; the report flags formats where the measured order disagrees.
+
+Usage:
+    python benchmark_text_extraction.py [--pages 5,50] [--repeat N] [--json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+
+FILLER = (
+    'the tenant was served with a notice of termination for arrears of rent and the landlord '
+    'applied to the tribunal for an order terminating the tenancy and evicting the tenant '
+    'pursuant to section of the act the hearing was adjourned to allow disclosure of evidence'
+).split()
+LINES_PER_PAGE = 45
+
+
+def synthetic_lines(rng, count):
+    return [' '.join(rng.choices(FILLER, k=12)).capitalize() + '.' for _ in range(count)]
+
+
+def make_pdf(path, rng, pages):
+    import fitz
+    document = fitz.open()
+    for _ in range(pages):
+        page = document.new_page()
+        page.insert_text((50, 50), '\n'.join(synthetic_lines(rng, LINES_PER_PAGE)), fontsize=9)
+    document.save(path)
+    document.close()
+
+
+def make_docx(path, rng, pages):
+    import docx
+    document = docx.Document()
+    for line in synthetic_lines(rng, pages * LINES_PER_PAGE):
+        document.add_paragraph(line)
+    table = document.add_table(rows=pages * 5, cols=3)
+    for row in table.rows:
+        for cell in row.cells:
+            cell.text = ' '.join(rng.choices(FILLER, k=3))
+    document.save(path)
+
+
+def make_txt(path, rng, pages):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(synthetic_lines(rng, pages * LINES_PER_PAGE)))
+
+
+def make_png(path, rng, pages):
+    from PIL import Image, ImageDraw
+    image = Image.new('L', (1700, 2200), 255)
+    draw = ImageDraw.Draw(image)
+    for index, line in enumerate(synthetic_lines(rng, LINES_PER_PAGE)):
+        draw.text((60, 60 + index * 45), line, fill=0)
+    image.save(path)
+
+
+FORMATS = [('pdf', make_pdf), ('docx', make_docx), ('txt', make_txt), ('png', make_png)]
+
+
+def best_of(function, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark text extraction backends per format")
+    parser.add_argument('--pages', default='5,50', help="Comma-separated synthetic document sizes in pages")
+    parser.add_argument('--repeat', type=int, default=3, help="Runs per measurement (best is reported)")
+    parser.add_argument('--seed', type=int, default=1, help="Seed for synthetic text")
+    parser.add_argument('--json', action='store_true', help="Print results as JSON")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='extraction-bench-')
+    # The registry opens its cache on first use; keep benchmark entries out of the real one
+    os.environ['EXTRACTION_CACHE_DIR'] = os.path.join(work_dir, 'cache')
+    logging.getLogger().setLevel(logging.ERROR)
+
+    from utils import text_extraction
+    from utils.extraction_cache import get_extraction_cache
+
+    try:
+        import pytesseract
+        pytesseract.get_tesseract_version()
+        have_tesseract = True
+    except Exception:
+        have_tesseract = False
+
+    rng = random.Random(args.seed)
+    results = []
+    order_warnings = []
+    for extension, make in FORMATS:
+        backends = text_extraction.backends_for(extension)
+        if not backends:
+            print(f"{extension}: no backend available, skipped", file=sys.stderr)
+            continue
+        if extension == 'png' and not have_tesseract:
+            print("png: tesseract binary not installed, skipped", file=sys.stderr)
+            continue
+
+        for pages in [int(size) for size in args.pages.split(',')]:
+            if extension == 'png':
+                pages = 1
+            path = os.path.join(work_dir, f"sample_{pages}.{extension}")
+            make(path, rng, pages)
+            megabytes = os.path.getsize(path) / (1024 * 1024)
+            label = f"{pages}p {extension}"
+            timings = {}
+
+            for backend in backends:
+                seconds, (text, _) = best_of(lambda: backend.extract(path), args.repeat)
+                timings[backend.name] = seconds
+                results.append({'sample': label, 'method': backend.name, 'seconds': round(seconds, 4),
+                                'mb_per_second': round(megabytes / seconds, 2), 'chars': len(text)})
+
+            first_page_seconds, _ = best_of(lambda: next(text_extraction.iter_pages(path), ''), args.repeat)
+            results.append({'sample': label, 'method': 'iter_pages (first page)',
+                            'seconds': round(first_page_seconds, 4), 'mb_per_second': None, 'chars': None})
+
+            get_extraction_cache().clear()
+            cold_seconds, (text, _) = best_of(
+                lambda: (get_extraction_cache().clear(), text_extraction.extract_document(path))[1], args.repeat)
+            warm_seconds, _ = best_of(lambda: text_extraction.extract_document(path), args.repeat)
+            for method, seconds in (('registry (cold cache)', cold_seconds), ('registry (warm cache)', warm_seconds)):
+                results.append({'sample': label, 'method': method, 'seconds': round(seconds, 4),
+                                'mb_per_second': round(megabytes / seconds, 2), 'chars': len(text)})
+
+            fastest = min(timings, key=timings.get)
+            if fastest != backends[0].name:
+                order_warnings.append(f"{label}: registry prefers {backends[0].name} but {fastest} was faster")
+            if extension == 'png':
+                break
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.json:
+        print(json.dumps({'results': results, 'order_warnings': order_warnings}, indent=2))
+        return
+
+    print(f"{'sample':<12} {'method':<24} {'seconds':>9} {'MB/s':>8} {'chars':>9}")
+    for row in results:
+        mb_per_second = f"{row['mb_per_second']:>8.2f}" if row['mb_per_second'] is not None else f"{'-':>8}"
+        chars = f"{row['chars']:>9}" if row['chars'] is not None else f"{'-':>9}"
+        print(f"{row['sample']:<12} {row['method']:<24} {row['seconds']:>9.4f} {mb_per_second} {chars}")
+    for warning in order_warnings:
+        print(f"WARNING: {warning}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,52 +6,148 @@ Handles document text extraction and AI-powered evidence analysis with Canadian
 import os
 import logging
 import json
+import threading
+from collections import Counter
 from datetime import datetime
 from models import Document, Case, CaseMeritScore, db
 from werkzeug.utils import secure_filename
-from gemini_analyzer import analyze_evidence_with_gemini, get_enhanced_fallback_analysis
+from gemini_analyzer import get_gemini_client, gemini_chunk_analyzer, get_enhanced_fallback_analysis
+from utils.text_extraction import extract_text
+from utils.llm_cache import CachingLLMClient, OpenAIChatProvider
+from utils.chunked_analysis import split_sections, run_chunked_analysis
+from utils.llm_executor import ProviderExecutor, Provider, ProviderUnavailable, HEDGE, MODES
 
 def extract_text_from_file(file_path):
     """Extract text content from various file types"""
+    return extract_text(file_path) or ""
+
+def _gemini_chunk_analyzer(processed_files, user):
+    """Per-chunk evidence analysis from Google Gemini; raises ProviderUnavailable if it is not configured"""
+    client = get_gemini_client()
+    if client is None:
+        raise ProviderUnavailable("Gemini client not configured")
+    return gemini_chunk_analyzer(client, processed_files, user)
+
+def _openai_chunk_analyzer(processed_files, user):
+    """Per-chunk evidence analysis from OpenAI; raises ProviderUnavailable if it is not configured"""
     try:
-        file_extension = os.path.splitext(file_path)[1].lower()
-        
-        if file_extension == '.txt':
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
-        elif file_extension == '.pdf':
-            try:
-                import PyPDF2
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    text = ""
-                    for page in pdf_reader.pages:
-                        text += page.extract_text()
-                    return text
-            except Exception:
-                logging.warning(f"Failed to extract PDF text from {file_path}")
-                return ""
-        elif file_extension in ['.docx', '.doc']:
-            try:
-                from docx import Document
-                doc = Document(file_path)
-                text = ""
-                for paragraph in doc.paragraphs:
-                    text += paragraph.text + "\n"
-                return text
-            except Exception:
-                logging.warning(f"Failed to extract Word document text from {file_path}")
-                return ""
-        else:
-            logging.warning(f"Unsupported file type: {file_extension}")
-            return ""
-    except Exception as e:
-        logging.error(f"Error extracting text from {file_path}: {str(e)}")
-        return ""
+        from openai import OpenAI
+    except ImportError:
+        raise ProviderUnavailable("OpenAI package not installed")
+    
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        raise ProviderUnavailable("OPENAI_API_KEY not set")
+    client = OpenAI(api_key=api_key)
+    
+    system_prompt = f"""You are a Canadian legal AI assistant specializing in Canadian federal and provincial law.
+
+Analyze the following legal documents for a case in {getattr(user, 'province', 'Ontario')}, Canada.
+
+Focus on:
+- Canadian Charter of Rights and Freedoms
+- Provincial laws for {getattr(user, 'province', 'Ontario')}
+- Federal statutes (Criminal Code, Family Law, etc.)
+- Municipal bylaws where applicable
+- Self-representation strategies for Canadian courts
+
+Provide analysis in JSON format with these fields:
+- merit_score: Integer 0-100
+- confidence_level: "high", "moderate", or "low"
+- key_facts: Array of key facts
+- legal_strengths: Array of strengths
+- legal_weaknesses: Array of weaknesses  
+- recommended_actions: Array of next steps
+- relevant_laws: Array of applicable Canadian laws
+- timeline_estimate: String
+- cost_estimate: String
+- settlement_potential: "high", "moderate", or "low"
+
+IMPORTANT: JSON only, no extra text."""
+
+    llm = CachingLLMClient(OpenAIChatProvider(client))
+
+    def analyze_chunk(chunk):
+        content = llm.complete(
+            'evidence_analysis',
+            model="gpt-4o",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"Canadian Legal Analysis: {chunk}"}
+            ],
+            response_format={"type": "json_object"},
+            max_tokens=2000,
+            temperature=0.3
+        )
+        if not content:
+            raise ValueError("Empty response from OpenAI")
+        return json.loads(content)
+    
+    return analyze_chunk
+
+CHUNK_ANALYZER_FACTORIES = {
+    'gemini': _gemini_chunk_analyzer,
+    'openai': _openai_chunk_analyzer,
+}
+
+PROVIDER_LABELS = {
+    'gemini': 'Google Gemini',
+    'openai': 'OpenAI GPT-4',
+}
+
+class ChunkAnalyzers:
+    """One request's per-chunk analyzers, each created the first time its provider is asked for a chunk"""
+    
+    def __init__(self, processed_files, user):
+        self.processed_files = processed_files
+        self.user = user
+        self._analyzers = {}
+        self._lock = threading.Lock()
+    
+    def analyze(self, provider_name, chunk):
+        with self._lock:
+            analyzer = self._analyzers.get(provider_name)
+            if analyzer is None:
+                analyzer = CHUNK_ANALYZER_FACTORIES[provider_name](self.processed_files, self.user)
+                self._analyzers[provider_name] = analyzer
+        return analyzer(chunk)
 
-def analyze_evidence(processed_files, user):
+def _chunk_provider(name, api_key_variable):
+    return Provider(name, lambda chunk, analyzers: analyzers.analyze(name, chunk),
+                    enabled=lambda: bool(os.environ.get(api_key_variable)))
+
+def _executor_settings():
+    """EVIDENCE_AI_MODE and EVIDENCE_AI_DEADLINE, falling back to the defaults when mistyped"""
+    mode = os.environ.get('EVIDENCE_AI_MODE', HEDGE)
+    if mode not in MODES:
+        logging.warning(f"Unknown EVIDENCE_AI_MODE {mode!r} (expected one of {', '.join(MODES)}); using {HEDGE}")
+        mode = HEDGE
+    try:
+        deadline = float(os.environ.get('EVIDENCE_AI_DEADLINE', 60))
+    except ValueError:
+        logging.warning(f"Invalid EVIDENCE_AI_DEADLINE {os.environ['EVIDENCE_AI_DEADLINE']!r}; using 60 seconds")
+        deadline = 60.0
+    return mode, deadline
+
+_mode, _deadline = _executor_settings()
+
+# Shared by all requests so circuit breakers and latency histograms persist between them.
+# Runs one chunk at a time: the deadline and hedging apply per chunk, so a long bundle
+# is not cut off as a whole and a slow chunk is re-asked without redoing the others
+EVIDENCE_AI_EXECUTOR = ProviderExecutor(
+    'evidence_analysis',
+    [
+        _chunk_provider('gemini', "GEMINI_API_KEY"),
+        _chunk_provider('openai', "OPENAI_API_KEY"),
+    ],
+    mode=_mode,
+    deadline=_deadline
+)
+
+def analyze_evidence(processed_files, user, progress=None):
     """
     Comprehensive Canadian legal evidence analysis using multiple AI providers
+    progress, if given, is called with chunked-analysis events (see utils/chunked_analysis)
     """
     try:
         # Extract text from all uploaded documents
@@ -73,77 +169,32 @@ def analyze_evidence(processed_files, user):
         if not combined_text.strip():
             return get_enhanced_fallback_analysis(combined_text, processed_files, user)
         
-        # Try Gemini first, then OpenAI, then fallback
+        # Long evidence is analyzed in section chunks and merged rather than truncated. For each
+        # chunk Gemini (free tier) is preferred and OpenAI is the backup; the executor hedges or
+        # races them within the chunk's deadline and skips a provider whose circuit is open
         logging.info("Attempting Canadian legal analysis...")
+        analyzers = ChunkAnalyzers(processed_files, user)
+        chunk_providers = []
         
-        # First try Google Gemini (free tier available)
-        try:
-            ai_analysis = analyze_evidence_with_gemini(combined_text, processed_files, user)
-            if ai_analysis and ai_analysis.get('ai_provider') == 'Google Gemini':
-                logging.info("Successfully completed Gemini analysis")
-                ai_analysis['document_breakdown'] = document_summaries
-                return ai_analysis
-        except Exception as gemini_error:
-            logging.warning(f"Gemini analysis failed: {gemini_error}")
+        def analyze_chunk(chunk):
+            provider_name, result = EVIDENCE_AI_EXECUTOR.run(chunk, analyzers)
+            chunk_providers.append(provider_name)
+            return result
         
-        # Try OpenAI as backup
         try:
-            from openai import OpenAI
-            
-            api_key = os.environ.get("OPENAI_API_KEY")
-            if api_key:
-                client = OpenAI(api_key=api_key)
-                
-                system_prompt = f"""You are a Canadian legal AI assistant specializing in Canadian federal and provincial law.
-
-Analyze the following legal documents for a case in {getattr(user, 'province', 'Ontario')}, Canada.
-
-Focus on:
-- Canadian Charter of Rights and Freedoms
-- Provincial laws for {getattr(user, 'province', 'Ontario')}
-- Federal statutes (Criminal Code, Family Law, etc.)
-- Municipal bylaws where applicable
-- Self-representation strategies for Canadian courts
-
-Provide analysis in JSON format with these fields:
-- merit_score: Integer 0-100
-- confidence_level: "high", "moderate", or "low"
-- key_facts: Array of key facts
-- legal_strengths: Array of strengths
-- legal_weaknesses: Array of weaknesses  
-- recommended_actions: Array of next steps
-- relevant_laws: Array of applicable Canadian laws
-- timeline_estimate: String
-- cost_estimate: String
-- settlement_potential: "high", "moderate", or "low"
-
-IMPORTANT: JSON only, no extra text."""
-
-                response = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": f"Canadian Legal Analysis: {combined_text[:8000]}"}
-                    ],
-                    response_format={"type": "json_object"},
-                    max_tokens=2000,
-                    temperature=0.3
-                )
-                
-                if response.choices[0].message.content:
-                    ai_analysis = json.loads(response.choices[0].message.content)
-                    ai_analysis.update({
-                        'evidence_summary': f"Analyzed {len(processed_files)} documents",
-                        'document_breakdown': document_summaries,
-                        'ai_provider': 'OpenAI GPT-4',
-                        'analysis_date': datetime.now().isoformat(),
-                        'disclaimer': "This AI analysis provides Canadian legal information, not legal advice."
-                    })
-                    logging.info("Successfully completed OpenAI analysis")
-                    return ai_analysis
-                    
-        except Exception as openai_error:
-            logging.warning(f"OpenAI analysis failed: {openai_error}")
+            ai_analysis = run_chunked_analysis(split_sections(combined_text), analyze_chunk, progress=progress)
+            providers = [name for name, _ in Counter(chunk_providers).most_common()]
+            logging.info(f"Successfully completed {', '.join(providers)} analysis")
+            ai_analysis.update({
+                'evidence_summary': f"Analyzed {len(processed_files)} documents with {len(combined_text)} characters",
+                'ai_provider': ' + '.join(PROVIDER_LABELS[name] for name in providers),
+                'analysis_date': datetime.now().isoformat(),
+                'disclaimer': "This AI analysis provides Canadian legal information, not legal advice. We are not lawyers. Review all analysis with qualified legal counsel.",
+                'document_breakdown': document_summaries
+            })
+            return ai_analysis
+        except Exception as ai_error:
+            logging.warning(f"AI analysis unavailable: {ai_error}")
         
         # Use enhanced fallback
         logging.info("Using enhanced Canadian legal fallback analysis")
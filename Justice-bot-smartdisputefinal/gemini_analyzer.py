@@ -8,8 +8,9 @@ import logging
 import json
 from datetime import datetime
 from google import genai
-from google.genai import types
 from pydantic import BaseModel
+from utils.llm_cache import CachingLLMClient, GeminiProvider
+from utils.chunked_analysis import split_sections, run_chunked_analysis
 
 # Initialize Gemini client
 def get_gemini_client():
@@ -38,18 +39,13 @@ class LegalAnalysis(BaseModel):
     cost_estimate: str
     settlement_potential: str
 
-def analyze_evidence_with_gemini(combined_text, processed_files, user):
+def gemini_chunk_analyzer(client, processed_files, user):
     """
-    Analyze legal evidence using Google Gemini AI
-    Provides comprehensive merit scores and legal strategies
+    Return a function that asks Gemini for the legal analysis of one chunk of evidence
+    It raises on API errors, empty responses and invalid JSON, so callers can fall back or try another provider
     """
-    client = get_gemini_client()
-    if not client:
-        return get_enhanced_fallback_analysis(combined_text, processed_files, user)
-    
-    try:
-        # Create comprehensive legal analysis prompt
-        system_prompt = f"""You are a Canadian legal AI assistant specializing in legal document analysis.
+    # Create comprehensive legal analysis prompt
+    system_prompt = f"""You are a Canadian legal AI assistant specializing in legal document analysis.
 
 Analyze the following legal documents and evidence for a case in {getattr(user, 'province', 'Ontario')}, Canada.
 
@@ -70,9 +66,12 @@ Consider the user's legal issue type: {getattr(user, 'legal_issue_types', 'gener
 
 IMPORTANT: Respond only with valid JSON. Do not include explanatory text outside the JSON."""
 
+    llm = CachingLLMClient(GeminiProvider(client))
+
+    def analyze_chunk(chunk):
         user_prompt = f"""Legal Documents and Evidence to Analyze:
 
-{combined_text[:8000]}  # Limit to avoid token limits
+{chunk}
 
 Document Summary:
 - Total documents: {len(processed_files)}
@@ -81,37 +80,58 @@ Document Summary:
 
 Provide detailed Canadian legal analysis in the specified JSON format."""
 
-        # Generate analysis with Gemini
-        response = client.models.generate_content(
+        # Generate analysis with Gemini (answered from the cache for evidence already analyzed)
+        response_text = llm.complete(
+            'gemini_evidence_analysis',
             model="gemini-2.5-flash",
-            contents=[
-                types.Content(role="user", parts=[types.Part(text=user_prompt)])
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
             ],
-            config=types.GenerateContentConfig(
-                system_instruction=system_prompt,
-                response_mime_type="application/json",
-                response_schema=LegalAnalysis,
-                temperature=0.3
-            ),
+            response_mime_type="application/json",
+            response_schema=LegalAnalysis,
+            temperature=0.3
         )
 
-        if not response.text:
-            logging.error("Empty response from Gemini")
-            return get_enhanced_fallback_analysis(combined_text, processed_files, user)
+        if not response_text:
+            raise ValueError("Empty response from Gemini")
+        return json.loads(response_text)
 
-        # Parse and enhance the response
-        ai_analysis = json.loads(response.text)
-        
-        # Add metadata
-        ai_analysis.update({
-            'evidence_summary': f"Analyzed {len(processed_files)} documents with {len(combined_text)} characters",
-            'ai_provider': 'Google Gemini',
-            'analysis_date': datetime.now().isoformat(),
-            'disclaimer': "This AI analysis provides legal information, not legal advice. We are not lawyers. Review all analysis with qualified legal counsel."
-        })
-        
-        logging.info(f"Gemini analysis completed with merit score: {ai_analysis.get('merit_score', 'N/A')}")
-        return ai_analysis
+    return analyze_chunk
+
+def request_gemini_analysis(client, combined_text, processed_files, user, progress=None):
+    """
+    Ask Gemini for the legal analysis of the evidence
+    Long evidence is analyzed in concurrent section-aligned chunks whose findings are merged
+    Raises on API errors, empty responses and invalid JSON, so callers can fall back or try another provider
+    """
+    analyze_chunk = gemini_chunk_analyzer(client, processed_files, user)
+
+    # Parse, merge and enhance the responses
+    ai_analysis = run_chunked_analysis(split_sections(combined_text), analyze_chunk, progress=progress)
+    
+    # Add metadata
+    ai_analysis.update({
+        'evidence_summary': f"Analyzed {len(processed_files)} documents with {len(combined_text)} characters",
+        'ai_provider': 'Google Gemini',
+        'analysis_date': datetime.now().isoformat(),
+        'disclaimer': "This AI analysis provides legal information, not legal advice. We are not lawyers. Review all analysis with qualified legal counsel."
+    })
+    
+    logging.info(f"Gemini analysis completed with merit score: {ai_analysis.get('merit_score', 'N/A')}")
+    return ai_analysis
+
+def analyze_evidence_with_gemini(combined_text, processed_files, user):
+    """
+    Analyze legal evidence using Google Gemini AI
+    Provides comprehensive merit scores and legal strategies
+    """
+    client = get_gemini_client()
+    if not client:
+        return get_enhanced_fallback_analysis(combined_text, processed_files, user)
+    
+    try:
+        return request_gemini_analysis(client, combined_text, processed_files, user)
         
     except json.JSONDecodeError:
         logging.error("Failed to parse Gemini JSON response")
@@ -11,11 +11,10 @@ from flask import Blueprint, request, jsonify, render_template
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 import os
-import PyPDF2
-import docx
 from app import db
 from models import User, Case, Document, LegalReference
 import openai
+from utils.text_extraction import extract_text
 
 legal_analyzer_bp = Blueprint('legal_analyzer', __name__, url_prefix='/legal-analyzer')
 logger = logging.getLogger(__name__)
@@ -100,29 +99,8 @@ class LegalDocumentAnalyzer:
     
     def extract_text_from_document(self, file_path: str, file_type: str) -> str:
         """Extract text from uploaded documents"""
-        try:
-            text = ""
-            
-            if file_type.lower() == 'pdf':
-                with open(file_path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text() + "\n"
-            
-            elif file_type.lower() in ['docx', 'doc']:
-                doc = docx.Document(file_path)
-                for paragraph in doc.paragraphs:
-                    text += paragraph.text + "\n"
-            
-            elif file_type.lower() == 'txt':
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    text = file.read()
-            
-            return text.strip()
-            
-        except Exception as e:
-            logger.error(f"Error extracting text from {file_path}: {e}")
-            return ""
+        text = extract_text(file_path, file_extension=(file_type or '').lower() or None)
+        return (text or "").strip()
     
     def analyze_legal_issues(self, document_text: str) -> Dict:
         """Analyze document to identify legal issues and relevant laws"""
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Migrate the scraped legal corpus to the segmented storage format
+
+Converts the <source>/<hash>.txt and <hash>.json pairs under
+data/legal_source_data into compressed segment files (see
+utils/legal_corpus_store.py), then rebuilds the search index and metadata
+catalog from the segments. Near-duplicate fingerprints are rebuilt first so the
+search index can collapse copies of the same text.
+
+Usage:
+    python migrate_legal_corpus.py [--data-dir DIR] [--delete-files]
+"""
+
+import argparse
+import logging
+
+from utils.legal_corpus_store import LegalCorpusStore
+from utils.legal_search_index import LegalSearchIndex
+from utils.legal_catalog import LegalCatalog
+from utils.legal_fingerprints import LegalFingerprintIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate scraped legal documents into segment files")
+    parser.add_argument('--data-dir', default='data/legal_source_data',
+                        help="Directory containing scraped documents")
+    parser.add_argument('--delete-files', action='store_true',
+                        help="Remove each .txt/.json pair once it has been migrated")
+    args = parser.parse_args()
+
+    store = LegalCorpusStore(args.data_dir)
+    migrated = store.import_directory_tree(delete_files=args.delete_files)
+    logger.info(f"Corpus store now holds {len(store)} documents ({migrated} migrated)")
+
+    LegalFingerprintIndex(args.data_dir).rebuild()
+    LegalSearchIndex(args.data_dir).rebuild()
+    LegalCatalog(args.data_dir).rebuild()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,7 +7,7 @@ from datetime import datetime
 from database_fix import db
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import String, Text, Boolean, Integer, DateTime, Float, ForeignKey
+from sqlalchemy import String, Text, Boolean, Integer, DateTime, Float, ForeignKey, inspect, text
 from sqlalchemy.orm import relationship
 
 class User(UserMixin, db.Model):
@@ -88,6 +88,7 @@ class Case(db.Model):
     # Relationships
     user = relationship('User', back_populates='cases')
     documents = relationship('Document', back_populates='case', lazy='dynamic')
+    stored_analysis = relationship('CaseAnalysis', back_populates='case', uselist=False, cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Case {self.title}>'
@@ -113,6 +114,7 @@ class Document(db.Model):
     # Content analysis
     extracted_text = db.Column(Text)  # Text extracted from document
     ai_analysis = db.Column(Text)  # AI analysis of document content
+    doc_metadata = db.Column(db.JSON)  # Dates, names and other entities found while processing
     
     # Status
     is_processed = db.Column(Boolean, default=False)
@@ -124,10 +126,88 @@ class Document(db.Model):
     
     # Relationships
     case = relationship('Case', back_populates='documents')
+    analysis_artifact = relationship('DocumentAnalysis', back_populates='document', uselist=False, cascade='all, delete-orphan')
+    processing_jobs = relationship('ProcessingJob', back_populates='document', cascade='all, delete-orphan')
     
     def __repr__(self):
         return f'<Document {self.original_filename}>'
 
+class DocumentAnalysis(db.Model):
+    """Stored per-document analysis artifacts merged by case analysis (see utils/case_artifacts.py)"""
+    __tablename__ = 'document_analyses'
+    
+    id = db.Column(Integer, primary_key=True)
+    document_id = db.Column(Integer, ForeignKey('documents.id'), nullable=False, unique=True, index=True)
+    
+    # Artifact version, processed_at and text length the artifact was built from
+    source_key = db.Column(String(100), nullable=False)
+    text_sha256 = db.Column(String(64))
+    artifact = db.Column(Text, nullable=False)  # JSON
+    
+    # Timestamps
+    created_at = db.Column(DateTime, default=datetime.utcnow)
+    updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    document = relationship('Document', back_populates='analysis_artifact')
+    
+    def __repr__(self):
+        return f'<DocumentAnalysis {self.document_id}>'
+
+class CaseAnalysis(db.Model):
+    """Stored case-level AI review, reused while the case's description and documents are unchanged"""
+    __tablename__ = 'case_analyses'
+    
+    id = db.Column(Integer, primary_key=True)
+    case_id = db.Column(Integer, ForeignKey('cases.id'), nullable=False, unique=True, index=True)
+    
+    # Hash of the inputs the review was computed from
+    fingerprint = db.Column(String(64), nullable=False)
+    result = db.Column(Text, nullable=False)  # JSON from analyze_legal_case
+    merit_score = db.Column(Integer)
+    
+    # Timestamps
+    created_at = db.Column(DateTime, default=datetime.utcnow)
+    updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    case = relationship('Case', back_populates='stored_analysis')
+    
+    def __repr__(self):
+        return f'<CaseAnalysis {self.case_id}>'
+
+class ProcessingJob(db.Model):
+    """Queued background work on an uploaded document (see utils/document_jobs.py)"""
+    __tablename__ = 'processing_jobs'
+    
+    id = db.Column(Integer, primary_key=True)
+    document_id = db.Column(Integer, ForeignKey('documents.id', ondelete='CASCADE'), nullable=False, index=True)
+    
+    # Job definition
+    job_type = db.Column(String(50), nullable=False, default='process_document')
+    file_extension = db.Column(String(10))
+    priority = db.Column(Integer, nullable=False, default=0)  # Higher runs first
+    
+    # Status
+    status = db.Column(String(20), nullable=False, default='queued', index=True)  # queued, running, done, failed
+    attempts = db.Column(Integer, nullable=False, default=0)
+    max_attempts = db.Column(Integer, nullable=False, default=3)
+    last_error = db.Column(Text)
+    worker = db.Column(String(100))  # Worker holding the job while running
+    
+    # Timestamps
+    created_at = db.Column(DateTime, default=datetime.utcnow)
+    run_after = db.Column(DateTime, default=datetime.utcnow, index=True)  # Not picked up before this (retry backoff)
+    locked_until = db.Column(DateTime)  # A running job past this is presumed abandoned and requeued
+    started_at = db.Column(DateTime)
+    finished_at = db.Column(DateTime)
+    
+    # Relationships
+    document = relationship('Document', back_populates='processing_jobs')
+    
+    def __repr__(self):
+        return f'<ProcessingJob {self.id} {self.job_type} {self.status}>'
+
 class CourtLocation(db.Model):
     """Court location data for Canadian courts"""
     __tablename__ = 'court_locations'
@@ -152,4 +232,22 @@ class CourtLocation(db.Model):
     updated_at = db.Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def __repr__(self):
-        return f'<CourtLocation {self.name}>'
\ No newline at end of file
+        return f'<CourtLocation {self.name}>'
+
+# Columns added to existing tables after they were first created; create_all() only creates missing tables
+ADDED_COLUMNS = {
+    'documents': [('doc_metadata', 'JSON')],
+}
+
+def upgrade_schema(engine):
+    """Add any of ADDED_COLUMNS that an existing database is missing"""
+    inspector = inspect(engine)
+    existing_tables = inspector.get_table_names()
+    with engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            if table not in existing_tables:
+                continue
+            present = {column['name'] for column in inspector.get_columns(table)}
+            for name, column_type in columns:
+                if name not in present:
+                    connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {column_type}'))
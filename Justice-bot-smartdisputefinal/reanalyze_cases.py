@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Re-run case analysis over the whole cases table
+
+The batch equivalent of /cases/<id>/reanalyze (see
+utils/case_reanalysis.run_reanalysis): case ids are streamed in id order,
+analyzed in batches across worker processes and written one commit per
+batch. Progress is checkpointed after every batch; --resume continues an
+interrupted run and retries the cases that failed.
+
+--dry-run reports how merit scores and classifications would change without
+writing them; --diff also lists every case that would change.
+
+Usage:
+    python reanalyze_cases.py [--workers 4] [--batch-size 50] [--resume] [--limit N]
+    python reanalyze_cases.py --dry-run | --diff
+"""
+
+import json
+import logging
+import argparse
+
+from utils.case_reanalysis import (run_reanalysis, WRITE, DRY_RUN, DIFF,
+                                   DEFAULT_BATCH_SIZE, DEFAULT_CHECKPOINT)
+
+
+def print_diff(result):
+    for change in result['changes']:
+        old_score, new_score = change['merit_score']
+        old_class, new_class = change['classification']
+        if old_score == new_score and old_class == new_class:
+            continue
+        parts = []
+        if old_score != new_score:
+            parts.append(f"merit {old_score} -> {new_score}")
+        if old_class != new_class:
+            parts.append(f"classification {old_class!r} -> {new_class!r}")
+        print(f"case {change['case_id']}: " + ", ".join(parts))
+    for case_id, error in result['failed'].items():
+        print(f"case {case_id}: FAILED {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-run case analysis over the whole cases table")
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument('--dry-run', action='store_true', help="Report how cases would change without writing")
+    modes.add_argument('--diff', action='store_true', help="Like --dry-run, also listing every changed case")
+    parser.add_argument('--workers', type=int, help="Worker processes (default: CPU count; 0 runs in this process)")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Cases per worker task and commit")
+    parser.add_argument('--checkpoint', help=f"Checkpoint file (default for writing runs: {DEFAULT_CHECKPOINT})")
+    parser.add_argument('--resume', action='store_true', help="Retry the checkpoint's failed cases, then continue after its last finished case")
+    parser.add_argument('--limit', type=int, help="Analyze at most this many cases")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+
+    mode = DIFF if args.diff else DRY_RUN if args.dry_run else WRITE
+    # Reporting runs only checkpoint when asked to, so they never disturb a writing run's progress
+    checkpoint = args.checkpoint or (DEFAULT_CHECKPOINT if mode == WRITE else None)
+    if args.resume and not checkpoint:
+        parser.error("--resume with --dry-run or --diff needs --checkpoint")
+
+    def on_batch(result, progress):
+        if mode == DIFF:
+            print_diff(result)
+        print(f"[{progress['processed']} cases, {progress['changed']} changed, {progress['failed']} failed, "
+              f"{progress['cases_per_second']} cases/s, last id {progress['last_case_id']}]", flush=True)
+
+    from app import app
+    with app.app_context():
+        summary = run_reanalysis(mode=mode, workers=args.workers, batch_size=args.batch_size,
+                                 checkpoint_path=checkpoint, resume=args.resume, limit=args.limit,
+                                 on_batch=on_batch)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,19 +1,29 @@
 import os
+import json
 import uuid
+import mimetypes
+import queue
 import logging
+import threading
 from datetime import datetime, timedelta
 from werkzeug.utils import secure_filename
 from flask import (
     render_template, request, redirect, url_for, flash, 
-    session, jsonify, send_file, abort
+    session, jsonify, send_file, abort, Response
 )
 from flask_login import login_user, logout_user, login_required, current_user
 
 from sqlalchemy import func
+from sqlalchemy.orm import defer
 from database import db
 from models import User, Case, Document, Payment, ChatSession, ChatMessage, CaseMeritScore, Testimonial, GeneratedForm, MailingRequest
-from utils.ocr import process_document
+from utils.document_jobs import (enqueue_document, notify_workers, document_status, pending_document_ids,
+                                 start_document_workers, LARGE_FILE_BYTES)
+from utils.chunked_upload import save_chunk, received_chunks, assemble_chunks, ChunkError
+from utils.evidence_store import store_upload, adopt_file, find_processed_duplicate
 from utils.legal_analyzer import analyze_case, get_merit_score, get_recommended_forms
+from utils.case_artifacts import document_artifacts
+from utils.chunked_analysis import AnalysisCancelled
 from utils.document_generator import generate_legal_document
 from utils.canlii_api import search_canlii, get_relevant_precedents
 # Using our new payment_service module
@@ -43,6 +53,9 @@ def init_routes(app):
     # Allowed file extensions
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'doc', 'docx'}
     
+    # Uploaded documents are processed (OCR, entities, search) by background workers
+    start_document_workers(app)
+    
     @app.route('/google4b945706e36a5db4.html')
     def google_verification():
         return 'google-site-verification: google4b945706e36a5db4.html'
@@ -54,6 +67,36 @@ def init_routes(app):
     def allowed_file(filename):
         return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
     
+    def add_uploaded_document(case_id, original_filename, file_path, file_extension, duplicate):
+        """
+        Create the Document row for a stored upload and queue it for processing
+        
+        A duplicate of a file the user already uploaded copies the processed
+        document's text and metadata instead of being queued.
+        """
+        new_document = Document(
+            case_id=case_id,
+            filename=os.path.basename(file_path),
+            original_filename=original_filename,
+            file_path=file_path,
+            file_size=os.path.getsize(file_path),
+            content_type=mimetypes.guess_type(original_filename)[0] or 'application/octet-stream',
+            document_type='evidence',
+            is_processed=False
+        )
+        db.session.add(new_document)
+        db.session.flush()
+        
+        processed = find_processed_duplicate(file_path) if duplicate else None
+        if processed is not None:
+            new_document.extracted_text = processed.extracted_text
+            new_document.doc_metadata = processed.doc_metadata
+            new_document.is_processed = True
+            new_document.processed_at = datetime.utcnow()
+        else:
+            enqueue_document(new_document, file_extension)
+        return new_document
+    
     @app.route('/')
     def index():
         # Get featured testimonials for homepage
@@ -472,46 +515,26 @@ def init_routes(app):
                         else:
                             file_extension = 'unknown'
                             
-                        # Create unique filename
-                        unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
-                        
                         # Log upload attempt
                         app.logger.info(f"Saving file: {original_filename} (size: {file.content_length if hasattr(file, 'content_length') else 'unknown'})")
                         
-                        # Save file to disk
-                        file_path = os.path.join(user_dir, unique_filename)
-                        file.save(file_path)
-                        app.logger.info(f"File saved successfully to {file_path}")
+                        # Save file to the user's evidence store (once per distinct content)
+                        file_path, _, _, duplicate = store_upload(file, app.config['UPLOAD_FOLDER'], current_user.id, file_extension)
+                        app.logger.info(f"File saved successfully to {file_path}" + (" (duplicate)" if duplicate else ""))
                         
-                        # Process document with OCR - with error handling
-                        try:
-                            extracted_text, metadata = process_document(file_path, file_extension)
-                        except Exception as e:
-                            app.logger.error(f"Error processing document: {str(e)}")
-                            extracted_text = "Error extracting text. The file may be corrupted or in an unsupported format."
-                            metadata = {"error": str(e)}
-                        
-                        # Save document info to database
-                        new_document = Document(
-                            user_id=current_user.id,
-                            case_id=new_case.id,
-                            filename=original_filename,
-                            file_path=file_path,
-                            file_type=file_extension,
-                            extracted_text=extracted_text,
-                            doc_metadata=metadata
-                        )
-                        db.session.add(new_document)
+                        # Save document info to database; text is extracted in the background
+                        add_uploaded_document(new_case.id, original_filename, file_path, file_extension, duplicate)
                         files_processed += 1
                     except Exception as e:
                         app.logger.error(f"Error handling file upload: {str(e)}")
                         flash(f"Error uploading {file.filename}: {str(e)}", 'danger')
             
             db.session.commit()
+            notify_workers()
             
             if files_processed > 0:
                 flash(f"Successfully uploaded {files_processed} files", 'success')
-                return redirect(url_for('analyze', case_id=new_case.id))
+                return redirect(url_for('processing', case_id=new_case.id))
             else:
                 flash("No files were successfully uploaded. Please try again with supported file types.", 'warning')
                 return redirect(url_for('upload'))
@@ -553,49 +576,29 @@ def init_routes(app):
                         else:
                             file_extension = 'unknown'
                             
-                        # Create unique filename
-                        unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
-                        
                         # Log upload attempt
                         app.logger.info(f"Saving file: {original_filename} (size: {file.content_length if hasattr(file, 'content_length') else 'unknown'})")
                         
-                        # Save file to disk
-                        file_path = os.path.join(user_dir, unique_filename)
-                        file.save(file_path)
-                        app.logger.info(f"File saved successfully to {file_path}")
+                        # Save file to the user's evidence store (once per distinct content)
+                        file_path, _, _, duplicate = store_upload(file, app.config['UPLOAD_FOLDER'], current_user.id, file_extension)
+                        app.logger.info(f"File saved successfully to {file_path}" + (" (duplicate)" if duplicate else ""))
                         
-                        # Process document with OCR - with error handling
-                        try:
-                            extracted_text, metadata = process_document(file_path, file_extension)
-                        except Exception as e:
-                            app.logger.error(f"Error processing document: {str(e)}")
-                            extracted_text = "Error extracting text. The file may be corrupted or in an unsupported format."
-                            metadata = {"error": str(e)}
-                        
-                        # Save document info to database
-                        new_document = Document(
-                            user_id=current_user.id,
-                            case_id=case.id,
-                            filename=original_filename,
-                            file_path=file_path,
-                            file_type=file_extension,
-                            extracted_text=extracted_text,
-                            doc_metadata=metadata
-                        )
-                        db.session.add(new_document)
+                        # Save document info to database; text is extracted in the background
+                        add_uploaded_document(case.id, original_filename, file_path, file_extension, duplicate)
                         files_processed += 1
                     except Exception as e:
                         app.logger.error(f"Error handling file upload: {str(e)}")
                         flash(f"Error uploading {file.filename}: {str(e)}", 'danger')
             
             db.session.commit()
+            notify_workers()
             
             if files_processed > 0:
                 flash(f"Successfully added {files_processed} new documents to your case", 'success')
                 # Update the case modified time
                 case.updated_at = datetime.utcnow()
                 db.session.commit()
-                return redirect(url_for('analyze', case_id=case.id))
+                return redirect(url_for('processing', case_id=case.id))
             else:
                 flash("No files were successfully uploaded. Please try again with supported file types.", 'warning')
                 return redirect(url_for('add_files', case_id=case_id))
@@ -603,6 +606,25 @@ def init_routes(app):
         # GET request - show form
         return render_template('add_files.html', case=case)
     
+    @app.route('/processing/<int:case_id>')
+    @login_required
+    def processing(case_id):
+        """Wait for a case's uploaded documents to be processed, then continue to the analysis"""
+        case = Case.query.get_or_404(case_id)
+        
+        # Check if user owns the case
+        if case.user_id != current_user.id:
+            abort(403)
+        
+        documents = (Document.query.filter_by(case_id=case.id).order_by(Document.id)
+                     .options(defer(Document.extracted_text)).all())
+        pending = pending_document_ids([document.id for document in documents if not document.is_processed])
+        if not pending:
+            return redirect(url_for('analyze', case_id=case.id))
+        
+        return render_template('processing.html', case=case,
+                               documents=[document for document in documents if document.id in pending])
+    
     @app.route('/analyze/<int:case_id>')
     @login_required
     def analyze(case_id):
@@ -613,20 +635,28 @@ def init_routes(app):
             if case.user_id != current_user.id:
                 abort(403)
                 
-            # Get documents for this case
-            documents = Document.query.filter_by(case_id=case.id).all()
+            # Get documents for this case; text is only read for documents without current artifacts
+            documents = (Document.query.filter_by(case_id=case.id).order_by(Document.id)
+                         .options(defer(Document.extracted_text)).all())
             
             # If no documents, redirect to upload
             if not documents:
                 flash('Please upload documents first', 'warning')
                 return redirect(url_for('upload'))
             
+            # Documents still queued for OCR have no text yet; scoring without them would store a wrong merit score
+            unprocessed = [document for document in documents if not document.is_processed]
+            if pending_document_ids([document.id for document in unprocessed]):
+                return redirect(url_for('processing', case_id=case.id))
+            if unprocessed:
+                flash(f'{len(unprocessed)} document(s) could not be read and are not included in this analysis.', 'warning')
+            
             # Add debug log    
             logging.debug(f"Starting analysis for case {case_id} with {len(documents)} documents")
             
             # Analyze case with robust error handling
             try:
-                analysis = analyze_case(case, documents)
+                analysis = analyze_case(case, documents, document_artifacts(documents))
                 logging.debug(f"Analysis successful for case {case_id}")
                 
                 # Check if analysis failed due to OpenAI API quota or rate limit issues
@@ -705,6 +735,79 @@ def init_routes(app):
             logging.error(f"Unhandled error in analyze route: {str(e)}")
             flash('An unexpected error occurred. Please try again later.', 'danger')
             return redirect(url_for('dashboard'))
+    
+    @app.route('/api/analyze/<int:case_id>/stream')
+    @login_required
+    def analyze_stream(case_id):
+        """Run the case analysis, streaming chunk progress as server-sent events, and store its merit score"""
+        case = Case.query.get_or_404(case_id)
+        if case.user_id != current_user.id:
+            abort(403)
+        
+        # Same preconditions as /analyze; text is only read for documents without current artifacts
+        documents = (Document.query.filter_by(case_id=case.id).order_by(Document.id)
+                     .options(defer(Document.extracted_text)).all())
+        if not documents:
+            return jsonify({'error': 'Please upload documents first'}), 400
+        if pending_document_ids([document.id for document in documents if not document.is_processed]):
+            return jsonify({'error': 'Documents are still being processed',
+                            'processing_url': url_for('processing', case_id=case.id)}), 409
+        
+        artifacts_by_id = dict(zip([document.id for document in documents], document_artifacts(documents)))
+        db.session.commit()
+        
+        events = queue.Queue()
+        cancelled = threading.Event()
+        
+        def report(event):
+            # Raising stops the chunks not yet sent once the client has gone
+            if cancelled.is_set():
+                raise AnalysisCancelled(f"Client left the analysis stream for case {case_id}")
+            events.put(event)
+        
+        def run_analysis():
+            # The thread gets its own app context and session; rows are reloaded there by id
+            with app.app_context():
+                try:
+                    thread_case = db.session.get(Case, case_id)
+                    thread_documents = (Document.query.filter(Document.id.in_(list(artifacts_by_id)))
+                                        .order_by(Document.id).options(defer(Document.extracted_text)).all())
+                    analysis = analyze_case(thread_case, thread_documents,
+                                            [artifacts_by_id[document.id] for document in thread_documents],
+                                            progress=report)
+                    if cancelled.is_set():
+                        logging.info(f"Streamed analysis for case {case_id} cancelled; result discarded")
+                        return
+                    
+                    merit_score = get_merit_score(analysis)
+                    thread_case.merit_score = merit_score
+                    db.session.commit()
+                    events.put({'event': 'result', 'analysis': analysis, 'merit_score': merit_score})
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Error in streamed analysis for case {case_id}: {str(e)}")
+                    events.put({'event': 'error', 'error': 'Analysis failed'})
+        
+        threading.Thread(target=run_analysis, daemon=True).start()
+        
+        def generate_events():
+            try:
+                while True:
+                    try:
+                        event = events.get(timeout=15)
+                    except queue.Empty:
+                        # A comment line; writing it is how a disconnected client is noticed between chunks
+                        yield ": keep-alive\n\n"
+                        continue
+                    yield f"data: {json.dumps(event, default=str)}\n\n"
+                    if event['event'] in ('result', 'error'):
+                        break
+            finally:
+                # Also runs on GeneratorExit when the client disconnects
+                cancelled.set()
+        
+        return Response(generate_events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
         
     
     @app.route('/generate/<int:case_id>', methods=['GET', 'POST'])
@@ -788,7 +891,9 @@ def init_routes(app):
                 # Use all documents
                 documents = Document.query.filter_by(case_id=case.id).all()
                 
-            analysis = analyze_case(case, documents)
+            analysis = analyze_case(case, documents, document_artifacts(documents))
+            # Keep the keyword artifacts rebuilt for this analysis
+            db.session.commit()
             recommended_forms = get_recommended_forms(case.case_type, analysis)
             
             # If a specific form ID was selected in analyze page,
@@ -1273,39 +1378,25 @@ def init_routes(app):
         file = request.files['file']
         
         if file and allowed_file(file.filename):
-            # Create unique filename
+            # Get file information
             original_filename = secure_filename(file.filename)
             file_extension = original_filename.rsplit('.', 1)[1].lower()
-            unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
-            
-            # Create user directory if it doesn't exist
-            user_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(current_user.id))
-            os.makedirs(user_dir, exist_ok=True)
             
-            # Save file
-            file_path = os.path.join(user_dir, unique_filename)
-            file.save(file_path)
+            # Save file to the user's evidence store (once per distinct content)
+            file_path, _, _, duplicate = store_upload(file, app.config['UPLOAD_FOLDER'], current_user.id, file_extension)
             
-            # Process document with OCR
-            extracted_text, metadata = process_document(file_path, file_extension)
-            
-            # Save document info to database
-            new_document = Document(
-                user_id=current_user.id,
-                case_id=case.id,
-                filename=original_filename,
-                file_path=file_path,
-                file_type=file_extension,
-                extracted_text=extracted_text,
-                doc_metadata=metadata
-            )
-            db.session.add(new_document)
+            # Save document info to database and queue it for OCR
+            new_document = add_uploaded_document(case.id, original_filename, file_path, file_extension, duplicate)
             db.session.commit()
+            notify_workers()
             
             return jsonify({
                 'success': True,
                 'document_id': new_document.id,
-                'filename': original_filename
+                'filename': original_filename,
+                'duplicate': duplicate,
+                'processing_status': 'done' if new_document.is_processed else 'queued',
+                'status_url': url_for('api_document_status', document_id=new_document.id)
             })
         else:
             return jsonify({'error': 'Invalid file type'}), 400
@@ -1329,7 +1420,7 @@ def init_routes(app):
             # Get chunk information
             chunk_num = request.form.get('chunk')
             total_chunks = request.form.get('chunks')
-            file_id = request.form.get('file_id')
+            file_id = secure_filename(request.form.get('file_id', ''))
             
             if not chunk_num or not total_chunks or not file_id:
                 return jsonify({'error': 'Missing chunk information'}), 400
@@ -1340,22 +1431,53 @@ def init_routes(app):
                 
             file_chunk = request.files['file']
             
-            # Create chunks directory
+            try:
+                chunk_index = int(chunk_num)
+                total = int(total_chunks)
+            except ValueError:
+                return jsonify({'error': 'Invalid chunk information'}), 400
+            if not 0 <= chunk_index < total:
+                return jsonify({'error': 'Chunk number out of range'}), 400
+                
+            # Chunks may arrive in any order and in parallel; each is verified
+            # against the client's checksum before it counts as received
             chunks_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(current_user.id), 'chunks', file_id)
-            os.makedirs(chunks_dir, exist_ok=True)
-            
-            # Save chunk
-            chunk_path = os.path.join(chunks_dir, f"chunk_{chunk_num}")
-            file_chunk.save(chunk_path)
+            try:
+                chunk = save_chunk(chunks_dir, chunk_index, file_chunk.stream, request.form.get('checksum'))
+            except ChunkError as e:
+                return jsonify({'error': str(e), 'chunk': chunk_index}), 400
             
             return jsonify({
                 'success': True,
-                'chunk': int(chunk_num),
-                'total': int(total_chunks)
+                'chunk': chunk_index,
+                'total': total,
+                'sha256': chunk['sha256'],
+                'received': len(received_chunks(chunks_dir))
             })
         except Exception as e:
             app.logger.error(f"Error uploading chunk: {str(e)}")
             return jsonify({'error': f'Error uploading chunk: {str(e)}'}), 500
+    
+    @app.route('/api/chunk_upload/<file_id>', methods=['GET'])
+    @login_required
+    def api_chunk_upload_status(file_id):
+        """API endpoint listing the chunks received so far, so an interrupted upload can resume."""
+        file_id = secure_filename(file_id)
+        if not file_id:
+            return jsonify({'error': 'Invalid file ID'}), 400
+            
+        chunks_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(current_user.id), 'chunks', file_id)
+        chunks = received_chunks(chunks_dir)
+        total_chunks = request.args.get('chunks', type=int)
+        
+        response = {
+            'file_id': file_id,
+            'received': sorted(chunks),
+            'chunks': {str(index): chunk for index, chunk in sorted(chunks.items())}
+        }
+        if total_chunks:
+            response['missing'] = [index for index in range(total_chunks) if index not in chunks]
+        return jsonify(response)
             
     @app.route('/api/complete_chunked_upload', methods=['POST'])
     @login_required
@@ -1374,7 +1496,7 @@ def init_routes(app):
                 return jsonify({'error': 'Unauthorized'}), 403
                 
             # Get file information
-            file_id = request.form.get('file_id')
+            file_id = secure_filename(request.form.get('file_id', ''))
             file_name = request.form.get('file_name')
             file_type = request.form.get('file_type')
             total_chunks = int(request.form.get('chunks', '0'))
@@ -1402,41 +1524,20 @@ def init_routes(app):
             # Chunks directory
             chunks_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(current_user.id), 'chunks', file_id)
             
-            # Combine chunks
-            with open(complete_file_path, 'wb') as outfile:
-                for i in range(total_chunks):
-                    chunk_path = os.path.join(chunks_dir, f"chunk_{i}")
-                    if os.path.exists(chunk_path):
-                        with open(chunk_path, 'rb') as infile:
-                            outfile.write(infile.read())
-                    else:
-                        return jsonify({'error': f'Chunk {i} is missing'}), 400
-            
-            # Process document with OCR (only for smaller files, for large files defer processing)
-            file_size = os.path.getsize(complete_file_path)
-            extracted_text = ""
-            metadata = {}
-            
-            # For files under 50MB, process immediately
-            if file_size < 50 * 1024 * 1024:  # 50MB
-                try:
-                    extracted_text, metadata = process_document(complete_file_path, file_extension)
-                except Exception as e:
-                    app.logger.error(f"Error processing document: {str(e)}")
-                    # Continue even if processing fails
-            
-            # Save document info to database
-            new_document = Document(
-                user_id=current_user.id,
-                case_id=case.id,
-                filename=original_filename,
-                file_path=complete_file_path,
-                file_type=file_extension,
-                extracted_text=extracted_text,
-                doc_metadata=metadata
-            )
-            db.session.add(new_document)
+            # Combine chunks without reading them into memory
+            try:
+                file_size, file_sha256 = assemble_chunks(chunks_dir, total_chunks, complete_file_path,
+                                                         request.form.get('checksum'))
+            except ChunkError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            # Save document info to database and queue it for OCR; files of
+            # 50MB or more are queued behind interactive uploads
+            file_path, duplicate = adopt_file(complete_file_path, app.config['UPLOAD_FOLDER'],
+                                              current_user.id, file_extension, file_sha256)
+            new_document = add_uploaded_document(case.id, original_filename, file_path, file_extension, duplicate)
             db.session.commit()
+            notify_workers()
             
             # Clean up chunks
             try:
@@ -1450,12 +1551,29 @@ def init_routes(app):
                 'success': True,
                 'document_id': new_document.id,
                 'filename': original_filename,
-                'deferred_processing': file_size >= 50 * 1024 * 1024
+                'size': file_size,
+                'sha256': file_sha256,
+                'duplicate': duplicate,
+                'deferred_processing': file_size >= LARGE_FILE_BYTES and not new_document.is_processed,
+                'processing_status': 'done' if new_document.is_processed else 'queued',
+                'status_url': url_for('api_document_status', document_id=new_document.id)
             })
         except Exception as e:
             app.logger.error(f"Error completing upload: {str(e)}")
             return jsonify({'error': f'Error completing upload: {str(e)}'}), 500
     
+    @app.route('/api/documents/<int:document_id>/status')
+    @login_required
+    def api_document_status(document_id):
+        """API endpoint reporting whether an uploaded document has been processed."""
+        document = Document.query.get_or_404(document_id)
+        
+        # Check if user owns the document's case
+        if document.case.user_id != current_user.id:
+            return jsonify({'error': 'Unauthorized'}), 403
+            
+        return jsonify(document_status(document))
+    
     # Mailing service routes
     @app.route('/mail/<int:form_id>', methods=['GET', 'POST'])
     @login_required
@@ -1780,11 +1898,10 @@ def init_routes(app):
                 try:
                     if source_filter == 'all':
                         search_results = find_documents_by_keyword(search_query, data_dir, max_results=20)
-                    else:
+                    elif source_filter in LEGAL_SOURCES:
                         # Search only in the selected source
-                        source_data_dir = os.path.join(data_dir, source_filter)
-                        if os.path.exists(source_data_dir):
-                            search_results = find_documents_by_keyword(search_query, source_data_dir, max_results=20)
+                        search_results = find_documents_by_keyword(search_query, data_dir, max_results=20,
+                                                                   source_id=source_filter)
                 except Exception as e:
                     app.logger.error(f"Error searching documents: {str(e)}")
             
@@ -3,10 +3,14 @@ Admin routes for Justice-Bot
 User management and system administration
 """
 
-from flask import Blueprint, render_template, request, flash, redirect, url_for
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify, current_app
 from flask_login import login_required, current_user
 from functools import wraps
 from models import User, Case, Document, db
+from utils.extraction_cache import get_extraction_cache
+from utils.llm_cache import get_llm_cache
+from utils.llm_executor import executor_stats
+from utils.category_scoring import category_scoring_job_status, start_category_scoring_job
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -42,7 +46,9 @@ def dashboard():
         'total_cases': total_cases,
         'analyzed_cases': analyzed_cases,
         'generated_docs': generated_docs,
-        'analysis_rate': round((analyzed_cases / total_cases * 100) if total_cases > 0 else 0, 1)
+        'analysis_rate': round((analyzed_cases / total_cases * 100) if total_cases > 0 else 0, 1),
+        'extraction_cache': get_extraction_cache().stats(),
+        'llm_cache': get_llm_cache().stats()
     }
     
     return render_template('admin/dashboard.html', 
@@ -50,6 +56,39 @@ def dashboard():
                          recent_users=recent_users,
                          recent_cases=recent_cases)
 
+@admin_bp.route('/extraction-cache')
+@login_required
+@admin_required
+def extraction_cache_stats():
+    """Document extraction cache hit rate and size"""
+    return jsonify(get_extraction_cache().stats())
+
+@admin_bp.route('/llm-cache')
+@login_required
+@admin_required
+def llm_cache_stats():
+    """AI response cache hit rates per call site and size"""
+    return jsonify(get_llm_cache().stats())
+
+@admin_bp.route('/llm-providers')
+@login_required
+@admin_required
+def llm_provider_stats():
+    """AI provider circuit breaker states and latency histograms"""
+    return jsonify(executor_stats())
+
+@admin_bp.route('/category-scores', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def category_scoring_job():
+    """Start (POST) or check (GET) the batch re-scoring of every case's legal categories"""
+    if request.method == 'POST':
+        apply = request.values.get('apply', '').lower() in ('1', 'true', 'yes', 'on')
+        if not start_category_scoring_job(current_app._get_current_object(), apply=apply):
+            return jsonify(category_scoring_job_status()), 409
+        return jsonify(category_scoring_job_status()), 202
+    return jsonify(category_scoring_job_status())
+
 @admin_bp.route('/users')
 @login_required
 @admin_required
@@ -4,7 +4,6 @@ Document upload, AI analysis, and case tracking
 """
 
 import os
-import uuid
 import json
 from datetime import datetime
 from werkzeug.utils import secure_filename
@@ -13,6 +12,8 @@ from flask_login import login_required, current_user
 from models import Case, Document, db
 from services.ai_service import analyze_legal_case, calculate_merit_score
 from services.doc_service import extract_text_from_file
+from utils.evidence_store import store_upload, find_processed_duplicate, release_blobs
+from utils.case_reanalysis import review_case, apply_case_review, case_documents
 
 cases_bp = Blueprint('cases', __name__)
 
@@ -23,6 +24,25 @@ def allowed_file(filename):
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def store_evidence(uploaded_file, extension):
+    """
+    Save an uploaded evidence file to the user's evidence store and extract its text
+    
+    Identical content the user uploaded before is not stored again, and its
+    already extracted text is reused.
+    
+    Returns:
+        tuple: (file_path, file_size, extracted_text)
+    """
+    file_path, _, file_size, duplicate = store_upload(
+        uploaded_file, current_app.config['UPLOAD_FOLDER'], current_user.id, extension
+    )
+    processed = find_processed_duplicate(file_path) if duplicate else None
+    if processed is not None:
+        return file_path, file_size, processed.extracted_text
+    content_type = uploaded_file.content_type or 'application/octet-stream'
+    return file_path, file_size, extract_text_from_file(file_path, content_type)
+
 def get_available_forms(case):
     """Determine available forms based on case type and analysis"""
     forms = []
@@ -94,25 +114,22 @@ def new_case():
             # Handle file upload if provided
             uploaded_file = request.files.get('evidence_file')
             if uploaded_file and uploaded_file.filename and allowed_file(uploaded_file.filename):
-                # Save uploaded file
+                # Save uploaded file and extract text content
                 filename = secure_filename(uploaded_file.filename)
-                unique_filename = f"{uuid.uuid4()}_{filename}"
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
-                uploaded_file.save(file_path)
-                
-                # Extract text content
-                extracted_text = extract_text_from_file(file_path, uploaded_file.content_type)
+                file_path, file_size, extracted_text = store_evidence(uploaded_file, filename.rsplit('.', 1)[1].lower())
                 
                 # Create document record
                 document = Document(
                     case_id=case.id,
-                    filename=unique_filename,
+                    filename=os.path.basename(file_path),
                     original_filename=filename,
                     file_path=file_path,
-                    file_size=os.path.getsize(file_path),
+                    file_size=file_size,
                     content_type=uploaded_file.content_type,
                     document_type='evidence',
-                    extracted_text=extracted_text
+                    extracted_text=extracted_text,
+                    is_processed=extracted_text is not None,
+                    processed_at=datetime.utcnow() if extracted_text is not None else None
                 )
                 
                 db.session.add(document)
@@ -259,24 +276,11 @@ def reanalyze_case(case_id):
     case = Case.query.filter_by(id=case_id, user_id=current_user.id).first_or_404()
     
     try:
-        # Gather all text content
-        full_text = case.description
-        for doc in case.documents:
-            if doc.extracted_text:
-                full_text += f"\n\n{doc.extracted_text}"
-        
-        # Run AI analysis
-        ai_analysis = analyze_legal_case(full_text, case.legal_issue_type)
-        merit_score = calculate_merit_score(full_text, case.legal_issue_type, ai_analysis)
+        # Document text is only read if something changed since the last analysis
+        review = review_case(case, case_documents(case))
         
         # Update case
-        case.classification = ai_analysis.get('classification', case.legal_issue_type)
-        case.merit_score = merit_score
-        case.ai_summary = ai_analysis.get('summary', '')
-        case.recommended_actions = ai_analysis.get('recommendations', '')
-        case.status = 'analyzed'
-        case.analyzed_at = datetime.utcnow()
-        
+        apply_case_review(case, review)
         db.session.commit()
         
         flash("Case analysis updated successfully!", 'success')
@@ -294,18 +298,16 @@ def delete_case(case_id):
     case = Case.query.filter_by(id=case_id, user_id=current_user.id).first_or_404()
     
     try:
-        # Delete associated files
+        # Delete the case's documents, then the case
+        file_paths = [doc.file_path for doc in case.documents]
         for doc in case.documents:
-            try:
-                if os.path.exists(doc.file_path):
-                    os.remove(doc.file_path)
-            except Exception as e:
-                current_app.logger.error(f"Failed to delete file {doc.file_path}: {e}")
-        
-        # Delete case (documents will be deleted via cascade)
+            db.session.delete(doc)
         db.session.delete(case)
         db.session.commit()
         
+        # Evidence files are shared by identical uploads; remove those no other document uses
+        release_blobs(file_paths)
+        
         flash("Case deleted successfully", 'success')
         
     except Exception as e:
@@ -330,33 +332,25 @@ def add_evidence(case_id):
                 flash('Please select at least one file to upload', 'warning')
                 return redirect(url_for('cases.view_case', case_id=case_id))
             
-            upload_folder = os.path.join(current_app.root_path, 'uploads', str(current_user.id))
-            os.makedirs(upload_folder, exist_ok=True)
-            
             added_count = 0
             for file in uploaded_files:
                 if file and file.filename and allowed_file(file.filename):
-                    # Generate unique filename
                     file_ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else 'bin'
-                    unique_filename = f"{uuid.uuid4()}.{file_ext}"
-                    file_path = os.path.join(upload_folder, unique_filename)
-                    
-                    # Save file
-                    file.save(file_path)
                     
-                    # Extract text
-                    try:
-                        extracted_text = extract_text_from_file(file_path, file.content_type if file.content_type else 'application/octet-stream')
-                    except:
-                        extracted_text = ""
+                    # Save file and extract text
+                    file_path, _, extracted_text = store_evidence(file, file_ext)
                     
                     # Create document record
                     doc = Document()
                     doc.case_id = case.id
-                    doc.filename = secure_filename(file.filename)
+                    doc.filename = os.path.basename(file_path)
+                    doc.original_filename = secure_filename(file.filename)
                     doc.file_path = file_path
-                    doc.file_type = file_ext
-                    doc.extracted_text = extracted_text
+                    doc.content_type = file.content_type
+                    doc.document_type = 'evidence'
+                    doc.extracted_text = extracted_text or ""
+                    doc.is_processed = extracted_text is not None
+                    doc.processed_at = datetime.utcnow() if extracted_text is not None else None
                     doc.evidence_type = evidence_type
                     doc.uploaded_at = datetime.utcnow()
                     
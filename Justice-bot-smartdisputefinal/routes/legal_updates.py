@@ -4,12 +4,11 @@ Displays current status of legal data scrapers and recent updates from Canadian
 """
 
 import os
-import json
 import datetime
-from pathlib import Path
 from flask import Blueprint, render_template, jsonify, current_app, request
 from flask_login import login_required, current_user
 from utils.legal_data_scraper import LEGAL_SOURCES, find_documents_by_keyword, analyze_source_updates
+from utils.legal_catalog import get_catalog
 
 legal_updates_bp = Blueprint('legal_updates', __name__)
 
@@ -88,13 +87,14 @@ def search_legal_documents():
     """
     keyword = request.args.get('keyword', '').strip()
     max_results = min(int(request.args.get('max_results', 20)), 50)  # Cap at 50
+    source_id = request.args.get('source') or None
     
     if not keyword:
         return jsonify({'error': 'Keyword is required'}), 400
     
     try:
         data_dir = os.path.join(current_app.root_path, 'data/legal_source_data')
-        results = find_documents_by_keyword(keyword, data_dir, max_results)
+        results = find_documents_by_keyword(keyword, data_dir, max_results, source_id=source_id)
         
         return jsonify({
             'keyword': keyword,
@@ -151,25 +151,19 @@ def legal_source_details(source_id):
     
     source_info = LEGAL_SOURCES[source_id]
     
-    # Get documents from this source
-    data_dir = os.path.join(current_app.root_path, 'data/legal_source_data', source_id)
+    # Get documents from this source, optionally within a document date range
+    data_dir = os.path.join(current_app.root_path, 'data/legal_source_data')
     documents = []
     
     if os.path.exists(data_dir):
         try:
-            # Find all metadata files in the source directory
-            for metadata_file in Path(data_dir).glob('*.json'):
-                try:
-                    with open(metadata_file, 'r', encoding='utf-8') as f:
-                        doc_metadata = json.load(f)
-                        documents.append(doc_metadata)
-                except Exception as e:
-                    current_app.logger.warning(f"Error reading {metadata_file}: {e}")
-            
-            # Sort by date (newest first)
-            documents.sort(key=lambda x: x.get('date', ''), reverse=True)
-            documents = documents[:50]  # Limit to 50 most recent
-            
+            documents = get_catalog(data_dir).find_documents(
+                source_id=source_id,
+                date_from=request.args.get('from') or None,
+                date_to=request.args.get('to') or None,
+                document_type=request.args.get('type') or None,
+                limit=50  # Limit to 50 most recent
+            )
         except Exception as e:
             current_app.logger.error(f"Error loading documents for {source_id}: {e}")
     
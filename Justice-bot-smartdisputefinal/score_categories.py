@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Re-score legal categories for many cases at once
+
+Runs utils/category_scoring.run_category_scoring() against the application
+database: every case's documents are read through their stored keyword
+artifacts and all cases are scored in one NumPy batch. With --apply, each
+case's top category is stored in Case.classification.
+
+--synthetic N scores N generated cases without a database instead, timing the
+batch against analyze_case's per-case scoring loop and checking the scores
+are identical.
+
+Usage:
+    python score_categories.py [--case-id ID ...] [--apply] [--verify] [--output scores.json]
+    python score_categories.py --synthetic 5000 [--documents 5]
+"""
+
+import json
+import time
+import random
+import logging
+import argparse
+
+from utils.legal_analyzer import LEGAL_CATEGORIES, document_keyword_artifact
+from utils.category_scoring import CategoryScoreBatch, reference_scores, run_category_scoring, DEFAULT_PAGE_SIZE
+
+
+def synthetic_cases(cases, documents, seed):
+    """Keyword artifacts for generated cases, each leaning towards one category"""
+    rng = random.Random(seed)
+    vocabulary = [keyword for data in LEGAL_CATEGORIES.values() for keyword in data['keywords']]
+    filler = "the parties met on the date above and discussed the matter at length".split()
+    # A few hundred distinct documents, shared between cases as uploaded evidence often is
+    pool = []
+    for _ in range(300):
+        focus = LEGAL_CATEGORIES[rng.choice(list(LEGAL_CATEGORIES))]['keywords']
+        words = [rng.choice(focus) if rng.random() < 0.05 else
+                 rng.choice(vocabulary) if rng.random() < 0.01 else rng.choice(filler)
+                 for _ in range(rng.randint(200, 2000))]
+        pool.append(document_keyword_artifact(" ".join(words)))
+    return [[rng.choice(pool) for _ in range(rng.randint(1, documents))] for _ in range(cases)]
+
+
+def run_synthetic(args):
+    cases = synthetic_cases(args.synthetic, args.documents, args.seed)
+
+    started = time.perf_counter()
+    expected = [reference_scores(artifacts) for artifacts in cases]
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = CategoryScoreBatch()
+    for index, artifacts in enumerate(cases):
+        batch.add_case(index, artifacts)
+    collected = time.perf_counter()
+    results = batch.results()
+    finished = time.perf_counter()
+
+    mismatches = sum(1 for (_, scores), reference in zip(results, expected) if scores != reference)
+    print(f"{'cases':>7} {'per-case loop s':>16} {'collect s':>10} {'numpy score s':>14} {'mismatches':>11}")
+    print(f"{len(cases):>7} {loop_seconds:>16.3f} {collected - started:>10.3f} "
+          f"{finished - collected:>14.3f} {mismatches:>11}")
+    return 1 if mismatches else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-score legal categories for many cases at once")
+    parser.add_argument('--case-id', type=int, action='append', dest='case_ids', help="Case to score (repeatable); default all")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help="Cases loaded per query")
+    parser.add_argument('--apply', action='store_true', help="Store each case's top category in Case.classification")
+    parser.add_argument('--verify', action='store_true', help="Check every score against the per-case scoring loop")
+    parser.add_argument('--output', help="Write every case's category scores to this JSON file")
+    parser.add_argument('--synthetic', type=int, help="Score this many generated cases instead of the database")
+    parser.add_argument('--documents', type=int, default=5, help="Most documents per generated case")
+    parser.add_argument('--seed', type=int, default=1, help="Seed for generated cases")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+
+    if args.synthetic:
+        return run_synthetic(args)
+
+    from app import app
+    with app.app_context():
+        summary = run_category_scoring(
+            case_ids=args.case_ids, page_size=args.page_size, apply=args.apply, verify=args.verify,
+            progress=lambda done, total: print(f"\rRead {done}/{total} cases", end='', flush=True))
+    print()
+
+    scores = summary.pop('scores')
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump({str(case_id): case_scores for case_id, case_scores in scores.items()}, output, indent=2)
+    print(json.dumps(summary, indent=2))
+    return 1 if summary.get('mismatches') else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -8,9 +8,11 @@ import json
 import re
 from typing import Dict, Any, Optional
 from openai import OpenAI
+from utils.llm_cache import CachingLLMClient, OpenAIChatProvider
 
 # Initialize OpenAI client
 client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+llm = CachingLLMClient(OpenAIChatProvider(client))
 
 # Canadian legal issue classifications
 LEGAL_CATEGORIES = {
@@ -48,7 +50,8 @@ def analyze_legal_case(case_text: str, issue_type: str) -> Dict[str, Any]:
         Focus on Canadian law and provide practical, actionable advice.
         """
         
-        response = client.chat.completions.create(
+        content = llm.complete(
+            'legal_case_review',
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are an expert Canadian legal analyst. Provide accurate, helpful analysis based on Canadian law."},
@@ -59,7 +62,7 @@ def analyze_legal_case(case_text: str, issue_type: str) -> Dict[str, Any]:
         )
         
         # Parse the response
-        content = response.choices[0].message.content.strip()
+        content = content.strip()
         
         # Try to extract JSON from the response
         try:
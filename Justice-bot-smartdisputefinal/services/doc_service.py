@@ -5,85 +5,19 @@ File processing and text extraction
 
 import os
 import docx
-import PyPDF2
 from typing import Optional
 
+from utils.text_extraction import extract_text
+
 def extract_text_from_file(file_path: str, content_type: str) -> Optional[str]:
     """
     Extract text content from uploaded files
-    Supports: .txt, .docx, .pdf
+    Supports every format in the extraction registry (utils/text_extraction.py):
+    .txt, .docx, .doc, .pdf and images
     """
-    try:
-        if not os.path.exists(file_path):
-            return None
-        
-        # Text files
-        if content_type == 'text/plain' or file_path.endswith('.txt'):
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                return f.read()
-        
-        # Word documents
-        elif content_type in ['application/vnd.openxmlformats-officedocument.wordprocessingml.document', 
-                              'application/msword'] or file_path.endswith(('.docx', '.doc')):
-            return extract_text_from_docx(file_path)
-        
-        # PDF files
-        elif content_type == 'application/pdf' or file_path.endswith('.pdf'):
-            return extract_text_from_pdf(file_path)
-        
-        else:
-            return None
-            
-    except Exception as e:
-        print(f"Error extracting text from {file_path}: {e}")
-        return None
-
-def extract_text_from_docx(file_path: str) -> Optional[str]:
-    """Extract text from DOCX files"""
-    try:
-        doc = docx.Document(file_path)
-        text_content = []
-        
-        # Extract paragraph text
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():
-                text_content.append(paragraph.text.strip())
-        
-        # Extract table text
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = []
-                for cell in row.cells:
-                    if cell.text.strip():
-                        row_text.append(cell.text.strip())
-                if row_text:
-                    text_content.append(' | '.join(row_text))
-        
-        return '\n'.join(text_content)
-        
-    except Exception as e:
-        print(f"Error extracting text from DOCX {file_path}: {e}")
-        return None
-
-def extract_text_from_pdf(file_path: str) -> Optional[str]:
-    """Extract text from PDF files"""
-    try:
-        text_content = []
-        
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                if page_text.strip():
-                    text_content.append(page_text.strip())
-        
-        return '\n'.join(text_content)
-        
-    except Exception as e:
-        print(f"Error extracting text from PDF {file_path}: {e}")
+    if not os.path.exists(file_path):
         return None
+    return extract_text(file_path, content_type)
 
 def generate_legal_document(template_path: str, user_data: dict, case_data: dict, output_path: str) -> bool:
     """
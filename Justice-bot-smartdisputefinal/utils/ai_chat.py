@@ -4,8 +4,8 @@ import re
 import json
 import random
 from datetime import datetime
-import requests
 
+from utils.llm_cache import CachingLLMClient, OpenAIHTTPProvider
 from utils.legal_research_assistant import get_case_law_for_query, generate_inline_references, format_message_with_inline_references
 
 # Configure logging
@@ -165,39 +165,20 @@ def generate_openai_response(message, context, api_key):
             if 'documents' in context and context['documents']:
                 system_message += f"\nThe user has uploaded {len(context['documents'])} documents to this case. "
         
-        # Prepare API request
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}"
-        }
-        
-        data = {
-            "model": "gpt-3.5-turbo",
-            "messages": [
+        # Make API request; repeated questions in the same context are answered from the cache
+        ai_response = CachingLLMClient(OpenAIHTTPProvider(api_key)).complete(
+            'chat',
+            model="gpt-3.5-turbo",
+            messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": message}
             ],
-            "temperature": 0.7,
-            "max_tokens": 600
-        }
-        
-        # Make API request
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=data
+            temperature=0.7,
+            max_tokens=600
         )
         
-        # Check for errors
-        if response.status_code != 200:
-            logger.error(f"OpenAI API error: {response.status_code} - {response.text}")
-            return generate_rule_based_response(message, context)
-        
         # Extract and return response text
-        response_data = response.json()
-        ai_response = response_data['choices'][0]['message']['content'].strip()
-        
-        return ai_response
+        return ai_response.strip()
     
     except Exception as e:
         logger.error(f"Error generating OpenAI response: {str(e)}")
@@ -0,0 +1,128 @@
+"""
+Incremental Case Analysis for SmartDispute.ai
+
+Case analysis is built from per-document artifacts (keyword counts, context
+windows and the text needed at document joins; see
+utils/legal_analyzer.document_keyword_artifact) stored in the
+document_analyses table. An artifact is reused for as long as its document's
+processed_at and text length are unchanged, which is checked in the database
+without loading the text, so re-analyzing a case reads and scans only the
+documents that are new or were reprocessed.
+
+The case-level AI review that reanalyze_case runs is stored in case_analyses
+with a fingerprint of the case description and every document's text hash; it
+is reused until one of them changes.
+"""
+
+import json
+import hashlib
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from models import CaseAnalysis, Document, DocumentAnalysis, db
+from utils.legal_analyzer import KEYWORD_ARTIFACT_VERSION, document_keyword_artifact
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _source_keys(document_ids):
+    """Map document id -> the key its stored artifact must have to still be valid"""
+    rows = (db.session.query(Document.id, Document.processed_at, func.length(Document.extracted_text))
+            .filter(Document.id.in_(document_ids)))
+    return {
+        document_id: f"{KEYWORD_ARTIFACT_VERSION}:{processed_at.isoformat() if processed_at else ''}:{length or 0}"
+        for document_id, processed_at, length in rows
+    }
+
+
+def document_artifacts(documents):
+    """
+    Return each document's keyword artifact, computing only missing or stale ones
+
+    Load the documents with extracted_text deferred to get the full benefit:
+    only documents whose artifacts are rebuilt have their text read. Rebuilt
+    artifacts are flushed in a savepoint and committed by the caller.
+
+    Args:
+        documents (list): Document instances, in the order the case analyzes them
+
+    Returns:
+        list: One artifact per document, in the same order
+    """
+    if not documents:
+        return []
+    document_ids = [doc.id for doc in documents]
+    keys = _source_keys(document_ids)
+    stored = {row.document_id: row for row in
+              DocumentAnalysis.query.filter(DocumentAnalysis.document_id.in_(document_ids))}
+
+    artifacts = []
+    rebuilt = []
+    for doc in documents:
+        key = keys.get(doc.id)
+        row = stored.get(doc.id)
+        if row is not None and row.source_key == key:
+            artifacts.append(json.loads(row.artifact))
+            continue
+
+        artifact = document_keyword_artifact(doc.extracted_text)
+        artifacts.append(artifact)
+        rebuilt.append((doc.id, row, key, artifact))
+
+    if rebuilt:
+        # A savepoint, so a conflict discards only these rows and never the caller's pending changes
+        try:
+            with db.session.begin_nested():
+                for document_id, row, key, artifact in rebuilt:
+                    if row is None:
+                        row = DocumentAnalysis(document_id=document_id)
+                        db.session.add(row)
+                    row.source_key = key
+                    row.text_sha256 = artifact['text_sha256']
+                    row.artifact = json.dumps(artifact)
+        except IntegrityError:
+            # Another request stored the same document's artifact first; ours are equivalent
+            pass
+    logger.info(f"Case analysis artifacts: {len(documents) - len(rebuilt)} reused, {len(rebuilt)} rebuilt")
+    return artifacts
+
+
+def case_fingerprint(case, artifacts):
+    """Hash of everything the case-level AI review depends on"""
+    payload = json.dumps([case.legal_issue_type, case.description,
+                          [artifact['text_sha256'] for artifact in artifacts]])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def stored_case_review(case, fingerprint):
+    """
+    Return the stored AI review for the case if it was computed from the same inputs
+
+    Returns:
+        tuple: (ai_analysis, merit_score), or None if there is no current review
+    """
+    row = CaseAnalysis.query.filter_by(case_id=case.id).first()
+    if row is None or row.fingerprint != fingerprint:
+        return None
+    return json.loads(row.result), row.merit_score
+
+
+def store_case_review(case, fingerprint, ai_analysis, merit_score):
+    """
+    Store the case's AI review for reuse; added to the session, committed by the caller
+
+    Fallback results (which carry an 'error') are not stored, so the next
+    re-analysis tries the AI service again.
+    """
+    if not ai_analysis or ai_analysis.get('error'):
+        return
+    row = CaseAnalysis.query.filter_by(case_id=case.id).first()
+    if row is None:
+        row = CaseAnalysis(case_id=case.id)
+        db.session.add(row)
+    row.fingerprint = fingerprint
+    row.result = json.dumps(ai_analysis)
+    row.merit_score = merit_score
@@ -0,0 +1,381 @@
+"""
+Case Re-analysis for SmartDispute.ai
+
+review_case() and apply_case_review() are the re-analysis that
+/cases/<id>/reanalyze runs for one case: the case-level AI review is reused
+from case_analyses while the case's description and documents are unchanged
+(see utils/case_artifacts.py) and requested again otherwise, and the case's
+merit score, classification, summary and recommendations are updated from it.
+
+run_reanalysis() runs the same re-analysis over the whole cases table for the
+reanalyze_cases.py command. Case ids are streamed from the database with
+keyset pagination (id > last id, in id order), so the scan never slows down
+or skips rows the way OFFSET paging does while rows change. Batches of ids are
+analyzed in a pool of worker processes, each with its own application and
+database session, and each batch is written with a single commit. After every
+batch the highest case id below which all batches are finished is saved to a
+checkpoint file with the ids of the cases that failed, so an interrupted run
+resumes where it stopped and retries those cases first. Dry-run and
+diff modes compute everything but write nothing except the keyword artifact
+cache, and report how merit scores and classifications would change.
+"""
+
+import os
+import json
+import time
+import logging
+import itertools
+import multiprocessing
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.orm import defer
+
+from models import Case, Document, db
+from services.ai_service import analyze_legal_case, calculate_merit_score
+from utils.case_artifacts import document_artifacts, case_fingerprint, stored_case_review, store_case_review
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+WRITE = 'write'
+DRY_RUN = 'dry-run'
+DIFF = 'diff'
+MODES = (WRITE, DRY_RUN, DIFF)
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_CHECKPOINT = os.path.join('data', 'reanalysis_checkpoint.json')
+
+
+@dataclass
+class CaseReview:
+    """A case's AI review and merit score, and whether they came from case_analyses"""
+    ai_analysis: dict
+    merit_score: int
+    fingerprint: str
+    reused: bool
+
+
+def review_case(case, documents):
+    """
+    Get the case's AI review, reusing the stored one if its inputs are unchanged
+
+    Args:
+        case: Case model instance
+        documents (list): The case's documents in id order; load them with
+            extracted_text deferred so unchanged documents are not read
+
+    Returns:
+        CaseReview: The review; nothing has been written yet
+    """
+    fingerprint = case_fingerprint(case, document_artifacts(documents))
+    stored = stored_case_review(case, fingerprint)
+    if stored is not None:
+        ai_analysis, merit_score = stored
+        return CaseReview(ai_analysis, merit_score, fingerprint, reused=True)
+
+    # Gather all text content
+    full_text = case.description or ""
+    for doc in documents:
+        if doc.extracted_text:
+            full_text += f"\n\n{doc.extracted_text}"
+
+    # Run AI analysis
+    ai_analysis = analyze_legal_case(full_text, case.legal_issue_type)
+    merit_score = calculate_merit_score(full_text, case.legal_issue_type, ai_analysis)
+    return CaseReview(ai_analysis, merit_score, fingerprint, reused=False)
+
+
+def review_classification(case, review):
+    """The classification a review gives the case"""
+    return review.ai_analysis.get('classification', case.legal_issue_type)
+
+
+def apply_case_review(case, review):
+    """Store a new review for reuse and update the case from it; committed by the caller"""
+    if not review.reused:
+        store_case_review(case, review.fingerprint, review.ai_analysis, review.merit_score)
+
+    recommendations = review.ai_analysis.get('recommendations', '')
+    case.classification = review_classification(case, review)
+    case.merit_score = review.merit_score
+    case.ai_summary = review.ai_analysis.get('summary', '')
+    # recommended_actions holds a JSON string; the AI returns a list
+    case.recommended_actions = recommendations if isinstance(recommendations, str) else json.dumps(recommendations)
+    case.status = 'analyzed'
+    case.analyzed_at = datetime.utcnow()
+
+
+def case_documents(case):
+    """The case's documents in analysis order, with their text deferred"""
+    return (Document.query.filter_by(case_id=case.id).order_by(Document.id)
+            .options(defer(Document.extracted_text)).all())
+
+
+def reanalyze_batch(case_ids, mode=WRITE):
+    """
+    Re-analyze a batch of cases; write mode commits the whole batch at once
+
+    Needs an application context. A case whose analysis fails is reported
+    and left unchanged without affecting the rest of the batch.
+
+    Args:
+        case_ids (list): Case ids, ascending
+        mode (str): WRITE, DRY_RUN or DIFF
+
+    Returns:
+        dict: 'changes' (one entry per analyzed case with its merit score and
+            classification before and after) and 'failed' ({case_id: error})
+    """
+    reviews = []
+    changes = []
+    failed = {}
+    for case_id in case_ids:
+        case = db.session.get(Case, case_id)
+        if case is None:
+            # Deleted since its id was read
+            continue
+        try:
+            review = review_case(case, case_documents(case))
+        except Exception as e:
+            db.session.rollback()
+            failed[case_id] = str(e)
+            logger.error(f"Re-analysis of case {case_id} failed: {str(e)}")
+            continue
+        reviews.append((case_id, review))
+        changes.append({
+            'case_id': case_id,
+            'merit_score': [case.merit_score, review.merit_score],
+            'classification': [case.classification, review_classification(case, review)],
+            'reused': review.reused,
+        })
+
+    if mode == WRITE and reviews:
+        try:
+            for case_id, review in reviews:
+                apply_case_review(db.session.get(Case, case_id), review)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Writing re-analysis batch {case_ids[0]}-{case_ids[-1]} failed: {str(e)}")
+            failed.update({case_id: str(e) for case_id, _ in reviews})
+            changes = []
+    else:
+        # Reporting runs write nothing but the keyword artifacts review_case rebuilt
+        db.session.commit()
+    # Nothing is kept between batches
+    db.session.remove()
+    return {'changes': changes, 'failed': failed}
+
+
+# Set in each worker process by _init_worker()
+_worker_app = None
+
+
+def _init_worker():
+    global _worker_app
+    logging.getLogger().setLevel(logging.ERROR)
+    # Each worker process creates its own app, engine and session
+    from app import app
+    _worker_app = app
+
+
+def _run_worker_batch(case_ids, mode):
+    with _worker_app.app_context():
+        return reanalyze_batch(case_ids, mode)
+
+
+def iter_case_ids(after_id=0, page_size=1000, limit=None):
+    """
+    Yield case ids in ascending order with keyset pagination
+
+    Args:
+        after_id (int): Yield only ids greater than this
+        page_size (int): Ids read per query
+        limit (int): Stop after this many ids
+    """
+    yielded = 0
+    while limit is None or yielded < limit:
+        size = page_size if limit is None else min(page_size, limit - yielded)
+        page = [case_id for (case_id,) in
+                db.session.query(Case.id).filter(Case.id > after_id).order_by(Case.id).limit(size)]
+        if not page:
+            return
+        for case_id in page:
+            yield case_id
+        yielded += len(page)
+        after_id = page[-1]
+
+
+def _batches(case_ids, batch_size):
+    batch = []
+    for case_id in case_ids:
+        batch.append(case_id)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def load_checkpoint(path):
+    """The saved checkpoint, or None if there is none"""
+    try:
+        with open(path) as checkpoint:
+            return json.load(checkpoint)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, state):
+    """Write the checkpoint atomically, so an interrupted write never leaves a torn file"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as checkpoint:
+        json.dump(state, checkpoint, indent=2)
+    os.replace(temporary, path)
+
+
+class ChangeSummary:
+    """Running counts of how merit scores and classifications changed"""
+
+    def __init__(self):
+        self.merit = Counter()
+        self.merit_delta_total = 0
+        self.transitions = Counter()
+
+    def add(self, changes):
+        for change in changes:
+            old, new = change['merit_score']
+            if old is None or new is None:
+                self.merit['newly_scored' if old is None else 'unscored'] += 1
+            else:
+                self.merit['increased' if new > old else 'decreased' if new < old else 'unchanged'] += 1
+                self.merit_delta_total += new - old
+            old_class, new_class = change['classification']
+            if old_class != new_class:
+                self.transitions[(old_class, new_class)] += 1
+
+    def as_dict(self):
+        compared = self.merit['increased'] + self.merit['decreased'] + self.merit['unchanged']
+        return {
+            'merit_increased': self.merit['increased'],
+            'merit_decreased': self.merit['decreased'],
+            'merit_unchanged': self.merit['unchanged'],
+            'merit_newly_scored': self.merit['newly_scored'],
+            'mean_merit_change': round(self.merit_delta_total / compared, 2) if compared else 0,
+            'classification_changes': sum(self.transitions.values()),
+            'top_classification_changes': [[old, new, count] for (old, new), count in self.transitions.most_common(10)],
+        }
+
+
+def run_reanalysis(mode=WRITE, workers=None, batch_size=DEFAULT_BATCH_SIZE, checkpoint_path=None,
+                   resume=False, limit=None, on_batch=None):
+    """
+    Re-analyze every case, in batches across worker processes
+
+    Needs an application context in the calling process (it streams the ids).
+
+    Args:
+        mode (str): WRITE updates cases; DRY_RUN and DIFF only report the changes
+        workers (int): Worker processes; 0 analyzes in this process. Defaults to the CPU count
+        batch_size (int): Cases per worker task and per commit
+        checkpoint_path (str): Where progress is saved after every batch; None saves none
+        resume (bool): Retry the checkpoint's failed cases, then start after its last finished case id
+        limit (int): Analyze at most this many cases, not counting retried ones
+        on_batch (callable): Called with (batch result, progress dict) as each batch finishes
+
+    Returns:
+        dict: Progress totals, cases per second and a ChangeSummary of every analyzed case;
+            per-case changes are only passed to on_batch
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown re-analysis mode: {mode}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    state = {'mode': mode, 'last_case_id': 0, 'processed': 0, 'changed': 0, 'failed': 0,
+             'failed_case_ids': [], 'reused': 0, 'started_at': datetime.utcnow().isoformat()}
+    if resume and checkpoint_path:
+        saved = load_checkpoint(checkpoint_path)
+        if saved is not None:
+            if saved.get('mode') != mode:
+                raise ValueError(f"Checkpoint {checkpoint_path} is from a {saved.get('mode')} run, not {mode}")
+            state.update(saved)
+            logger.info(f"Resuming after case {state['last_case_id']}, "
+                        f"retrying {len(state['failed_case_ids'])} failed cases first")
+    # Failed cases stay in the checkpoint until a retry succeeds, so no resume loses them
+    failed_ids = set(state['failed_case_ids'])
+
+    summary = ChangeSummary()
+    started = time.perf_counter()
+    processed_at_start = state['processed']
+
+    def record(batch, result):
+        """Count a finished batch, move the checkpoint past it and report it"""
+        changed = [change for change in result['changes']
+                   if change['merit_score'][0] != change['merit_score'][1]
+                   or change['classification'][0] != change['classification'][1]]
+        summary.add(result['changes'])
+        # A retried case was already counted as processed and failed
+        retried = failed_ids.intersection(batch)
+        failed_ids.difference_update(batch)
+        failed_ids.update(result['failed'])
+        state['failed_case_ids'] = sorted(failed_ids)
+        state['processed'] += len(result['changes']) + len(result['failed']) - len(retried)
+        state['changed'] += len(changed)
+        state['failed'] += len(result['failed']) - len(retried)
+        state['reused'] += sum(1 for change in result['changes'] if change['reused'])
+        elapsed = time.perf_counter() - started
+        state['cases_per_second'] = round((state['processed'] - processed_at_start) / elapsed, 2) if elapsed else 0
+        state['last_case_id'] = max(state['last_case_id'], batch[-1])
+        state['updated_at'] = datetime.utcnow().isoformat()
+        if checkpoint_path:
+            save_checkpoint(checkpoint_path, state)
+        if on_batch is not None:
+            on_batch(result, dict(state))
+
+    batches = itertools.chain(_batches(sorted(failed_ids), batch_size),
+                              _batches(iter_case_ids(after_id=state['last_case_id'], limit=limit), batch_size))
+    if workers == 0:
+        for batch in batches:
+            record(batch, reanalyze_batch(batch, mode))
+    else:
+        # Spawned, not forked: workers must not share the parent's database connections
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            # Submitted batches in id order; the checkpoint only advances past a batch
+            # once it and every batch before it have finished
+            submitted = deque()
+            pending = set()
+            for batch in batches:
+                future = pool.submit(_run_worker_batch, batch, mode)
+                submitted.append((batch, future))
+                pending.add(future)
+                # Keep a bounded number of batches in flight while ids keep streaming
+                while len(submitted) >= 2 * workers:
+                    _, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _drain(submitted, record)
+            wait(pending)
+            _drain(submitted, record)
+
+    state['elapsed_seconds'] = round(time.perf_counter() - started, 2)
+    state.update(summary.as_dict())
+    return state
+
+
+def _drain(submitted, record):
+    """Record finished batches from the front of the queue, advancing the checkpoint"""
+    while submitted and submitted[0][1].done():
+        batch, future = submitted.popleft()
+        try:
+            result = future.result()
+        except Exception as e:
+            # The worker itself failed (not just one case); count the batch as failed
+            logger.error(f"Re-analysis batch {batch[0]}-{batch[-1]} failed: {str(e)}")
+            result = {'changes': [], 'failed': {case_id: str(e) for case_id in batch}}
+        record(batch, result)
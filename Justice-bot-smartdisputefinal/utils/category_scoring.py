@@ -0,0 +1,286 @@
+"""
+Batch Category Scoring for SmartDispute.ai
+
+Re-scores many cases' legal categories at once, for example after the
+keywords in utils/legal_analyzer.LEGAL_CATEGORIES change. analyze_case scores
+one case with Python loops over every category keyword; here the keyword
+counts of all documents in the batch go into one sparse document x keyword
+matrix (coordinate arrays), which is summed into a case x keyword matrix and
+scored with NumPy array operations: term counts, document frequency weights
+and the multi-word boost are computed for every case in a few vector steps.
+
+The scores equal legal_analyzer.score_categories() exactly, not just
+approximately: each keyword's score is computed with the same floating-point
+operations in the same order, a category's keyword scores are added in
+keyword order (a cumulative sum, not NumPy's pairwise sum), and the result is
+rounded with Python's round().
+
+Counts come from the stored per-document keyword artifacts (see
+utils/case_artifacts.py), so documents whose text and keywords are unchanged
+are not read again. run_category_scoring() is the batch job behind the
+/admin/category-scores route and the score_categories.py command.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from utils.legal_analyzer import LEGAL_CATEGORIES, score_categories, spanning_keyword_counts
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cases whose documents are loaded and whose artifacts are refreshed per query
+DEFAULT_PAGE_SIZE = 200
+
+
+class CategoryScoreBatch:
+    """
+    Collects keyword counts for a batch of cases and scores them together
+    """
+
+    def __init__(self):
+        self.categories = list(LEGAL_CATEGORIES)
+        # Columns: each keyword any category scores, once
+        self.keywords = list(dict.fromkeys(
+            keyword for data in LEGAL_CATEGORIES.values() for keyword in data['keywords']))
+        self._column = {keyword: index for index, keyword in enumerate(self.keywords)}
+        # Each category's columns in its own keyword order, repeats included, as score_categories sums them
+        self._category_columns = [np.array([self._column[keyword] for keyword in LEGAL_CATEGORIES[category]['keywords']])
+                                  for category in self.categories]
+        self._boost = np.array([1.5 if len(keyword.split()) > 1 else 1.0 for keyword in self.keywords])
+
+        self.case_ids = []
+        self._total_docs = []
+        # Sparse document x keyword counts as coordinate lists: (case row, keyword column, count)
+        self._rows = []
+        self._columns = []
+        self._counts = []
+        # Whether the entry is a document's own count (adds to document frequency) or a spanning match
+        self._in_document = []
+
+    def __len__(self):
+        return len(self.case_ids)
+
+    def add_case(self, case_id, artifacts):
+        """
+        Add a case's keyword counts
+
+        Args:
+            case_id: Identifier reported with the case's scores
+            artifacts (list): The case's document_keyword_artifact() results, in document order
+        """
+        row = len(self.case_ids)
+        self.case_ids.append(case_id)
+        self._total_docs.append(len(artifacts) or 1)
+        for artifact in artifacts:
+            for keyword, found in artifact['keywords'].items():
+                column = self._column.get(keyword)
+                if column is not None:
+                    self._rows.append(row)
+                    self._columns.append(column)
+                    self._counts.append(found['count'])
+                    self._in_document.append(True)
+        for keyword, count in spanning_keyword_counts(artifacts).items():
+            column = self._column.get(keyword)
+            if column is not None:
+                self._rows.append(row)
+                self._columns.append(column)
+                self._counts.append(count)
+                self._in_document.append(False)
+
+    def score_matrix(self):
+        """
+        Score every case in the batch
+
+        Returns:
+            numpy.ndarray: cases x categories scores, unrounded
+        """
+        cases = len(self.case_ids)
+        width = len(self.keywords)
+        rows = np.asarray(self._rows, dtype=np.int64)
+        columns = np.asarray(self._columns, dtype=np.int64)
+        counts = np.asarray(self._counts, dtype=np.float64)
+        in_document = np.asarray(self._in_document, dtype=bool)
+        cells = rows * width + columns
+
+        # Case x keyword term counts and document frequencies
+        term_counts = np.bincount(cells, weights=counts, minlength=cases * width).reshape(cases, width)
+        keyword_freq = np.bincount(cells[in_document], minlength=cases * width).reshape(cases, width)
+
+        doc_freq = keyword_freq / np.asarray(self._total_docs, dtype=np.float64)[:, None]
+        keyword_scores = term_counts * (1 + doc_freq) * 100 * self._boost
+
+        scores = np.zeros((cases, len(self.categories)))
+        if cases:
+            for index, columns in enumerate(self._category_columns):
+                # Sequential sum in keyword order, matching score_categories bit for bit
+                scores[:, index] = np.cumsum(keyword_scores[:, columns], axis=1)[:, -1]
+        return scores
+
+    def results(self):
+        """
+        Score every case in the batch
+
+        Returns:
+            list: (case_id, {category: score}) pairs in the order the cases were
+                added, with scores rounded as analyze_case rounds them
+        """
+        scores = self.score_matrix().tolist()
+        return [(case_id, {category: round(score, 2) for category, score in zip(self.categories, row)})
+                for case_id, row in zip(self.case_ids, scores)]
+
+
+def reference_scores(artifacts):
+    """Score one case with legal_analyzer's per-case loop, for verifying batch results"""
+    from utils.legal_analyzer import merge_keyword_artifacts
+    term_counts, keyword_freq = merge_keyword_artifacts(artifacts)
+    return score_categories(term_counts, keyword_freq, len(artifacts) or 1)
+
+
+def top_category(scores):
+    """The highest-scoring category, or None if nothing scored"""
+    category, score = max(scores.items(), key=lambda item: item[1])
+    return category if score > 0 else None
+
+
+def run_category_scoring(case_ids=None, page_size=DEFAULT_PAGE_SIZE, apply=False, verify=False, progress=None):
+    """
+    Re-score cases' legal categories from their documents' keyword artifacts
+
+    Needs an application context. Stale or missing artifacts are rebuilt and
+    stored as the cases are read; all cases are then scored in one batch.
+
+    Args:
+        case_ids (list): Cases to score; every case with documents when None
+        page_size (int): Cases whose documents are loaded per query
+        apply (bool): Store each case's top category in Case.classification
+        verify (bool): Also score each case with the per-case loop and count mismatches
+        progress (callable): Called with (cases read, cases to read) after each page
+
+    Returns:
+        dict: Summary with counts, timings, the top-category distribution,
+            mismatches when verifying, and 'scores' ({case_id: {category: score}})
+    """
+    from sqlalchemy.orm import defer
+    from models import Case, Document, db
+    from utils.case_artifacts import document_artifacts
+
+    started = time.perf_counter()
+    if case_ids is None:
+        case_ids = [case_id for (case_id,) in
+                    db.session.query(Document.case_id).filter(Document.case_id.isnot(None))
+                    .distinct().order_by(Document.case_id)]
+    case_ids = list(case_ids)
+
+    batch = CategoryScoreBatch()
+    mismatches = 0
+    for offset in range(0, len(case_ids), page_size):
+        page = case_ids[offset:offset + page_size]
+        documents = (Document.query.filter(Document.case_id.in_(page))
+                     .order_by(Document.case_id, Document.id)
+                     .options(defer(Document.extracted_text)).all())
+        artifacts = document_artifacts(documents)
+        by_case = {case_id: [] for case_id in page}
+        for document, artifact in zip(documents, artifacts):
+            by_case[document.case_id].append(artifact)
+        for case_id in page:
+            batch.add_case(case_id, by_case[case_id])
+        if verify:
+            page_batch = CategoryScoreBatch()
+            for case_id in page:
+                page_batch.add_case(case_id, by_case[case_id])
+            mismatches += sum(1 for case_id, scores in page_batch.results()
+                              if scores != reference_scores(by_case[case_id]))
+        # Store the rebuilt artifacts, then keep memory flat across pages; they are no longer needed
+        db.session.commit()
+        db.session.expunge_all()
+        if progress is not None:
+            progress(min(offset + page_size, len(case_ids)), len(case_ids))
+    loaded = time.perf_counter()
+
+    results = batch.results()
+    scored = time.perf_counter()
+
+    distribution = {}
+    for _, scores in results:
+        category = top_category(scores)
+        distribution[category or 'none'] = distribution.get(category or 'none', 0) + 1
+
+    updated = 0
+    if apply:
+        classifications = {case_id: top_category(scores) for case_id, scores in results}
+        for offset in range(0, len(case_ids), page_size):
+            for case in Case.query.filter(Case.id.in_(case_ids[offset:offset + page_size])):
+                category = classifications.get(case.id)
+                if category and case.classification != category:
+                    case.classification = category
+                    updated += 1
+            db.session.commit()
+
+    summary = {
+        'cases': len(results),
+        'load_seconds': round(loaded - started, 3),
+        'score_seconds': round(scored - loaded, 3),
+        'top_categories': distribution,
+        'classifications_updated': updated,
+        'scores': {case_id: scores for case_id, scores in results},
+    }
+    if verify:
+        summary['mismatches'] = mismatches
+    logger.info(f"Scored {len(results)} cases in {summary['score_seconds']}s "
+                f"({summary['load_seconds']}s reading artifacts), {updated} classifications updated")
+    return summary
+
+
+# The admin-triggered job; one at a time per process
+_job_lock = threading.Lock()
+_job = {'status': 'idle'}
+
+
+def category_scoring_job_status():
+    """State of the admin category scoring job, without per-case scores"""
+    with _job_lock:
+        return dict(_job)
+
+
+def start_category_scoring_job(app, apply=False):
+    """
+    Run run_category_scoring() over every case in a background thread
+
+    Args:
+        app: Flask application, for the thread's application context
+        apply (bool): Store each case's top category in Case.classification
+
+    Returns:
+        bool: False if a job is already running
+    """
+    with _job_lock:
+        if _job.get('status') == 'running':
+            return False
+        _job.clear()
+        _job.update({'status': 'running', 'apply': apply, 'started_at': datetime.utcnow().isoformat(),
+                     'cases_read': 0, 'cases_total': None})
+
+    def report(done, total):
+        with _job_lock:
+            _job.update({'cases_read': done, 'cases_total': total})
+
+    def run():
+        with app.app_context():
+            try:
+                summary = run_category_scoring(apply=apply, progress=report)
+                summary.pop('scores')
+                with _job_lock:
+                    _job.update(summary, status='done', finished_at=datetime.utcnow().isoformat())
+            except Exception as e:
+                logger.error(f"Category scoring job failed: {str(e)}")
+                with _job_lock:
+                    _job.update({'status': 'failed', 'error': str(e),
+                                 'finished_at': datetime.utcnow().isoformat()})
+
+    threading.Thread(target=run, name='category-scoring', daemon=True).start()
+    return True
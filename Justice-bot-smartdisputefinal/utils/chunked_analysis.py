@@ -0,0 +1,302 @@
+"""
+Chunked AI Analysis for SmartDispute.ai
+
+Long evidence bundles are analyzed whole instead of being cut to their first
+few thousand characters. The text is split on section boundaries (document
+markers, headings, then paragraphs) into chunks that fit the model's input
+budget, the chunks are analyzed concurrently, and the per-chunk findings are
+merged back into one result with the same fields a single call returns:
+lists (legal_issues, key_facts, ...) are combined without duplicates, numbers
+(merit_score) are averaged weighted by chunk size, and text fields take the
+value most of the text agrees on.
+
+Chunk prompts contain only the chunk's text, so each chunk's response is cached
+by utils/llm_cache under its own key: adding a document to a case re-analyzes
+only the chunks that changed. Progress is reported as events while the chunks
+complete, for callers that stream it to the browser.
+"""
+
+import os
+import re
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Rough size of a token in English legal text; used for budgeting only
+CHARS_PER_TOKEN = 4
+
+DEFAULT_CHUNK_TOKENS = 2000
+DEFAULT_TOKEN_BUDGET = 60000
+DEFAULT_WORKERS = 4
+
+class AnalysisCancelled(Exception):
+    """Raised by a progress callback to stop an analysis whose result is no longer wanted"""
+
+
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_DOCUMENT_MARKER = re.compile(r'^--- Document: .* ---$')
+# Headings: "Section 4 ...", "PART II", "3.1 Notice of Termination", "STATEMENT OF FACTS"
+_KEYWORD_HEADING = re.compile(r'^(?:section|part|article|schedule|appendix|exhibit|tab)\s+[\w.-]+.{0,80}$', re.IGNORECASE)
+_NUMBERED_HEADING = re.compile(r'^\d+(?:\.\d+)*[.)]?\s+[A-Z][^.]{0,80}$')
+_CAPS_HEADING = re.compile(r'^[A-Z][A-Z0-9 ,.&\'()/:-]{3,80}$')
+
+
+def _setting(name, default):
+    try:
+        return int(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def estimate_tokens(text):
+    """Approximate number of tokens in text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _is_section_start(paragraph):
+    first_line = paragraph.strip().split('\n', 1)[0].strip()
+    return any(pattern.match(first_line) for pattern in
+               (_DOCUMENT_MARKER, _KEYWORD_HEADING, _NUMBERED_HEADING, _CAPS_HEADING))
+
+
+def _sections(text):
+    """Group a text's paragraphs into sections, each starting at a heading or document marker"""
+    sections = []
+    current = []
+    for paragraph in _PARAGRAPH_BREAK.split(text):
+        if not paragraph.strip():
+            continue
+        if current and _is_section_start(paragraph):
+            sections.append(current)
+            current = []
+        current.append(paragraph.strip('\n'))
+    if current:
+        sections.append(current)
+    return sections
+
+
+def _hard_split(paragraph, max_chars):
+    """Split an over-long paragraph at whitespace near max_chars"""
+    pieces = []
+    while len(paragraph) > max_chars:
+        cut = paragraph.rfind(' ', max_chars // 2, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(paragraph[:cut])
+        paragraph = paragraph[cut:].lstrip()
+    if paragraph:
+        pieces.append(paragraph)
+    return pieces
+
+
+def split_sections(texts, max_tokens=None):
+    """
+    Split documents into chunks on section boundaries
+
+    Sections are kept whole when they fit; a section too large for one chunk
+    is split between paragraphs, and a paragraph too large is split between
+    words. Each document starts a new chunk, so a document's chunks stay the
+    same when other documents are added.
+
+    Args:
+        texts (str or list): One text, or one text per document
+        max_tokens (int): Largest chunk, in estimated tokens
+            (ANALYSIS_CHUNK_TOKENS, default 2000)
+
+    Returns:
+        list: Chunk texts, in document order
+    """
+    if isinstance(texts, str):
+        texts = [texts]
+    max_chars = (max_tokens or _setting('ANALYSIS_CHUNK_TOKENS', DEFAULT_CHUNK_TOKENS)) * CHARS_PER_TOKEN
+
+    chunks = []
+    for text in texts:
+        current = []
+        length = 0
+        for section in _sections(text or ""):
+            paragraphs = []
+            for paragraph in section:
+                paragraphs.extend(_hard_split(paragraph, max_chars))
+            section_length = sum(len(paragraph) + 2 for paragraph in paragraphs)
+            # Start a new chunk at a section boundary rather than split a section that would fit alone
+            if current and length + section_length > max_chars and section_length <= max_chars:
+                chunks.append("\n\n".join(current))
+                current, length = [], 0
+            for paragraph in paragraphs:
+                if current and length + len(paragraph) + 2 > max_chars:
+                    chunks.append("\n\n".join(current))
+                    current, length = [], 0
+                current.append(paragraph)
+                length += len(paragraph) + 2
+        if current:
+            chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _is_empty(value):
+    return value is None or value == '' or value == [] or value == {}
+
+
+def _list_key(item):
+    if isinstance(item, str):
+        return ' '.join(item.lower().split())
+    return json.dumps(item, sort_keys=True, default=str)
+
+
+def merge_findings(findings):
+    """
+    Merge per-chunk analysis results into one
+
+    Args:
+        findings (list): (result dict, weight) pairs, weight being the chunk's size
+
+    Returns:
+        dict: Lists combined in chunk order without duplicates, numbers
+            averaged by weight, booleans and text by weighted majority, and
+            nested dicts merged the same way
+    """
+    keys = []
+    for result, _ in findings:
+        for key in result:
+            if key not in keys:
+                keys.append(key)
+
+    merged = {}
+    for key in keys:
+        values = [(result[key], weight) for result, weight in findings
+                  if isinstance(result, dict) and not _is_empty(result.get(key))]
+        if not values:
+            merged[key] = findings[0][0].get(key)
+            continue
+        first = values[0][0]
+        if isinstance(first, bool) or not isinstance(first, (int, float, list, dict)):
+            votes = Counter()
+            for value, weight in values:
+                votes[_list_key(value)] += weight
+            winner = votes.most_common(1)[0][0]
+            merged[key] = next(value for value, _ in values if _list_key(value) == winner)
+        elif isinstance(first, (int, float)):
+            numbers = [(value, weight) for value, weight in values
+                       if isinstance(value, (int, float)) and not isinstance(value, bool)]
+            total_weight = sum(weight for _, weight in numbers) or 1
+            mean = sum(value * weight for value, weight in numbers) / total_weight
+            merged[key] = int(round(mean)) if all(isinstance(value, int) for value, _ in numbers) else round(mean, 4)
+        elif isinstance(first, list):
+            seen = set()
+            items = []
+            for value, _ in values:
+                for item in value if isinstance(value, list) else [value]:
+                    item_key = _list_key(item)
+                    if item_key not in seen:
+                        seen.add(item_key)
+                        items.append(item)
+            merged[key] = items
+        else:
+            merged[key] = merge_findings([(value, weight) for value, weight in values if isinstance(value, dict)])
+    return merged
+
+
+def iter_chunked_analysis(chunks, analyze_chunk, token_budget=None, max_workers=None):
+    """
+    Analyze chunks concurrently, yielding progress events and finally the merged result
+
+    Chunks are taken in order until the token budget is spent; the rest are
+    skipped and reported in the result's analysis_coverage.
+
+    Args:
+        chunks (list): Chunk texts from split_sections()
+        analyze_chunk (callable): Returns the analysis dict for one chunk text
+        token_budget (int): Total estimated input tokens (ANALYSIS_TOKEN_BUDGET, default 60000)
+        max_workers (int): Chunks analyzed at once (ANALYSIS_WORKERS, default 4)
+
+    Yields:
+        dict: {'event': 'started', 'chunks', 'skipped', 'tokens'}, then
+            {'event': 'progress', 'done', 'total', 'failed'} per chunk, then
+            {'event': 'result', 'analysis'}
+
+    Raises:
+        Exception: The first chunk's error if every chunk failed
+    """
+    token_budget = token_budget or _setting('ANALYSIS_TOKEN_BUDGET', DEFAULT_TOKEN_BUDGET)
+    max_workers = max_workers or _setting('ANALYSIS_WORKERS', DEFAULT_WORKERS)
+
+    selected = []
+    tokens = 0
+    for chunk in chunks:
+        chunk_tokens = estimate_tokens(chunk)
+        if selected and tokens + chunk_tokens > token_budget:
+            break
+        selected.append(chunk)
+        tokens += chunk_tokens
+    if not selected:
+        raise ValueError("No text to analyze")
+    skipped = len(chunks) - len(selected)
+    if skipped:
+        logger.warning(f"Token budget reached: analyzing {len(selected)} of {len(chunks)} chunks")
+    yield {'event': 'started', 'chunks': len(selected), 'skipped': skipped, 'tokens': tokens}
+
+    results = [None] * len(selected)
+    errors = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(selected))) as pool:
+        futures = {pool.submit(analyze_chunk, chunk): index for index, chunk in enumerate(selected)}
+        try:
+            done = 0
+            for future in as_completed(futures):
+                index = futures[future]
+                done += 1
+                try:
+                    results[index] = future.result()
+                except Exception as e:
+                    errors.append(e)
+                    logger.warning(f"Chunk {index + 1} of {len(selected)} failed: {e}")
+                yield {'event': 'progress', 'done': done, 'total': len(selected), 'failed': len(errors)}
+        finally:
+            # Closed early (the caller stopped iterating): chunks not started yet are never sent
+            for future in futures:
+                future.cancel()
+
+    findings = [(result, estimate_tokens(selected[index]))
+                for index, result in enumerate(results) if isinstance(result, dict)]
+    if not findings:
+        raise errors[0] if errors else ValueError("No chunk produced an analysis")
+    analysis = findings[0][0] if len(findings) == 1 else merge_findings(findings)
+    if len(selected) > 1 or skipped:
+        analysis['analysis_coverage'] = {
+            'chunks': len(chunks),
+            'analyzed': len(findings),
+            'failed': len(errors),
+            'skipped': skipped,
+            'tokens': tokens,
+        }
+    yield {'event': 'result', 'analysis': analysis}
+
+
+def run_chunked_analysis(chunks, analyze_chunk, progress=None, **kwargs):
+    """
+    Analyze chunks concurrently and return the merged result
+
+    Args:
+        chunks (list): Chunk texts from split_sections()
+        analyze_chunk (callable): Returns the analysis dict for one chunk text
+        progress (callable): Called with each 'started' and 'progress' event; raising
+            from it (e.g. AnalysisCancelled) cancels the chunks not yet started
+        **kwargs: token_budget and max_workers for iter_chunked_analysis()
+
+    Returns:
+        dict: The merged analysis
+    """
+    events = iter_chunked_analysis(chunks, analyze_chunk, **kwargs)
+    try:
+        for event in events:
+            if event['event'] == 'result':
+                return event['analysis']
+            if progress is not None:
+                # May raise (e.g. AnalysisCancelled), which stops the chunks not started yet
+                progress(event)
+    finally:
+        events.close()
@@ -0,0 +1,209 @@
+"""
+Resumable Chunked Uploads for SmartDispute.ai
+
+Large evidence files are uploaded as numbered chunks that may arrive in any
+order and in parallel. Each chunk is streamed to disk in fixed-size blocks
+while its SHA-256 is computed, checked against the checksum the client sent,
+and only then renamed into place, so a chunk file that exists is always
+complete and verified. The client can ask which chunks are present and resend
+only the missing ones after a dropped connection.
+
+Assembly copies chunks into the final file inside the kernel
+(os.copy_file_range, falling back to os.sendfile, then to a buffered copy),
+and the whole-file SHA-256 is computed in the same pass, so memory use stays
+at one block however large the upload is.
+"""
+
+import os
+import re
+import hashlib
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1024 * 1024
+
+_CHUNK_NAME = re.compile(r'^chunk_(\d+)$')
+
+
+class ChunkError(ValueError):
+    """A chunk was rejected or the upload cannot be assembled"""
+
+
+def chunk_path(chunks_dir, index):
+    """Path of a verified chunk"""
+    return os.path.join(chunks_dir, f"chunk_{index}")
+
+
+def save_chunk(chunks_dir, index, stream, expected_sha256=None):
+    """
+    Stream one chunk to disk, verifying its checksum
+
+    Args:
+        chunks_dir (str): Directory holding this upload's chunks
+        index (int): Chunk number (0-based)
+        stream: Readable binary stream with the chunk data
+        expected_sha256 (str): Hex SHA-256 the client computed, if sent
+
+    Returns:
+        dict: index, size and sha256 of the stored chunk
+
+    Raises:
+        ChunkError: If the checksum does not match (nothing is stored)
+    """
+    os.makedirs(chunks_dir, exist_ok=True)
+    final_path = chunk_path(chunks_dir, index)
+    # Unique per writer so a retried chunk racing the original cannot interleave
+    part_path = f"{final_path}.{os.getpid()}.{id(stream)}.part"
+    sidecar_part_path = f"{part_path}.sha256"
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(part_path, 'wb') as f:
+            for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+                digest.update(block)
+                f.write(block)
+                size += len(block)
+        sha256 = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise ChunkError(f"Checksum mismatch for chunk {index}: expected {expected_sha256}, got {sha256}")
+        with open(sidecar_part_path, 'w') as f:
+            f.write(sha256)
+        # Chunk first, then its checksum: a sidecar never describes a chunk that is not there yet
+        os.replace(part_path, final_path)
+        os.replace(sidecar_part_path, f"{final_path}.sha256")
+    finally:
+        for path in (part_path, sidecar_part_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return {'index': index, 'size': size, 'sha256': sha256}
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def received_chunks(chunks_dir):
+    """
+    List the verified chunks present for an upload
+
+    A chunk whose checksum sidecar is missing or older than the chunk (a writer
+    stopped between the two renames, or a racing writer replaced the chunk) is
+    hashed again.
+
+    Returns:
+        dict: Chunk index -> {'size', 'sha256'}
+    """
+    chunks = {}
+    if not os.path.isdir(chunks_dir):
+        return chunks
+    for name in os.listdir(chunks_dir):
+        match = _CHUNK_NAME.match(name)
+        if not match:
+            continue
+        path = os.path.join(chunks_dir, name)
+        chunk_stat = os.stat(path)
+        try:
+            with open(f"{path}.sha256") as f:
+                sha256 = f.read().strip()
+            if os.stat(f"{path}.sha256").st_mtime_ns < chunk_stat.st_mtime_ns:
+                sha256 = None
+        except OSError:
+            sha256 = None
+        if sha256 is None:
+            sha256 = _file_sha256(path)
+        chunks[int(match.group(1))] = {'size': chunk_stat.st_size, 'sha256': sha256}
+    return chunks
+
+
+def missing_chunks(chunks_dir, total_chunks):
+    """Return the indices in range(total_chunks) that have not been received"""
+    present = received_chunks(chunks_dir)
+    return [index for index in range(total_chunks) if index not in present]
+
+
+def _copy_into(source, destination, size):
+    """Append size bytes of source to destination, in the kernel where the platform allows"""
+    copied = 0
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while copied < size:
+                sent = os.copy_file_range(source.fileno(), destination.fileno(), size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            return copied
+        except OSError:
+            # Cross-filesystem copies fail on older kernels; carry on from where it stopped
+            pass
+    if hasattr(os, 'sendfile'):
+        try:
+            offset = copied
+            while copied < size:
+                sent = os.sendfile(destination.fileno(), source.fileno(), offset, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+                offset += sent
+            destination.seek(0, os.SEEK_END)
+            return copied
+        except OSError:
+            pass
+    source.seek(copied)
+    destination.seek(0, os.SEEK_END)
+    for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+        destination.write(block)
+        copied += len(block)
+    return copied
+
+
+def assemble_chunks(chunks_dir, total_chunks, destination_path, expected_sha256=None):
+    """
+    Concatenate an upload's chunks into the final file
+
+    Args:
+        chunks_dir (str): Directory holding this upload's chunks
+        total_chunks (int): Number of chunks the upload was split into
+        destination_path (str): Path of the assembled file
+        expected_sha256 (str): Hex SHA-256 of the whole file, if the client sent one
+
+    Returns:
+        tuple: (size, sha256) of the assembled file
+
+    Raises:
+        ChunkError: If chunks are missing or the whole-file checksum does not match
+            (the partial file is removed)
+    """
+    missing = missing_chunks(chunks_dir, total_chunks)
+    if missing:
+        raise ChunkError(f"Missing chunks: {missing[:20]}")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(destination_path, 'wb') as destination:
+            for index in range(total_chunks):
+                with open(chunk_path(chunks_dir, index), 'rb') as source:
+                    # Hash from the page cache the copy is about to read anyway
+                    for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+                        digest.update(block)
+                    chunk_size = source.tell()
+                    source.seek(0)
+                    destination.flush()
+                    if _copy_into(source, destination, chunk_size) != chunk_size:
+                        raise ChunkError(f"Chunk {index} changed while being assembled")
+                    size += chunk_size
+        sha256 = digest.hexdigest()
+        if expected_sha256 and expected_sha256.lower() != sha256:
+            raise ChunkError(f"File checksum mismatch: expected {expected_sha256}, got {sha256}")
+    except Exception:
+        if os.path.exists(destination_path):
+            os.remove(destination_path)
+        raise
+    logger.info(f"Assembled {total_chunks} chunks into {destination_path} ({size} bytes)")
+    return size, sha256
@@ -0,0 +1,422 @@
+"""
+Concurrent Crawl Engine for SmartDispute.ai
+
+Runs LegalDataScraper sources in parallel on an asyncio event loop as a pipeline
+of three stages connected by bounded queues:
+
+- fetch: HTTP requests, I/O-concurrent. Politeness is kept per domain: each
+  netloc gets a token bucket that hands out one request at a time, spaced by the
+  scraper's MIN_DELAY/MAX_DELAY window, while a global semaphore caps the number
+  of in-flight requests across all domains. Unchanged pages stop here.
+- extract: trafilatura/BeautifulSoup text and metadata extraction in a process
+  pool, so CPU-heavy parsing never holds up the sockets.
+- persist: batched writes to the corpus store, catalog and search index.
+
+A full crawl therefore takes roughly as long as the slowest domain rather than
+the sum of all sources, and each stage reports its throughput and queue depth so
+the bottleneck is visible in the logs.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import urllib.parse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+QUEUE_SIZE = 64  # documents buffered between stages
+PERSIST_BATCH_SIZE = 32  # most documents written in one persist batch
+PROGRESS_INTERVAL = 30  # seconds between pipeline progress log lines
+
+STAGES = ('fetch', 'extract', 'persist')
+
+
+class DomainTokenBucket:
+    """
+    Single-token bucket guarding requests to one domain
+
+    The token is refilled a random delay between min_delay and max_delay after
+    each request starts, and only one request per domain is in flight at a time.
+    """
+
+    def __init__(self, min_delay, max_delay):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._lock = asyncio.Lock()
+        self._next_token_at = 0.0
+
+    async def __aenter__(self):
+        await self._lock.acquire()
+        wait = self._next_token_at - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._lock.release()
+
+    def consume(self):
+        """Take the token and schedule the next refill."""
+        self._next_token_at = time.monotonic() + random.uniform(self.min_delay, self.max_delay)
+
+
+class StageStats:
+    """
+    Throughput and queue-depth counters for one pipeline stage
+    """
+
+    def __init__(self):
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.started_at = time.monotonic()
+
+    def record(self, seconds, items=1):
+        """Count items finished by the stage and the time spent on them."""
+        self.items += items
+        self.busy_seconds += seconds
+
+    def sample_queue(self, depth):
+        """Record how many items are waiting for the stage."""
+        self.queue_depth = depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def report(self):
+        """
+        Summarize the stage
+
+        Returns:
+            dict: Items processed, wall-clock items per second, busy and CPU seconds, and queue depths
+        """
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            'items': self.items,
+            'items_per_second': round(self.items / elapsed, 2),
+            'busy_seconds': round(self.busy_seconds, 3),
+            'cpu_seconds': round(self.cpu_seconds, 3),
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self.max_queue_depth
+        }
+
+
+class CrawlEngine:
+    """
+    Asyncio crawl engine that scrapes several legal sources through a fetch/extract/persist pipeline
+    """
+
+    def __init__(self, scraper, max_connections=8, extract_workers=None):
+        """
+        Initialize the engine
+
+        Args:
+            scraper (LegalDataScraper): Scraper providing fetch/parse/save logic
+            max_connections (int): Global cap on concurrent requests
+            extract_workers (int): Extraction processes (defaults to the CPU count;
+                0 extracts in worker threads instead of a process pool)
+        """
+        self.scraper = scraper
+        self.max_connections = max_connections
+        if extract_workers is None:
+            extract_workers = os.cpu_count() or 1
+        self.extract_workers = extract_workers
+        self.stats = {}
+        self._buckets = {}
+        self._connections = None
+        self._extract_queue = None
+        self._persist_queue = None
+        self._pending_fetches = 0
+
+    def run(self, source_ids):
+        """
+        Crawl the given sources and block until all of them finish
+
+        Args:
+            source_ids (list): Source IDs to scrape
+
+        Returns:
+            dict: Processed document metadata organized by source
+        """
+        return asyncio.run(self.crawl(source_ids))
+
+    async def crawl(self, source_ids):
+        """
+        Crawl the given sources concurrently
+
+        Args:
+            source_ids (list): Source IDs to scrape
+
+        Returns:
+            dict: Processed document metadata organized by source
+        """
+        self._buckets = {}
+        self._connections = asyncio.Semaphore(self.max_connections)
+        self._extract_queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._persist_queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self._pending_fetches = 0
+        self.stats = {stage: StageStats() for stage in STAGES}
+
+        results = {source_id: [] for source_id in source_ids}
+
+        pool = None
+        if self.extract_workers > 0:
+            # spawn, not fork: the scraper normally runs in a thread of the web process
+            pool = ProcessPoolExecutor(max_workers=self.extract_workers,
+                                       mp_context=multiprocessing.get_context('spawn'))
+
+        monitor = asyncio.create_task(self._monitor())
+        extractors = [asyncio.create_task(self._extract_worker(pool))
+                      for _ in range(max(self.extract_workers, 1))]
+        persister = asyncio.create_task(self._persist_worker(results))
+
+        try:
+            outcomes = await asyncio.gather(
+                *(self.scrape_source(source_id) for source_id in source_ids),
+                return_exceptions=True
+            )
+            for source_id, outcome in zip(source_ids, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.error(f"Error scraping source {source_id}: {outcome}")
+
+            # Drain the pipeline: one sentinel per extractor, then one for the persister
+            for _ in extractors:
+                await self._extract_queue.put(None)
+            await asyncio.gather(*extractors)
+            await self._persist_queue.put(None)
+            await persister
+
+            # Sources that failed outright keep their frontier and resume next run
+            for source_id, outcome in zip(source_ids, outcomes):
+                if not isinstance(outcome, Exception):
+                    await asyncio.to_thread(self.scraper.frontier.complete, source_id)
+        finally:
+            monitor.cancel()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            for source_id in source_ids:
+                await asyncio.to_thread(self.scraper.get_manifest(source_id).save)
+
+        self._sample_queues()
+        self._log_progress("Crawl finished")
+        for source_id, documents in results.items():
+            logger.info(f"Scraped {len(documents)} documents from {source_id}")
+        return results
+
+    def stage_report(self):
+        """
+        Report throughput and queue depth for each pipeline stage of the last crawl
+
+        Returns:
+            dict: StageStats.report() keyed by stage name
+        """
+        return {stage: stats.report() for stage, stats in self.stats.items()}
+
+    def _sample_queues(self):
+        self.stats['fetch'].sample_queue(self._pending_fetches)
+        self.stats['extract'].sample_queue(self._extract_queue.qsize())
+        self.stats['persist'].sample_queue(self._persist_queue.qsize())
+
+    def _log_progress(self, prefix):
+        parts = [
+            f"{stage} {report['items']} docs, {report['items_per_second']}/s, queue {report['queue_depth']}"
+            for stage, report in self.stage_report().items()
+        ]
+        logger.info(f"{prefix}: " + "; ".join(parts))
+
+    async def _monitor(self):
+        ticks = 0
+        while True:
+            await asyncio.sleep(1)
+            self._sample_queues()
+            ticks += 1
+            if ticks % PROGRESS_INTERVAL == 0:
+                self._log_progress("Crawl progress")
+
+    def _bucket_for(self, url):
+        domain = urllib.parse.urlparse(url).netloc
+        if domain not in self._buckets:
+            self._buckets[domain] = DomainTokenBucket(self.scraper.min_delay, self.scraper.max_delay)
+        return self._buckets[domain]
+
+    async def request(self, url, headers=None):
+        """
+        Issue a GET, honouring robots.txt, the domain's token bucket and the global cap
+
+        Args:
+            url (str): URL to fetch
+            headers (dict): Extra request headers
+
+        Returns:
+            requests.Response or None: Response, or None on error
+        """
+        allowed = await asyncio.to_thread(self.scraper._respect_robots_txt, url)
+        if not allowed:
+            logger.warning(f"URL disallowed by robots.txt: {url}")
+            return None
+
+        async with self._bucket_for(url) as bucket:
+            async with self._connections:
+                bucket.consume()
+                return await asyncio.to_thread(self.scraper._get, url, headers)
+
+    async def fetch(self, url):
+        """
+        Fetch a page's HTML
+
+        Args:
+            url (str): URL to fetch
+
+        Returns:
+            str or None: HTML content of the page, or None on error
+        """
+        response = await self.request(url)
+        return response.text if response is not None else None
+
+    async def scrape_source(self, source_id):
+        """
+        Discover recent documents for one source and feed them into the pipeline
+
+        Args:
+            source_id (str): Identifier for the legal source
+        """
+        logger.info(f"Scraping source: {source_id}")
+
+        document_urls = await asyncio.to_thread(self.scraper.frontier.resume, source_id)
+        if document_urls is not None:
+            logger.info(f"Resuming interrupted scrape of {source_id}: {len(document_urls)} documents left")
+        else:
+            document_urls = await self.discover(source_id)
+            await asyncio.to_thread(self.scraper.frontier.discover, source_id, document_urls)
+
+        self._pending_fetches += len(document_urls)
+        await asyncio.gather(*(self.fetch_document(url, source_id) for url in document_urls))
+
+    async def discover(self, source_id):
+        """
+        Fetch a source's listing page and parse the document URLs out of it
+
+        Args:
+            source_id (str): Identifier for the legal source
+
+        Returns:
+            list: Document URLs
+        """
+        recent_url = self.scraper.get_recent_url(source_id)
+        if not recent_url:
+            return []
+
+        html = await self.fetch(recent_url)
+        if not html:
+            logger.warning(f"Failed to fetch recent page for {source_id}: {recent_url}")
+            return []
+
+        return await asyncio.to_thread(
+            self.scraper.parse_document_links, html, recent_url, source_id
+        )
+
+    async def fetch_document(self, url, source_id):
+        """
+        Fetch stage: download one document and queue it for extraction if it changed
+
+        Args:
+            url (str): URL of the document
+            source_id (str): Identifier for the legal source
+        """
+        logger.info(f"Processing document: {url}")
+
+        try:
+            await asyncio.to_thread(self.scraper.frontier.mark_in_flight, source_id, url)
+            headers = self.scraper.conditional_headers(url, source_id)
+            started = time.monotonic()
+            response = await self.request(url, headers)
+            if response is None:
+                logger.warning(f"Failed to fetch document: {url}")
+                return
+
+            status, digest = await asyncio.to_thread(self.scraper.detect_change, response, url, source_id)
+            self.stats['fetch'].record(time.monotonic() - started)
+            if status == 'unchanged':
+                await asyncio.to_thread(self.scraper.frontier.mark_done, source_id, url)
+            else:
+                await self._extract_queue.put((response, url, source_id, status, digest))
+        except Exception as e:
+            logger.error(f"Error processing document {url}: {e}")
+        finally:
+            self._pending_fetches -= 1
+
+    async def _extract_worker(self, pool):
+        """Extract stage: pull fetched pages and extract text and metadata off the event loop."""
+        from utils.legal_data_scraper import timed_extract_document
+
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await self._extract_queue.get()
+            if item is None:
+                return
+
+            response, url, source_id, status, digest = item
+            started = time.monotonic()
+            try:
+                if pool is not None:
+                    extracted, cpu_seconds = await loop.run_in_executor(
+                        pool, timed_extract_document, response.text, url, source_id
+                    )
+                else:
+                    extracted, cpu_seconds = await asyncio.to_thread(
+                        timed_extract_document, response.text, url, source_id
+                    )
+                self.stats['extract'].cpu_seconds += cpu_seconds
+                self.scraper.count_extract_cpu(cpu_seconds)
+            except Exception as e:
+                logger.error(f"Error extracting document {url}: {e}")
+                continue
+            finally:
+                self.stats['extract'].record(time.monotonic() - started)
+
+            if not extracted:
+                logger.warning(f"Failed to extract content from document: {url}")
+                await asyncio.to_thread(self.scraper.frontier.mark_done, source_id, url)
+                continue
+
+            content, metadata = extracted
+            await self._persist_queue.put((content, metadata, source_id, response, url, status, digest))
+
+    async def _persist_worker(self, results):
+        """Persist stage: save everything queued since the last write as one batch."""
+        done = False
+        while not done:
+            batch = []
+            item = await self._persist_queue.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= PERSIST_BATCH_SIZE:
+                    break
+                try:
+                    item = self._persist_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            done = item is None
+
+            if not batch:
+                continue
+            started = time.monotonic()
+            try:
+                await asyncio.to_thread(self._persist_batch, batch, results)
+            except Exception as e:
+                logger.error(f"Error saving batch of {len(batch)} documents: {e}")
+            self.stats['persist'].record(time.monotonic() - started, items=len(batch))
+
+    def _persist_batch(self, batch, results):
+        self.scraper.save_documents([(content, metadata, source_id)
+                                     for content, metadata, source_id, *_ in batch])
+        for _, metadata, source_id, response, url, status, digest in batch:
+            self.scraper.record_fetch(response, url, source_id, status, digest)
+            self.scraper.frontier.mark_done(source_id, url)
+            results[source_id].append(metadata)
+            logger.info(f"Successfully processed document: {metadata['title']}")
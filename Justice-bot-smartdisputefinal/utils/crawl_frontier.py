@@ -0,0 +1,215 @@
+"""
+Crawl Frontier for SmartDispute.ai
+
+Persists crawl progress in SQLite under data_dir/_crawl_state so a scrape that
+dies part-way (scheduler threads are killed with the web process) picks up where
+it stopped instead of starting over:
+
+- CrawlFrontier records, per source, the document URLs discovered on the
+  source's listing page and whether each is discovered, in flight or done. A
+  restarted scrape of the source skips the listing fetch and every done URL.
+- RobotsCache keeps fetched robots.txt files with a TTL, so scheduled runs stop
+  re-downloading every robots.txt.
+"""
+
+import os
+import time
+import sqlite3
+import logging
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CRAWL_STATE_FILE = 'crawl_state.sqlite3'
+
+# An unfinished pass over a source older than this is abandoned, not resumed
+RESUME_MAX_AGE = 24 * 60 * 60
+
+ROBOTS_TTL = 24 * 60 * 60
+
+DISCOVERED = 'discovered'
+IN_FLIGHT = 'in_flight'
+DONE = 'done'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier_passes (
+    source_id TEXT PRIMARY KEY,
+    started_at REAL NOT NULL,
+    completed_at REAL
+);
+CREATE TABLE IF NOT EXISTS frontier_urls (
+    source_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source_id, url)
+);
+CREATE TABLE IF NOT EXISTS robots (
+    base_url TEXT PRIMARY KEY,
+    status INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def _open_state(state_dir):
+    os.makedirs(state_dir, exist_ok=True)
+    path = os.path.join(state_dir, CRAWL_STATE_FILE)
+    with _connect(path) as conn:
+        conn.executescript(_SCHEMA)
+    return path
+
+
+class CrawlFrontier:
+    """
+    Persisted per-source record of discovered, in-flight and done document URLs
+    """
+
+    def __init__(self, state_dir):
+        """
+        Open (creating if needed) the frontier stored in state_dir
+
+        Args:
+            state_dir (str): Crawl state directory (data_dir/_crawl_state)
+        """
+        self.path = _open_state(state_dir)
+
+    def resume(self, source_id):
+        """
+        Get the URLs left over from an interrupted pass over a source
+
+        Args:
+            source_id (str): Identifier for the legal source
+
+        Returns:
+            list or None: URLs not yet done, in discovery order, or None if there
+                is no recent unfinished pass and the listing must be fetched again
+        """
+        with _connect(self.path) as conn:
+            row = conn.execute(
+                'SELECT started_at, completed_at FROM frontier_passes WHERE source_id = ?', (source_id,)
+            ).fetchone()
+            if not row or row[1] is not None or time.time() - row[0] > RESUME_MAX_AGE:
+                return None
+            return [url for url, in conn.execute(
+                'SELECT url FROM frontier_urls WHERE source_id = ? AND state != ? ORDER BY position',
+                (source_id, DONE)
+            )]
+
+    def discover(self, source_id, urls):
+        """
+        Start a new pass over a source with the URLs found on its listing page
+
+        Args:
+            source_id (str): Identifier for the legal source
+            urls (list): Document URLs to crawl
+        """
+        now = time.time()
+        with _connect(self.path) as conn:
+            conn.execute('DELETE FROM frontier_urls WHERE source_id = ?', (source_id,))
+            conn.execute('INSERT OR REPLACE INTO frontier_passes (source_id, started_at, completed_at) '
+                         'VALUES (?, ?, NULL)', (source_id, now))
+            conn.executemany(
+                'INSERT OR IGNORE INTO frontier_urls (source_id, url, position, state, updated_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(source_id, url, position, DISCOVERED, now) for position, url in enumerate(urls)]
+            )
+
+    def _set_state(self, source_id, url, state):
+        with _connect(self.path) as conn:
+            conn.execute('UPDATE frontier_urls SET state = ?, updated_at = ? WHERE source_id = ? AND url = ?',
+                         (state, time.time(), source_id, url))
+
+    def mark_in_flight(self, source_id, url):
+        """Record that a URL is being fetched."""
+        self._set_state(source_id, url, IN_FLIGHT)
+
+    def mark_done(self, source_id, url):
+        """Record that a URL needs no more work in this pass."""
+        self._set_state(source_id, url, DONE)
+
+    def complete(self, source_id):
+        """
+        Close the pass over a source; the next scrape fetches its listing again
+
+        URLs that are still in flight (fetch errors) are not retried until then.
+        """
+        with _connect(self.path) as conn:
+            conn.execute('UPDATE frontier_passes SET completed_at = ? WHERE source_id = ?',
+                         (time.time(), source_id))
+            conn.execute('DELETE FROM frontier_urls WHERE source_id = ?', (source_id,))
+
+    def progress(self):
+        """
+        Count frontier URLs by state for every source with an unfinished pass
+
+        Returns:
+            dict: {source_id: {state: count}}
+        """
+        with _connect(self.path) as conn:
+            rows = conn.execute(
+                'SELECT u.source_id, u.state, COUNT(*) FROM frontier_urls u '
+                'JOIN frontier_passes p ON p.source_id = u.source_id '
+                'WHERE p.completed_at IS NULL GROUP BY u.source_id, u.state'
+            ).fetchall()
+        progress = {}
+        for source_id, state, count in rows:
+            progress.setdefault(source_id, {})[state] = count
+        return progress
+
+
+class RobotsCache:
+    """
+    Persisted robots.txt responses with a time-to-live
+    """
+
+    def __init__(self, state_dir, ttl=ROBOTS_TTL):
+        """
+        Open (creating if needed) the cache stored in state_dir
+
+        Args:
+            state_dir (str): Crawl state directory (data_dir/_crawl_state)
+            ttl (int): Seconds a fetched robots.txt stays fresh
+        """
+        self.path = _open_state(state_dir)
+        self.ttl = ttl
+
+    def get(self, base_url, allow_stale=False):
+        """
+        Look up a cached robots.txt
+
+        Args:
+            base_url (str): scheme://netloc of the site
+            allow_stale (bool): Return the entry even if it is past its TTL
+
+        Returns:
+            tuple or None: (HTTP status, body, fetched_at), or None if missing or expired
+        """
+        with _connect(self.path) as conn:
+            row = conn.execute('SELECT status, body, fetched_at FROM robots WHERE base_url = ?',
+                               (base_url,)).fetchone()
+        if not row or (not allow_stale and time.time() - row[2] > self.ttl):
+            return None
+        return row
+
+    def put(self, base_url, status, body):
+        """
+        Store a fetched robots.txt
+
+        Args:
+            base_url (str): scheme://netloc of the site
+            status (int): HTTP status of the robots.txt response
+            body (str): Response body
+        """
+        with _connect(self.path) as conn:
+            conn.execute('INSERT OR REPLACE INTO robots (base_url, status, body, fetched_at) VALUES (?, ?, ?, ?)',
+                         (base_url, status, body, time.time()))
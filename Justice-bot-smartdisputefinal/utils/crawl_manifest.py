@@ -0,0 +1,111 @@
+"""
+Crawl Manifest for SmartDispute.ai
+
+Persists, per legal source, what the scraper last saw for each document URL:
+the ETag and Last-Modified validators returned by the server and a SHA-256
+digest of the response body. Re-runs use the validators for conditional GETs
+and the digest to skip extraction and disk writes for pages that have not
+changed.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import datetime
+import threading
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def content_digest(body):
+    """
+    Compute the digest used to detect changed document bodies
+
+    Args:
+        body (bytes): Raw response body
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class CrawlManifest:
+    """
+    JSON-backed record of validators and content digests for one source
+    """
+
+    def __init__(self, path):
+        """
+        Load the manifest stored at path (a missing file is an empty manifest)
+
+        Args:
+            path (str): Path of the manifest JSON file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable crawl manifest {self.path}: {e}")
+            return {}
+
+    def get(self, url):
+        """Return the stored entry for a URL, or None."""
+        with self._lock:
+            return self.entries.get(url)
+
+    def conditional_headers(self, url):
+        """
+        Build If-None-Match/If-Modified-Since headers for a URL
+
+        Args:
+            url (str): Document URL
+
+        Returns:
+            dict: Request headers (empty if nothing is known about the URL)
+        """
+        entry = self.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def record(self, url, etag=None, last_modified=None, content_hash=None):
+        """
+        Store the validators and digest seen for a URL
+
+        Values that are None keep whatever was stored before, so a 304 response
+        without validators does not erase the ones from the original fetch.
+        """
+        with self._lock:
+            entry = self.entries.setdefault(url, {})
+            if etag is not None:
+                entry['etag'] = etag
+            if last_modified is not None:
+                entry['last_modified'] = last_modified
+            if content_hash is not None:
+                entry['content_hash'] = content_hash
+            entry['checked_at'] = datetime.datetime.now().isoformat()
+
+    def save(self):
+        """Write the manifest to disk atomically."""
+        with self._lock:
+            data = json.dumps(self.entries, indent=2)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
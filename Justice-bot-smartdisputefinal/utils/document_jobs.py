@@ -0,0 +1,346 @@
+"""
+Background Document Processing for SmartDispute.ai
+
+Upload routes save the file, create its Document row and enqueue a
+ProcessingJob; the request returns as soon as the file is on disk. A pool of
+worker threads started with the app then runs text extraction and OCR, entity
+tagging and the search-vector refresh for each queued document, and fills in
+Document.is_processed / processed_at.
+
+The queue is the processing_jobs table, so queued work survives restarts and
+several app processes can share it: a worker claims a job with a conditional
+UPDATE that only one claimant can win, and a job whose worker died is picked up
+again once its lease expires. The worker renews the lease while the job runs,
+so a long OCR run is not mistaken for a dead worker. Higher-priority jobs (interactive uploads) run
+before lower ones (very large files), failed jobs are retried with exponential
+backoff, and a job that fails max_attempts times is marked failed with its error.
+"""
+
+import os
+import time
+import socket
+import logging
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import text, or_, and_
+
+from flask import current_app
+
+from models import Document, ProcessingJob, db
+from utils.ocr import process_document
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BULK = 0
+
+# Files at least this large are queued behind interactive uploads
+LARGE_FILE_BYTES = 50 * 1024 * 1024
+
+# A running job whose lease lapses is presumed abandoned by a dead worker;
+# a live worker renews it every LEASE_RENEW_SECONDS however long the job takes
+JOB_LEASE = timedelta(seconds=int(os.environ.get('DOCUMENT_JOB_LEASE_SECONDS', 600)))
+LEASE_RENEW_SECONDS = JOB_LEASE.total_seconds() / 4
+RETRY_BASE_SECONDS = 30
+IDLE_POLL_SECONDS = 5
+
+DEFAULT_WORKERS = 2
+
+_wakeup = threading.Event()
+_start_lock = threading.Lock()
+_workers = []
+
+
+def enqueue_document(document, file_extension, priority=None):
+    """
+    Queue a document for background processing
+
+    The job is added to the current session; it is visible to workers once the
+    caller commits, after which notify_workers() wakes idle workers in this process.
+
+    Args:
+        document (Document): The uploaded document (must have been flushed or committed)
+        file_extension (str): File extension used to pick the extractor
+        priority (int): Higher runs first; defaults by file size
+
+    Returns:
+        ProcessingJob: The queued job
+    """
+    if priority is None:
+        try:
+            large = os.path.getsize(document.file_path) >= LARGE_FILE_BYTES
+        except OSError:
+            large = False
+        priority = PRIORITY_BULK if large else PRIORITY_INTERACTIVE
+
+    document.is_processed = False
+    job = ProcessingJob(
+        document_id=document.id,
+        file_extension=file_extension,
+        priority=priority,
+        status=QUEUED,
+        run_after=datetime.utcnow()
+    )
+    db.session.add(job)
+    return job
+
+
+def notify_workers():
+    """Wake idle workers in this process so a new job starts without waiting for the next poll"""
+    _wakeup.set()
+
+
+def latest_job(document_id):
+    """Return the most recent ProcessingJob for a document, or None"""
+    return (ProcessingJob.query.filter_by(document_id=document_id)
+            .order_by(ProcessingJob.id.desc()).first())
+
+
+def pending_document_ids(document_ids):
+    """
+    Return the ids among document_ids whose processing job is still queued or running
+
+    Documents whose job failed permanently are not pending: they will not get
+    text without being uploaded again.
+    """
+    if not document_ids:
+        return set()
+    return {document_id for (document_id,) in
+            db.session.query(ProcessingJob.document_id)
+            .filter(ProcessingJob.document_id.in_(list(document_ids)),
+                    ProcessingJob.status.in_([QUEUED, RUNNING]))
+            .distinct()}
+
+
+def document_status(document):
+    """
+    Describe a document's processing state for the status API
+
+    Args:
+        document (Document): The document
+
+    Returns:
+        dict: document_id, is_processed, processed_at, status ('queued', 'running',
+            'done', 'failed' or 'unknown' for documents that were never queued),
+            attempts, error, and queue_position for queued documents
+    """
+    job = latest_job(document.id)
+    status = {
+        'document_id': document.id,
+        'is_processed': bool(document.is_processed),
+        'processed_at': document.processed_at.isoformat() if document.processed_at else None,
+        'status': job.status if job else (DONE if document.is_processed else 'unknown'),
+        'attempts': job.attempts if job else 0,
+        'error': job.last_error if job and job.status == FAILED else None,
+    }
+    if job and job.status == QUEUED:
+        status['queue_position'] = ProcessingJob.query.filter(
+            ProcessingJob.status == QUEUED,
+            or_(ProcessingJob.priority > job.priority,
+                and_(ProcessingJob.priority == job.priority, ProcessingJob.id < job.id))
+        ).count()
+    return status
+
+
+def _claim_next_job(worker_name):
+    """
+    Claim the highest-priority runnable job, or return None if there is none
+
+    Candidates are queued jobs whose backoff has elapsed and running jobs whose
+    lease has expired. The claim is an UPDATE conditioned on the status and
+    attempt count just read, so when two workers race only one matches a row.
+    """
+    now = datetime.utcnow()
+    # Plain column tuples, not ORM objects: the commit after a lost race would
+    # expire objects and reload them with the winner's status and attempt count
+    candidates = (db.session.query(ProcessingJob.id, ProcessingJob.status, ProcessingJob.attempts)
+                  .filter(or_(and_(ProcessingJob.status == QUEUED, ProcessingJob.run_after <= now),
+                              and_(ProcessingJob.status == RUNNING, ProcessingJob.locked_until < now)))
+                  .order_by(ProcessingJob.priority.desc(), ProcessingJob.id)
+                  .limit(5).all())
+    for job_id, status, attempts in candidates:
+        claimed = (ProcessingJob.query
+                   .filter_by(id=job_id, status=status, attempts=attempts)
+                   .update({
+                       'status': RUNNING,
+                       'attempts': attempts + 1,
+                       'worker': worker_name,
+                       'started_at': now,
+                       'locked_until': now + JOB_LEASE,
+                   }, synchronize_session=False))
+        db.session.commit()
+        if claimed:
+            return db.session.get(ProcessingJob, job_id)
+    return None
+
+
+def _renew_lease(app, job_id, worker_name, attempts, stop):
+    # Runs in its own thread and session; conditioned like the claim, so a lease
+    # taken over by another worker is never extended
+    while not stop.wait(LEASE_RENEW_SECONDS):
+        try:
+            with app.app_context():
+                renewed = (ProcessingJob.query
+                           .filter_by(id=job_id, status=RUNNING, worker=worker_name, attempts=attempts)
+                           .update({'locked_until': datetime.utcnow() + JOB_LEASE}, synchronize_session=False))
+                db.session.commit()
+            if not renewed:
+                logger.warning(f"Processing job {job_id} lost its lease to another worker")
+                return
+        except Exception as e:
+            logger.warning(f"Could not renew the lease of processing job {job_id}: {str(e)}")
+
+
+@contextmanager
+def _lease_kept(job):
+    """Keep renewing a claimed job's lease until the block exits"""
+    stop = threading.Event()
+    thread = threading.Thread(target=_renew_lease,
+                              args=(current_app._get_current_object(), job.id, job.worker, job.attempts, stop),
+                              name=f"lease-job-{job.id}", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _refresh_search_vector(document_id):
+    # Only PostgreSQL databases set up by utils/postgres_search.py have search vectors
+    if db.engine.dialect.name != 'postgresql':
+        return
+    columns = [column['name'] for column in db.inspect(db.engine).get_columns('documents')]
+    if 'search_vector' not in columns:
+        return
+    db.session.execute(text('''
+    UPDATE documents
+    SET search_vector =
+        setweight(to_tsvector('english', COALESCE(filename, '')), 'A') ||
+        setweight(to_tsvector('english', COALESCE(file_type, '')), 'B') ||
+        setweight(to_tsvector('english', COALESCE(extracted_text, '')), 'C')
+    WHERE id = :document_id
+    '''), {'document_id': document_id})
+
+
+def run_job(job):
+    """
+    Process one claimed job: extract text and entities, store them and refresh search
+
+    Raises:
+        Exception: If the document cannot be processed; the caller schedules a retry
+    """
+    document = db.session.get(Document, job.document_id)
+    if document is None:
+        raise LookupError(f"Document {job.document_id} no longer exists")
+    if not os.path.exists(document.file_path):
+        raise FileNotFoundError(f"Uploaded file missing: {document.file_path}")
+
+    extracted_text, metadata = process_document(document.file_path, job.file_extension)
+    if not metadata:
+        raise RuntimeError(f"No text could be extracted from {document.file_path}")
+
+    document.extracted_text = extracted_text
+    document.doc_metadata = metadata
+    document.is_processed = True
+    document.processed_at = datetime.utcnow()
+    db.session.flush()
+    _refresh_search_vector(document.id)
+
+
+def _finish_job(job, error=None):
+    now = datetime.utcnow()
+    job.locked_until = None
+    if error is None:
+        job.status = DONE
+        job.last_error = None
+        job.finished_at = now
+    elif job.attempts >= job.max_attempts:
+        job.status = FAILED
+        job.last_error = error
+        job.finished_at = now
+        logger.error(f"Processing job {job.id} for document {job.document_id} failed permanently: {error}")
+    else:
+        delay = RETRY_BASE_SECONDS * 2 ** (job.attempts - 1)
+        job.status = QUEUED
+        job.last_error = error
+        job.run_after = now + timedelta(seconds=delay)
+        logger.warning(f"Processing job {job.id} failed (attempt {job.attempts}), retrying in {delay}s: {error}")
+    db.session.commit()
+
+
+def run_pending_jobs(worker_name=None, limit=None):
+    """
+    Claim and run jobs until the queue has nothing runnable
+
+    Must be called inside an application context. Workers call this in a loop;
+    it can also be called directly, for example from a maintenance script.
+
+    Args:
+        worker_name (str): Recorded on claimed jobs
+        limit (int): Stop after this many jobs
+
+    Returns:
+        int: Number of jobs run
+    """
+    worker_name = worker_name or f"{socket.gethostname()}:{os.getpid()}"
+    completed = 0
+    while limit is None or completed < limit:
+        job = _claim_next_job(worker_name)
+        if job is None:
+            break
+        started = time.perf_counter()
+        try:
+            with _lease_kept(job):
+                run_job(job)
+            error = None
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(ProcessingJob, job.id)
+            error = str(e)
+        _finish_job(job, error)
+        completed += 1
+        logger.info(f"Processing job {job.id} for document {job.document_id}: {job.status} "
+                    f"in {time.perf_counter() - started:.2f}s")
+    return completed
+
+
+def _worker_loop(app, worker_name):
+    while True:
+        try:
+            with app.app_context():
+                run_pending_jobs(worker_name)
+        except Exception as e:
+            logger.error(f"Document worker {worker_name} error: {str(e)}")
+        _wakeup.wait(IDLE_POLL_SECONDS)
+        _wakeup.clear()
+
+
+def start_document_workers(app, num_workers=None):
+    """
+    Start the background worker threads for this process (once)
+
+    Args:
+        app (Flask): Application whose context workers run in
+        num_workers (int): Thread count; defaults to the DOCUMENT_WORKERS environment variable or 2
+    """
+    with _start_lock:
+        if _workers:
+            return
+        if num_workers is None:
+            num_workers = int(os.environ.get('DOCUMENT_WORKERS', DEFAULT_WORKERS))
+        for index in range(num_workers):
+            worker_name = f"{socket.gethostname()}:{os.getpid()}:{index}"
+            thread = threading.Thread(target=_worker_loop, args=(app, worker_name),
+                                      name=f"document-worker-{index}", daemon=True)
+            thread.start()
+            _workers.append(thread)
+        logger.info(f"Started {num_workers} document processing workers")
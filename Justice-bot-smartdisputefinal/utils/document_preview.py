@@ -1,10 +1,20 @@
 """
 Interactive Legal Document Preview with AI-Powered Annotations
 Provides real-time analysis and annotations for uploaded legal documents
+
+Analyses are cached by content hash and document type, so reopening a preview
+returns the stored result. When an edited document is analyzed with its
+previous text, only the lines that changed are scanned again; matches in the
+unchanged lines are reused with their offsets shifted.
 """
 
+import os
 import json
+import hashlib
 import logging
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
@@ -38,12 +48,197 @@ class DocumentSection:
     importance: float
     section_type: str  # 'header', 'clause', 'paragraph', 'signature'
 
+# Key clauses and potential issues; each tuple of alternatives is found the way
+# re.finditer('first|second', ...) would find it in the lower-cased document
+KEY_CLAUSE_PATTERNS = [
+    (("indemnify", "indemnification"), "Indemnification clause - parties agree to protect each other from certain liabilities", 0.9),
+    (("force majeure",), "Force majeure clause - addresses unforeseeable circumstances", 0.8),
+    (("termination", "terminate"), "Termination provision - specifies how agreement can end", 0.8),
+    (("confidential", "non-disclosure"), "Confidentiality provision - protects sensitive information", 0.8),
+    (("governing law",), "Governing law clause - specifies which jurisdiction's laws apply", 0.9),
+]
+
+ISSUE_PATTERNS = [
+    (("waive", "waiver"), "Waiver of rights - carefully review what rights are being given up", 0.9, True),
+    (("exclusively", "solely responsible"), "Exclusive responsibility clause - high risk provision", 0.9, True),
+    (("penalty", "penalties"), "Penalty clause - review potential financial consequences", 0.8, True),
+    (("automatic renewal",), "Automatic renewal clause - may create ongoing obligations", 0.7, True),
+]
+
+DISCRIMINATORY_TERMS = ["race", "gender", "religion", "sexual orientation", "disability"]
+
+# Substrings the issue, Charter and completeness checks look for ('$' marks amounts)
+CHECK_TERMS = [
+    "consideration", "signature", "signed", "dispute", "notice", "opportunity",
+    "date", "name", "party", "term", "duration", "obligations", "duties", "$",
+]
+
+# Annotation ids are the prefix for the annotation's type and its position in the list
+ANNOTATION_ID_PREFIXES = {"legal_term": "term", "key_clause": "clause", "issue": "issue"}
+
+# Lines that start a new section when extracting sections
+SECTION_HEADER_PATTERN = re.compile('|'.join([
+    r'^[A-Z\s]{3,}:?\s*$',  # ALL CAPS headers
+    r'^\d+\.\s+[A-Z][^.]*$',  # Numbered sections
+    r'^ARTICLE\s+[IVX\d]+',  # Article headers
+    r'^SECTION\s+\d+',  # Section headers
+]))
+
+@dataclass
+class MatchTable:
+    """Every occurrence of the preview's literals in one lower-cased document"""
+    text: str
+    starts: Dict[str, List[int]]
+    
+    def contains(self, literal: str) -> bool:
+        """Whether literal occurs anywhere, like `literal in text`"""
+        return bool(self.starts[literal])
+    
+    def _is_word(self, index: int) -> bool:
+        # Same characters as the regex \w
+        if not 0 <= index < len(self.text):
+            return False
+        char = self.text[index]
+        return char.isalnum() or char == '_'
+    
+    def _positions(self, literal: str, lo: int, hi: Optional[int]) -> List[int]:
+        positions = self.starts[literal]
+        if lo == 0 and hi is None:
+            return positions
+        return positions[bisect_left(positions, lo):None if hi is None else bisect_left(positions, hi)]
+    
+    def word_matches(self, literal: str, lo: int = 0, hi: Optional[int] = None) -> List[tuple]:
+        """
+        (start, end) of each whole-word occurrence, like re.finditer(r'\\bliteral\\b', text)
+        
+        lo and hi limit the result to matches starting in text[lo:hi], which
+        must begin at a line start.
+        """
+        found = []
+        last_end = 0
+        for start in self._positions(literal, lo, hi):
+            end = start + len(literal)
+            if start < last_end:
+                continue
+            if (self._is_word(start - 1) != self._is_word(start)
+                    and self._is_word(end - 1) != self._is_word(end)):
+                found.append((start, end))
+                last_end = end
+        return found
+    
+    def alternation_matches(self, alternatives: tuple, lo: int = 0, hi: Optional[int] = None) -> List[tuple]:
+        """(start, end) of each match, like re.finditer('|'.join(alternatives), text); lo and hi as for word_matches()"""
+        start_sets = [set(self._positions(alternative, lo, hi)) for alternative in alternatives]
+        found = []
+        last_end = 0
+        for start in sorted(set().union(*start_sets)):
+            if start < last_end:
+                continue
+            # At one position the first alternative that matches wins
+            for alternative, start_set in zip(alternatives, start_sets):
+                if start in start_set:
+                    found.append((start, start + len(alternative)))
+                    last_end = start + len(alternative)
+                    break
+        return found
+
+class LiteralMatcher:
+    """
+    Finds every occurrence of a fixed set of lower-case literals in one scan
+    
+    One alternation of all the literals, grouped by first character, is
+    searched from each hit's next character, so overlapping occurrences
+    ('term' inside 'termination') are all found. The alternation prefers
+    longer literals, so the literal a hit matches is the longest starting
+    there, and every other literal starting there is one of its prefixes.
+    """
+    
+    def __init__(self, literals: List[str]):
+        self.literals = list(dict.fromkeys(literals))
+        # Literal -> the literals (itself included) that it starts with
+        self._prefixes = {literal: [other for other in self.literals if literal.startswith(other)]
+                          for literal in self.literals}
+        by_first_char: Dict[str, List[str]] = {}
+        for literal in sorted(self.literals, key=len, reverse=True):
+            by_first_char.setdefault(literal[0], []).append(literal)
+        self._scanner = re.compile('|'.join(
+            re.escape(first_char) + '(?:' + '|'.join(re.escape(literal[1:]) for literal in group) + ')'
+            for first_char, group in by_first_char.items()
+        ))
+    
+    def scan(self, text: str) -> MatchTable:
+        """Build the match table for a lower-cased text"""
+        starts = {literal: [] for literal in self.literals}
+        search = self._scanner.search
+        match = search(text)
+        while match:
+            position = match.start()
+            for literal in self._prefixes[match.group()]:
+                starts[literal].append(position)
+            match = search(text, position + 1)
+        return MatchTable(text=text, starts=starts)
+
+
+@dataclass
+class CachedPreview:
+    """An analysis result, the match table it was built from and its annotation group sizes"""
+    result: Dict[str, Any]
+    matches: MatchTable
+    # Annotations per term, clause pattern and issue pattern, in annotation order
+    annotation_group_sizes: List[int]
+
+class PreviewCache:
+    """Recent preview analyses, least recently used evicted first"""
+    
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, CachedPreview]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(content: str, document_type: str) -> tuple:
+        return hashlib.sha256(content.encode('utf-8', 'surrogatepass')).hexdigest(), document_type
+    
+    def get(self, key: tuple) -> Optional[CachedPreview]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def put(self, key: tuple, entry: CachedPreview):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+# Shared by every LegalDocumentPreview in the process
+PREVIEW_CACHE = PreviewCache(int(os.environ.get("PREVIEW_CACHE_ENTRIES", 32)))
+
 class LegalDocumentPreview:
     """Handles interactive preview and AI-powered analysis of legal documents"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[PreviewCache] = None):
+        self.cache = cache or PREVIEW_CACHE
         self.legal_terms_db = self._load_legal_terms()
         self.charter_references = self._load_charter_references()
+        # Terms, clauses, issues and checks are all found in one scan per document
+        self.matcher = LiteralMatcher(
+            [term.lower() for term in self.legal_terms_db]
+            + [alternative for alternatives, *_ in KEY_CLAUSE_PATTERNS + ISSUE_PATTERNS for alternative in alternatives]
+            + DISCRIMINATORY_TERMS + CHECK_TERMS
+        )
         
     def _load_legal_terms(self) -> Dict[str, Dict[str, Any]]:
         """Load database of legal terms and definitions"""
@@ -110,22 +305,46 @@ class LegalDocumentPreview:
             }
         }
     
-    def analyze_document(self, content: str, document_type: str = "general") -> Dict[str, Any]:
+    def analyze_document(self, content: str, document_type: str = "general",
+                         previous_content: Optional[str] = None) -> Dict[str, Any]:
         """
         Perform comprehensive AI-powered analysis of legal document
         Returns structured analysis with annotations
+        
+        A document analyzed before is answered from the cache. Pass the text
+        the document had before an edit as previous_content to rescan only
+        the changed lines. Nested values of the result are shared with the
+        cache and must not be modified.
         """
+        key = self.cache.key(content, document_type)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return dict(cached.result)
+        
         try:
             logger.info(f"Analyzing document of type: {document_type}")
             
             # Extract sections
             sections = self._extract_sections(content)
             
+            # One scan of the document feeds annotations, issues, Charter and completeness checks
+            base = None
+            if previous_content is not None:
+                base = self.cache.get(self.cache.key(previous_content, document_type))
+            
             # Generate annotations
-            annotations = self._generate_annotations(content, document_type)
+            if base is not None:
+                # Rescan and re-annotate only the lines the edit changed
+                matches, changed = self._rematch(base.matches, content)
+                annotation_groups = self._reannotate(content, matches, base, changed)
+            else:
+                matches = self._match(content)
+                annotation_groups = [[annotation.__dict__ for annotation in group]
+                                     for group in self._annotation_groups(content, matches)]
+            annotations = self._number_annotations(annotation_groups)
             
             # Analyze key issues
-            key_issues = self._identify_key_issues(content, document_type)
+            key_issues = self._identify_key_issues(content, document_type, matches)
             
             # Generate recommendations
             recommendations = self._generate_recommendations(content, key_issues)
@@ -138,36 +357,118 @@ class LegalDocumentPreview:
                 "analysis_timestamp": datetime.now().isoformat(),
                 "document_type": document_type,
                 "sections": [section.__dict__ for section in sections],
-                "annotations": [annotation.__dict__ for annotation in annotations],
+                "annotations": annotations,
                 "key_issues": key_issues,
                 "recommendations": recommendations,
                 "metrics": metrics,
-                "charter_compliance": self._assess_charter_compliance(content),
+                "charter_compliance": self._assess_charter_compliance(content, matches),
                 "readability_score": self._calculate_readability(content),
-                "completeness_score": self._assess_completeness(content, document_type)
+                "completeness_score": self._assess_completeness(content, document_type, matches)
             }
             
             logger.info(f"Document analysis completed with {len(annotations)} annotations")
-            return analysis_result
+            self.cache.put(key, CachedPreview(result=analysis_result, matches=matches,
+                                              annotation_group_sizes=[len(group) for group in annotation_groups]))
+            return dict(analysis_result)
             
         except Exception as e:
             logger.error(f"Error analyzing document: {e}")
             return self._generate_fallback_analysis(content)
     
+    def _match(self, content: str) -> MatchTable:
+        """Find every term, clause, issue and check literal in the lower-cased document"""
+        return self.matcher.scan(content.lower())
+    
+    def _rematch(self, base: MatchTable, content: str) -> tuple:
+        """
+        Update the match table of a document's previous text for its edited text
+        
+        Lines the edit left untouched at the start and end keep their matches,
+        shifted by the change in length before them; only the lines between
+        are scanned. No literal spans a line break, so the result equals a
+        full scan.
+        
+        Returns:
+            tuple: (MatchTable, (start, old_end, new_end)) where text[start:new_end]
+                replaced the previous text's [start:old_end]
+        """
+        text = content.lower()
+        old_lines = base.text.splitlines(keepends=True)
+        new_lines = text.splitlines(keepends=True)
+        
+        limit = min(len(old_lines), len(new_lines))
+        prefix = 0
+        while prefix < limit and old_lines[prefix] == new_lines[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old_lines[-1 - suffix] == new_lines[-1 - suffix]:
+            suffix += 1
+        
+        start = sum(map(len, new_lines[:prefix]))
+        unchanged_tail = sum(map(len, new_lines[len(new_lines) - suffix:]))
+        old_end = len(base.text) - unchanged_tail
+        new_end = len(text) - unchanged_tail
+        shift = new_end - old_end
+        changed = self.matcher.scan(text[start:new_end]).starts
+        
+        starts = {}
+        for literal, positions in base.starts.items():
+            before = bisect_left(positions, start)
+            after = bisect_left(positions, old_end)
+            starts[literal] = (positions[:before]
+                               + [start + position for position in changed[literal]]
+                               + [position + shift for position in positions[after:]])
+        return MatchTable(text=text, starts=starts), (start, old_end, new_end)
+    
+    def _reannotate(self, content: str, matches: MatchTable, base: CachedPreview,
+                    changed: tuple) -> List[List[Dict[str, Any]]]:
+        """
+        Annotation groups for an edited document from its previous analysis
+        
+        Only the changed text is annotated afresh; the previous annotations
+        before it are kept and those after it shifted. They are copies, so
+        the cached result is left as it was.
+        """
+        start, old_end, new_end = changed
+        shift = new_end - old_end
+        fresh_groups = self._annotation_groups(content, matches, start, new_end)
+        previous = base.result["annotations"]
+        
+        groups = []
+        offset = 0
+        for size, fresh in zip(base.annotation_group_sizes, fresh_groups):
+            old = previous[offset:offset + size]
+            offset += size
+            group = ([dict(annotation) for annotation in old if annotation["start_char"] < start]
+                     + [annotation.__dict__ for annotation in fresh]
+                     + [dict(annotation, start_char=annotation["start_char"] + shift,
+                             end_char=annotation["end_char"] + shift)
+                        for annotation in old if annotation["start_char"] >= old_end])
+            for annotation in group:
+                if annotation["annotation_type"] != "legal_term":
+                    # Clause and issue text is the original text at the match, which may differ in case
+                    annotation["text"] = content[annotation["start_char"]:annotation["end_char"]]
+            groups.append(group)
+        return groups
+    
+    @staticmethod
+    def _number_annotations(groups: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Flatten annotation groups, giving each annotation its id"""
+        annotations = []
+        for group in groups:
+            for annotation in group:
+                annotation["id"] = f"{ANNOTATION_ID_PREFIXES[annotation['annotation_type']]}_{len(annotations)}"
+                annotations.append(annotation)
+        return annotations
+    
     def _extract_sections(self, content: str) -> List[DocumentSection]:
         """Extract logical sections from the document"""
         sections = []
         
-        # Common legal document patterns
-        header_patterns = [
-            r'^[A-Z\s]{3,}:?\s*$',  # ALL CAPS headers
-            r'^\d+\.\s+[A-Z][^.]*$',  # Numbered sections
-            r'^ARTICLE\s+[IVX\d]+',  # Article headers
-            r'^SECTION\s+\d+',  # Section headers
-        ]
-        
         lines = content.split('\n')
         current_section = None
+        # Lines of the current section, joined once it ends
+        section_lines = []
         start_char = 0
         
         for i, line in enumerate(lines):
@@ -176,12 +477,14 @@ class LegalDocumentPreview:
                 continue
                 
             # Check if this is a header
-            is_header = any(re.match(pattern, line) for pattern in header_patterns)
+            is_header = SECTION_HEADER_PATTERN.match(line) is not None
             
             if is_header:
                 # Save previous section
                 if current_section:
+                    current_section.content = "".join(section_lines)
                     sections.append(current_section)
+                section_lines = []
                 
                 # Start new section
                 current_section = DocumentSection(
@@ -193,13 +496,14 @@ class LegalDocumentPreview:
                     section_type="header"
                 )
             elif current_section:
-                current_section.content += line + "\n"
+                section_lines.append(line + "\n")
                 current_section.end_char = start_char + len(line)
             
             start_char += len(line) + 1
         
         # Add final section
         if current_section:
+            current_section.content = "".join(section_lines)
             sections.append(current_section)
         
         # If no sections found, treat entire document as one section
@@ -215,83 +519,86 @@ class LegalDocumentPreview:
         
         return sections
     
-    def _generate_annotations(self, content: str, document_type: str) -> List[DocumentAnnotation]:
+    def _generate_annotations(self, content: str, document_type: str,
+                              matches: Optional[MatchTable] = None) -> List[DocumentAnnotation]:
         """Generate AI-powered annotations for the document"""
         annotations = []
-        content_lower = content.lower()
+        for group in self._annotation_groups(content, matches or self._match(content)):
+            for annotation in group:
+                annotation.id = f"{ANNOTATION_ID_PREFIXES[annotation.annotation_type]}_{len(annotations)}"
+                annotations.append(annotation)
+        return annotations
+    
+    def _annotation_groups(self, content: str, matches: MatchTable, lo: int = 0,
+                           hi: Optional[int] = None) -> List[List[DocumentAnnotation]]:
+        """
+        Annotations for each legal term, key clause and issue pattern, in that order
+        
+        lo and hi limit them to matches starting in that part of the text (see
+        MatchTable.word_matches). Ids are left empty for the caller to number.
+        """
+        groups = []
         
         # Annotate legal terms
         for term, info in self.legal_terms_db.items():
-            pattern = r'\b' + re.escape(term.lower()) + r'\b'
-            for match in re.finditer(pattern, content_lower):
-                annotation = DocumentAnnotation(
-                    id=f"term_{len(annotations)}",
+            groups.append([
+                DocumentAnnotation(
+                    id="",
                     text=term,
-                    start_char=match.start(),
-                    end_char=match.end(),
+                    start_char=start,
+                    end_char=end,
                     annotation_type="legal_term",
                     confidence=info["importance"],
                     explanation=info["definition"],
                     severity="info"
                 )
-                annotations.append(annotation)
+                for start, end in matches.word_matches(term.lower(), lo, hi)
+            ])
         
         # Identify key clauses
-        key_clause_patterns = [
-            (r'indemnify|indemnification', "Indemnification clause - parties agree to protect each other from certain liabilities", 0.9),
-            (r'force majeure', "Force majeure clause - addresses unforeseeable circumstances", 0.8),
-            (r'termination|terminate', "Termination provision - specifies how agreement can end", 0.8),
-            (r'confidential|non-disclosure', "Confidentiality provision - protects sensitive information", 0.8),
-            (r'governing law', "Governing law clause - specifies which jurisdiction's laws apply", 0.9),
-        ]
-        
-        for pattern, explanation, confidence in key_clause_patterns:
-            for match in re.finditer(pattern, content_lower):
-                annotation = DocumentAnnotation(
-                    id=f"clause_{len(annotations)}",
-                    text=content[match.start():match.end()],
-                    start_char=match.start(),
-                    end_char=match.end(),
+        for alternatives, explanation, confidence in KEY_CLAUSE_PATTERNS:
+            groups.append([
+                DocumentAnnotation(
+                    id="",
+                    text=content[start:end],
+                    start_char=start,
+                    end_char=end,
                     annotation_type="key_clause",
                     confidence=confidence,
                     explanation=explanation,
                     severity="warning" if confidence > 0.8 else "info"
                 )
-                annotations.append(annotation)
+                for start, end in matches.alternation_matches(alternatives, lo, hi)
+            ])
         
         # Identify potential issues
-        issue_patterns = [
-            (r'waive|waiver', "Waiver of rights - carefully review what rights are being given up", 0.9, True),
-            (r'exclusively|solely responsible', "Exclusive responsibility clause - high risk provision", 0.9, True),
-            (r'penalty|penalties', "Penalty clause - review potential financial consequences", 0.8, True),
-            (r'automatic renewal', "Automatic renewal clause - may create ongoing obligations", 0.7, True),
-        ]
-        
-        for pattern, explanation, confidence, action_required in issue_patterns:
-            for match in re.finditer(pattern, content_lower):
-                annotation = DocumentAnnotation(
-                    id=f"issue_{len(annotations)}",
-                    text=content[match.start():match.end()],
-                    start_char=match.start(),
-                    end_char=match.end(),
+        for alternatives, explanation, confidence, action_required in ISSUE_PATTERNS:
+            groups.append([
+                DocumentAnnotation(
+                    id="",
+                    text=content[start:end],
+                    start_char=start,
+                    end_char=end,
                     annotation_type="issue",
                     confidence=confidence,
                     explanation=explanation,
                     action_required=action_required,
                     severity="critical" if confidence > 0.8 else "warning"
                 )
-                annotations.append(annotation)
+                for start, end in matches.alternation_matches(alternatives, lo, hi)
+            ])
         
-        return annotations
+        return groups
     
-    def _identify_key_issues(self, content: str, document_type: str) -> List[Dict[str, Any]]:
+    def _identify_key_issues(self, content: str, document_type: str,
+                             matches: Optional[MatchTable] = None) -> List[Dict[str, Any]]:
         """Identify key legal issues in the document"""
         issues = []
-        content_lower = content.lower()
+        matches = matches or self._match(content)
         
         # Contract-specific issues
         if document_type in ["contract", "agreement"]:
-            if "consideration" not in content_lower:
+            if not matches.contains("consideration"):
                 issues.append({
                     "type": "missing_element",
                     "severity": "warning",
@@ -300,7 +607,7 @@ class LegalDocumentPreview:
                     "recommendation": "Ensure both parties receive something of value"
                 })
             
-            if "signature" not in content_lower and "signed" not in content_lower:
+            if not matches.contains("signature") and not matches.contains("signed"):
                 issues.append({
                     "type": "execution_issue",
                     "severity": "critical",
@@ -309,8 +616,11 @@ class LegalDocumentPreview:
                     "recommendation": "Add proper signature blocks for all parties"
                 })
         
-        # General legal issues
-        if re.search(r'\$[\d,]+', content) and "dispute" not in content_lower:
+        # General legal issues: an amount ('$' then a digit or comma) with no dispute terms
+        text = matches.text
+        has_amount = any(start + 1 < len(text) and (text[start + 1] == ',' or text[start + 1].isdecimal())
+                         for start in matches.starts["$"])
+        if has_amount and not matches.contains("dispute"):
             issues.append({
                 "type": "risk_assessment",
                 "severity": "warning",
@@ -365,7 +675,7 @@ class LegalDocumentPreview:
         
         return recommendations
     
-    def _calculate_document_metrics(self, content: str, annotations: List[DocumentAnnotation]) -> Dict[str, Any]:
+    def _calculate_document_metrics(self, content: str, annotations: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate document analysis metrics"""
         word_count = len(content.split())
         char_count = len(content)
@@ -373,7 +683,7 @@ class LegalDocumentPreview:
         # Count annotation types
         annotation_counts = {}
         for annotation in annotations:
-            annotation_counts[annotation.annotation_type] = annotation_counts.get(annotation.annotation_type, 0) + 1
+            annotation_counts[annotation["annotation_type"]] = annotation_counts.get(annotation["annotation_type"], 0) + 1
         
         # Calculate complexity score
         legal_term_density = annotation_counts.get("legal_term", 0) / max(word_count / 100, 1)
@@ -388,22 +698,21 @@ class LegalDocumentPreview:
             "estimated_read_time": max(1, word_count // 200)  # minutes
         }
     
-    def _assess_charter_compliance(self, content: str) -> Dict[str, Any]:
+    def _assess_charter_compliance(self, content: str, matches: Optional[MatchTable] = None) -> Dict[str, Any]:
         """Assess document compliance with Canadian Charter"""
         compliance_score = 85  # Base score
         issues = []
         
-        content_lower = content.lower()
+        matches = matches or self._match(content)
         
         # Check for discriminatory language
-        discriminatory_terms = ["race", "gender", "religion", "sexual orientation", "disability"]
-        for term in discriminatory_terms:
-            if term in content_lower:
+        for term in DISCRIMINATORY_TERMS:
+            if matches.contains(term):
                 # Context matters - this is a simple check
                 issues.append(f"Contains reference to {term} - review for discriminatory provisions")
         
         # Check for due process protections
-        if "notice" in content_lower and "opportunity" in content_lower:
+        if matches.contains("notice") and matches.contains("opportunity"):
             compliance_score += 5
         
         return {
@@ -431,27 +740,28 @@ class LegalDocumentPreview:
         
         return round(readability, 1)
     
-    def _assess_completeness(self, content: str, document_type: str) -> float:
+    def _assess_completeness(self, content: str, document_type: str,
+                             matches: Optional[MatchTable] = None) -> float:
         """Assess document completeness based on type"""
-        content_lower = content.lower()
+        matches = matches or self._match(content)
         score = 0
         max_score = 100
         
         # Common elements for most legal documents
-        if "date" in content_lower:
+        if matches.contains("date"):
             score += 15
-        if "name" in content_lower or "party" in content_lower:
+        if matches.contains("name") or matches.contains("party"):
             score += 20
-        if "signature" in content_lower or "signed" in content_lower:
+        if matches.contains("signature") or matches.contains("signed"):
             score += 25
         
         # Document-type specific elements
         if document_type == "contract":
-            if "consideration" in content_lower:
+            if matches.contains("consideration"):
                 score += 20
-            if "term" in content_lower or "duration" in content_lower:
+            if matches.contains("term") or matches.contains("duration"):
                 score += 10
-            if "obligations" in content_lower or "duties" in content_lower:
+            if matches.contains("obligations") or matches.contains("duties"):
                 score += 10
         
         return min(score, max_score)
@@ -0,0 +1,185 @@
+"""
+Single-Pass Entity Extraction for uploaded documents
+
+Finds dates, personal names, Canadian street addresses, phone numbers and email
+addresses in one scan of the text. All entity patterns are compiled once into a
+single alternation with named groups, and repetition is limited to a few words
+per entity, so the scan stays linear in the length of the text even on
+multi-megabyte OCR output.
+
+Each match becomes an EntitySpan with character offsets and a normalized value
+(ISO 8601 dates, E.164 phone numbers, lower-cased emails). Spans never overlap:
+at any position the first matching pattern in ENTITY_PATTERNS wins, so a street
+name is not also reported as a person's name.
+"""
+
+import re
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+_MONTH = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]{0,6}'
+_STREET_TYPE = (r'(?:Avenue|Ave|Boulevard|Blvd|Circle|Cir|Court|Ct|Drive|Dr|Lane|Ln|Parkway|Pkwy|'
+                r'Place|Pl|Plaza|Plz|Road|Rd|Square|Sq|Street|St|Way)')
+_POSTAL_CODE = r'[A-Z]\d[A-Z]\s?\d[A-Z]\d'
+_HONORIFIC = r'(?:Mr|Mrs|Ms|Dr|Prof|Hon)'
+
+# Order matters: earlier patterns win where several could match at the same position
+ENTITY_PATTERNS = [
+    ('email', r'\b[A-Za-z0-9._%+-]{1,64}@[A-Za-z0-9.-]{1,253}\.[A-Za-z]{2,24}\b'),
+    ('address', (
+        r'(?i:\b\d{1,6}\s+(?:[A-Za-z0-9.\'-]+\s+){0,5}?' + _STREET_TYPE + r'\b\.?'
+        r'(?:,?\s+[A-Za-z.\'-]+){0,4}?,?\s+' + _POSTAL_CODE + r'\b)'
+    )),
+    ('date', (
+        r'\b(?:\d{4}[/-]\d{1,2}[/-]\d{1,2}'
+        r'|\d{1,2}[/-]\d{1,2}[/-]\d{2,4}'
+        r'|(?i:' + _MONTH + r')\.?[ ]\d{1,2},?[ ]\d{4}'
+        r'|\d{1,2}[ ](?i:' + _MONTH + r')\.?[ ]\d{4})\b'
+    )),
+    ('phone', r'(?:\+?1[-.\s]?)?(?:\(\d{3}\)|\b\d{3})[-.\s]?\d{3}[-.\s]?\d{4}\b'),
+    ('name', (
+        r'\b(?:' + _HONORIFIC + r'\.[ \t]+[A-Z][a-z]+(?:[ \t]+[A-Z][a-z]+){0,2}'
+        # Plain capitalized words stop before an honorific, which starts a name of its own
+        r'|(?!' + _HONORIFIC + r'\.)[A-Z][a-z]+(?:[ \t]+(?!' + _HONORIFIC + r'\.)[A-Z][a-z]+){1,2})\b'
+    )),
+]
+
+ENTITY_REGEX = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in ENTITY_PATTERNS))
+
+# Metadata keys used by utils/ocr.py for each entity type
+METADATA_KEYS = {
+    'date': 'dates',
+    'name': 'names',
+    'address': 'addresses',
+    'phone': 'phone_numbers',
+    'email': 'email_addresses',
+}
+
+
+@dataclass
+class EntitySpan:
+    """An entity found in a document"""
+    entity_type: str  # 'date', 'name', 'address', 'phone', 'email'
+    text: str
+    start_char: int
+    end_char: int
+    value: Optional[str] = None  # normalized form, None if it could not be normalized
+
+
+def _expand_year(year):
+    if year < 100:
+        return 2000 + year if year < 50 else 1900 + year
+    return year
+
+
+def normalize_date(text):
+    """
+    Convert a matched date to ISO 8601
+
+    Numeric dates are read as MM/DD unless the first number cannot be a month,
+    in which case they are read as DD/MM.
+
+    Returns:
+        str or None: YYYY-MM-DD, or None if the text is not a valid date
+    """
+    parts = re.findall(r'\d+|[A-Za-z]+', text)
+    try:
+        if parts[0].isalpha():
+            year, month, day = int(parts[2]), MONTHS[parts[0][:3].lower()], int(parts[1])
+        elif parts[1].isalpha():
+            year, month, day = int(parts[2]), MONTHS[parts[1][:3].lower()], int(parts[0])
+        elif len(parts[0]) == 4:
+            year, month, day = int(parts[0]), int(parts[1]), int(parts[2])
+        else:
+            first, second = int(parts[0]), int(parts[1])
+            month, day = (second, first) if first > 12 else (first, second)
+            year = _expand_year(int(parts[2]))
+        return date(year, month, day).isoformat()
+    except (KeyError, ValueError, IndexError):
+        return None
+
+
+def normalize_phone(text):
+    """
+    Convert a matched North American phone number to E.164
+
+    Returns:
+        str or None: +1XXXXXXXXXX, or None if it does not have 10 or 11 digits
+    """
+    digits = re.sub(r'\D', '', text)
+    if len(digits) == 11 and digits.startswith('1'):
+        digits = digits[1:]
+    if len(digits) != 10:
+        return None
+    return '+1' + digits
+
+
+def _normalize(entity_type, text):
+    if entity_type == 'date':
+        return normalize_date(text)
+    if entity_type == 'phone':
+        return normalize_phone(text)
+    if entity_type == 'email':
+        return text.lower()
+    if entity_type == 'address':
+        return ' '.join(text.split()).upper()
+    return ' '.join(text.split())
+
+
+def extract_entities(text: str) -> List[EntitySpan]:
+    """
+    Find every entity in a text in a single scan
+
+    Args:
+        text (str): Document text
+
+    Returns:
+        list: EntitySpan objects in order of position
+    """
+    spans = []
+    for match in ENTITY_REGEX.finditer(text):
+        entity_type = match.lastgroup
+        matched = match.group()
+        spans.append(EntitySpan(
+            entity_type=entity_type,
+            text=matched,
+            start_char=match.start(),
+            end_char=match.end(),
+            value=_normalize(entity_type, matched)
+        ))
+    return spans
+
+
+def entity_metadata(text: str) -> Dict[str, List[str]]:
+    """
+    Summarize a document's entities in the metadata format stored with uploads
+
+    Returns:
+        dict: Unique matched strings under 'dates', 'names', 'addresses',
+            'phone_numbers' and 'email_addresses', plus the distinct normalized
+            values under 'normalized_dates' and 'normalized_phone_numbers'
+    """
+    found = {key: set() for key in METADATA_KEYS.values()}
+    normalized_dates = set()
+    normalized_phones = set()
+    for span in extract_entities(text):
+        found[METADATA_KEYS[span.entity_type]].add(span.text)
+        if span.value and span.entity_type == 'date':
+            normalized_dates.add(span.value)
+        elif span.value and span.entity_type == 'phone':
+            normalized_phones.add(span.value)
+
+    metadata = {key: list(values) for key, values in found.items()}
+    metadata['normalized_dates'] = sorted(normalized_dates)
+    metadata['normalized_phone_numbers'] = sorted(normalized_phones)
+    return metadata
@@ -0,0 +1,195 @@
+"""
+Evidence Blob Store for SmartDispute.ai
+
+Uploaded evidence is stored once per user by content: the file lives at
+<upload root>/<user id>/blobs/<sha256[:2]>/<sha256>.<ext>, and every Document
+row for those bytes points its file_path at that one blob. Uploading the same
+file again (to another case, or as a retry) stores nothing new, and the
+duplicate Document can copy the already extracted text instead of being
+processed again.
+
+Blobs are reference counted by the Document rows whose file_path names them.
+Code that deletes documents calls release_blobs() with their paths after
+committing, and blobs no document references any more are removed. A
+duplicate upload has no Document row until its request commits, so matching
+a blob leaves a claim file next to it; release_blobs() keeps claimed blobs
+for a grace period. Both run under a per-user lock file, so the check and
+the deletion cannot interleave with a match, across processes too.
+"""
+
+import os
+import time
+import fcntl
+import shutil
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+
+from models import Document
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 1024 * 1024
+BLOBS_DIR = 'blobs'
+
+# How long a blob matched by a duplicate upload is kept for that upload's Document to be committed
+CLAIM_GRACE_SECONDS = 60 * 60
+
+
+def blob_path(upload_root, user_id, sha256, extension):
+    """Path of the blob holding a user's file with this content"""
+    name = f"{sha256}.{extension}" if extension else sha256
+    return os.path.join(upload_root, str(user_id), BLOBS_DIR, sha256[:2], name)
+
+
+@contextmanager
+def _blob_store_lock(path):
+    """Hold the exclusive lock of the user's blob store that path belongs to"""
+    lock_path = os.path.join(os.path.dirname(os.path.dirname(path)), '.lock')
+    with open(lock_path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _claim_path(path):
+    return path + '.claim'
+
+
+def _commit_blob(temp_path, upload_root, user_id, sha256, extension):
+    path = blob_path(upload_root, user_id, sha256, extension)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _blob_store_lock(path):
+        if os.path.exists(path):
+            # Keeps release_blobs() from removing the blob before this upload's Document is committed
+            with open(_claim_path(path), 'a'):
+                os.utime(_claim_path(path))
+            os.remove(temp_path)
+            return path, True
+        os.replace(temp_path, path)
+    return path, False
+
+
+def store_upload(file_storage, upload_root, user_id, extension):
+    """
+    Store an uploaded file in the user's blob store, hashing it as it is written
+
+    Args:
+        file_storage (FileStorage): The uploaded file from request.files
+        upload_root (str): The app's upload folder
+        user_id: Owner of the file
+        extension (str): File extension, kept on the blob so its format stays recognizable
+
+    Returns:
+        tuple: (file_path, sha256, size, duplicate) where duplicate is True if
+            the user had already stored these bytes and nothing was written
+    """
+    user_blobs = os.path.join(upload_root, str(user_id), BLOBS_DIR)
+    os.makedirs(user_blobs, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    descriptor, temp_path = tempfile.mkstemp(dir=user_blobs, suffix='.part')
+    try:
+        with os.fdopen(descriptor, 'wb') as f:
+            for block in iter(lambda: file_storage.stream.read(BLOCK_SIZE), b''):
+                digest.update(block)
+                f.write(block)
+                size += len(block)
+        sha256 = digest.hexdigest()
+        path, duplicate = _commit_blob(temp_path, upload_root, user_id, sha256, extension)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return path, sha256, size, duplicate
+
+
+def adopt_file(file_path, upload_root, user_id, extension, sha256=None):
+    """
+    Move a file already on disk (such as an assembled chunked upload) into the blob store
+
+    Args:
+        file_path (str): The file; it is moved, or removed if it is a duplicate
+        upload_root (str): The app's upload folder
+        user_id: Owner of the file
+        extension (str): File extension
+        sha256 (str): The file's SHA-256 if already known
+
+    Returns:
+        tuple: (blob_path, duplicate)
+    """
+    if sha256 is None:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+    user_blobs = os.path.join(upload_root, str(user_id), BLOBS_DIR)
+    os.makedirs(user_blobs, exist_ok=True)
+    # Same filesystem as the blob, so _commit_blob's rename stays atomic
+    descriptor, temp_path = tempfile.mkstemp(dir=user_blobs, suffix='.part')
+    os.close(descriptor)
+    shutil.move(file_path, temp_path)
+    return _commit_blob(temp_path, upload_root, user_id, sha256, extension)
+
+
+def find_processed_duplicate(file_path):
+    """
+    Return a processed Document already pointing at this blob, or None
+
+    A duplicate upload can copy its extracted text and metadata instead of being processed again.
+    """
+    return (Document.query
+            .filter(Document.file_path == file_path, Document.is_processed.is_(True))
+            .order_by(Document.id).first())
+
+
+def reference_count(file_path):
+    """Number of Document rows that reference a stored file"""
+    return Document.query.filter(Document.file_path == file_path).count()
+
+
+def _recently_claimed(path):
+    try:
+        return time.time() - os.path.getmtime(_claim_path(path)) < CLAIM_GRACE_SECONDS
+    except OSError:
+        return False
+
+
+def release_blobs(file_paths):
+    """
+    Delete stored files that no Document references any more
+
+    Call after the deletion of the documents that referenced them has been
+    committed. Blobs a duplicate upload matched within CLAIM_GRACE_SECONDS are
+    kept, since that upload's Document may not be committed yet.
+
+    Args:
+        file_paths (iterable): file_path values of the deleted documents
+
+    Returns:
+        int: Number of files removed
+    """
+    removed = 0
+    for file_path in set(path for path in file_paths if path):
+        if reference_count(file_path) or not os.path.exists(file_path):
+            continue
+        try:
+            with _blob_store_lock(file_path):
+                # Counted again under the lock: an upload may have matched the blob meanwhile
+                if _recently_claimed(file_path) or reference_count(file_path):
+                    continue
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                    removed += 1
+                if os.path.exists(_claim_path(file_path)):
+                    os.remove(_claim_path(file_path))
+        except OSError as e:
+            logger.error(f"Failed to delete file {file_path}: {e}")
+    if removed:
+        logger.info(f"Removed {removed} unreferenced evidence files")
+    return removed
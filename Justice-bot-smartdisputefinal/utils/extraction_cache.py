@@ -0,0 +1,218 @@
+"""
+Extraction Cache for SmartDispute.ai
+
+Stores the (text, metadata) result of document extraction and OCR keyed by the
+SHA-256 of the file's content plus the extractor version, so re-uploading the
+same evidence (to another case, through the chunked uploader, or after a failed
+request) skips Tesseract and PDF parsing entirely. Bumping
+utils.text_extraction.EXTRACTOR_VERSION invalidates every entry at once.
+
+Entries live in a single SQLite file, compressed, and the cache is bounded in
+size: when it grows past its limit the least recently used entries are evicted.
+Hit and miss counts are persisted so the hit rate survives restarts and is
+shared by every worker process.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = 'extraction_cache.sqlite3'
+DEFAULT_CACHE_DIR = os.path.join('data', 'extraction_cache')
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Files are hashed in blocks of this size so large uploads never sit in memory
+HASH_BLOCK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    cache_key TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+"""
+
+_build_lock = threading.Lock()
+_cache = None
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def file_sha256(file_path):
+    """
+    Hash a file's content without reading it into memory at once
+
+    Args:
+        file_path (str): Path to the file
+
+    Returns:
+        str: Hex SHA-256 digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(content_sha256, extractor_version, file_extension):
+    """Build the key for one file's extraction result"""
+    return f"{extractor_version}:{file_extension.lower()}:{content_sha256}"
+
+
+class ExtractionCache:
+    """
+    Size-bounded, least-recently-used, on-disk store of extraction results
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Open (creating if needed) the cache stored in cache_dir
+
+        Args:
+            cache_dir (str): Directory for the cache database
+            max_bytes (int): Total compressed size entries may occupy
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILE)
+        self.max_bytes = max_bytes
+        with _connect(self.path) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _count(self, conn, name, amount=1):
+        conn.execute("UPDATE counters SET value = value + ? WHERE name = ?", (amount, name))
+
+    def get(self, key):
+        """
+        Look up an extraction result, counting the hit or miss
+
+        Args:
+            key (str): Key from cache_key()
+
+        Returns:
+            tuple or None: (text, metadata), or None on a miss
+        """
+        try:
+            with _connect(self.path) as conn:
+                row = conn.execute("SELECT payload FROM entries WHERE cache_key = ?", (key,)).fetchone()
+                if row is None:
+                    self._count(conn, 'misses')
+                    return None
+                conn.execute("UPDATE entries SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+                self._count(conn, 'hits')
+            entry = json.loads(zlib.decompress(row[0]).decode('utf-8'))
+            return entry['text'], entry['metadata']
+        except (sqlite3.Error, zlib.error, ValueError, KeyError) as e:
+            logger.warning(f"Extraction cache lookup failed: {str(e)}")
+            return None
+
+    def put(self, key, text, metadata):
+        """
+        Store an extraction result, evicting least recently used entries if over the size limit
+
+        Args:
+            key (str): Key from cache_key()
+            text (str): Extracted text
+            metadata (dict): JSON-serializable extraction metadata
+        """
+        try:
+            payload = zlib.compress(json.dumps({'text': text, 'metadata': metadata}).encode('utf-8'))
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Extraction result not cacheable: {str(e)}")
+            return
+        if len(payload) > self.max_bytes:
+            return
+
+        now = time.time()
+        try:
+            with _connect(self.path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (cache_key, payload, size, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, len(payload), now, now)
+                )
+                self._evict(conn)
+        except sqlite3.Error as e:
+            logger.warning(f"Extraction cache store failed: {str(e)}")
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute("SELECT cache_key, size FROM entries ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM entries WHERE cache_key = ?", evicted)
+        self._count(conn, 'evictions', len(evicted))
+        logger.info(f"Evicted {len(evicted)} extraction cache entries")
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        with _connect(self.path) as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("UPDATE counters SET value = 0")
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            dict: hits, misses, evictions, hit_rate (0-1), entries, bytes and max_bytes
+        """
+        with _connect(self.path) as conn:
+            counters = dict(conn.execute("SELECT name, value FROM counters"))
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'hits': counters['hits'],
+            'misses': counters['misses'],
+            'evictions': counters['evictions'],
+            'hit_rate': round(counters['hits'] / lookups, 4) if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+        }
+
+
+def get_extraction_cache():
+    """
+    Open the process-wide extraction cache
+
+    The location and size limit come from the EXTRACTION_CACHE_DIR and
+    EXTRACTION_CACHE_MAX_BYTES environment variables.
+
+    Returns:
+        ExtractionCache: The cache
+    """
+    global _cache
+    with _build_lock:
+        if _cache is None:
+            _cache = ExtractionCache(
+                os.environ.get('EXTRACTION_CACHE_DIR', DEFAULT_CACHE_DIR),
+                int(os.environ.get('EXTRACTION_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+            )
+    return _cache
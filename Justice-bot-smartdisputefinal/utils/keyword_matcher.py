@@ -0,0 +1,145 @@
+"""
+Multi-Keyword Matcher for SmartDispute.ai
+
+Finds every occurrence of a fixed set of keywords in one scan of a text,
+instead of one regex search per keyword. Matching follows the rules of
+re.findall(r'\\bKEYWORD\\b', text, re.IGNORECASE) for each keyword separately:
+whole words only, case-insensitive, and a keyword that contains another (such
+as 'Landlord and Tenant Board' and 'landlord') is counted for both.
+
+The matcher compiles one alternation of the keywords' first words. A scan
+walks that alternation over the text once; at each hit it checks the keywords
+starting with that word with an anchored match, so the cost is one pass plus
+a little work per keyword occurrence rather than a pass per keyword.
+"""
+
+import re
+import logging
+from bisect import bisect_right
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Keywords made of words joined by separators; anything else is matched with its own regex
+_WORDS_KEYWORD = re.compile(r'\w+(?:\W+\w+)*')
+
+
+@dataclass
+class KeywordScan:
+    """Keyword occurrences found by one KeywordMatcher.scan() over a set of documents"""
+    # Occurrences of each keyword in " ".join(texts), including any spanning two documents
+    term_counts: Counter
+    # Number of documents containing each keyword at least once
+    document_frequency: Counter
+    # Per document, each keyword's (start, end) offsets within that document's text, in order
+    positions: List[Dict[str, List[Tuple[int, int]]]] = field(default_factory=list)
+
+    def contexts(self, texts, keyword, window=50):
+        """
+        Text around each occurrence of a keyword, document by document
+
+        Args:
+            texts (list): The texts that were scanned
+            keyword (str): A keyword the matcher was built with
+            window (int): Characters to include before and after each occurrence
+
+        Returns:
+            list: Context strings in document order, then position order
+        """
+        contexts = []
+        for text, found in zip(texts, self.positions):
+            for start, end in found.get(keyword, ()):
+                contexts.append(text[max(0, start - window):min(len(text), end + window)])
+        return contexts
+
+
+class KeywordMatcher:
+    """
+    Matches a fixed keyword list against texts in a single pass per text
+    """
+
+    def __init__(self, keywords):
+        """
+        Compile the matcher
+
+        Args:
+            keywords (iterable): Keywords to find; duplicates are ignored
+        """
+        self.keywords = list(dict.fromkeys(keywords))
+        # Lower-cased first word -> [(keyword, anchored pattern or None for one-word keywords)]
+        self._by_first_word = {}
+        self._other = []
+        for keyword in self.keywords:
+            if not _WORDS_KEYWORD.fullmatch(keyword):
+                self._other.append((keyword, re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE)))
+                continue
+            first_word = re.match(r'\w+', keyword).group()
+            anchored = None
+            if first_word != keyword:
+                anchored = re.compile(re.escape(keyword) + r'\b', re.IGNORECASE)
+            self._by_first_word.setdefault(first_word.lower(), []).append((keyword, anchored))
+
+        # Longest first so the alternation prefers 'rental' over 'rent'; the \b
+        # on both sides means only whole words match either way
+        first_words = sorted(self._by_first_word, key=len, reverse=True)
+        self._scanner = re.compile(r'\b(?:' + '|'.join(re.escape(word) for word in first_words) + r')\b',
+                                   re.IGNORECASE) if first_words else None
+
+    def _find(self, text):
+        """Yield (keyword, start, end) for every occurrence in text"""
+        if self._scanner is not None:
+            for match in self._scanner.finditer(text):
+                start = match.start()
+                for keyword, anchored in self._by_first_word.get(match.group().lower(), ()):
+                    if anchored is None:
+                        yield keyword, start, match.end()
+                    else:
+                        full = anchored.match(text, start)
+                        if full:
+                            yield keyword, start, full.end()
+        for keyword, pattern in self._other:
+            for match in pattern.finditer(text):
+                yield keyword, match.start(), match.end()
+
+    def scan(self, texts):
+        """
+        Count and locate every keyword in a set of documents
+
+        The documents are scanned as " ".join(texts) in one pass, so term
+        counts match a search of the combined text exactly; each occurrence
+        is also attributed to the document it falls in.
+
+        Args:
+            texts (list): Document texts
+
+        Returns:
+            KeywordScan: Term counts, document frequencies and per-document positions
+        """
+        combined = " ".join(texts)
+        offsets = []
+        offset = 0
+        for text in texts:
+            offsets.append(offset)
+            offset += len(text) + 1
+
+        term_counts = Counter()
+        positions = [{} for _ in texts]
+        # findall() semantics: occurrences of the same keyword never overlap
+        last_end = {}
+        for keyword, start, end in self._find(combined):
+            if start < last_end.get(keyword, 0):
+                continue
+            last_end[keyword] = end
+            term_counts[keyword] += 1
+            doc_index = bisect_right(offsets, start) - 1
+            doc_start = offsets[doc_index]
+            if end <= doc_start + len(texts[doc_index]):
+                positions[doc_index].setdefault(keyword, []).append((start - doc_start, end - doc_start))
+
+        document_frequency = Counter()
+        for found in positions:
+            document_frequency.update(found.keys())
+        return KeywordScan(term_counts=term_counts, document_frequency=document_frequency, positions=positions)
@@ -2,9 +2,14 @@ import logging
 import re
 import json
 import os
+import hashlib
 from collections import Counter
 from datetime import datetime
 
+from utils.keyword_matcher import KeywordMatcher
+from utils.llm_cache import CachingLLMClient, OpenAIChatProvider
+from utils.chunked_analysis import split_sections, run_chunked_analysis
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -137,13 +142,165 @@ LEGAL_CATEGORIES = {
     }
 }
 
-def analyze_case(case, documents):
+def _category_keywords():
+    """Every keyword used for category scoring and form detection, in LEGAL_CATEGORIES order"""
+    keywords = []
+    for data in LEGAL_CATEGORIES.values():
+        keywords.extend(data['keywords'])
+        for form_data in data['forms'].values():
+            keywords.extend(form_data['required_keywords'])
+    return keywords
+
+# Built once: analyze_case scans each case's documents with it in a single pass
+CATEGORY_KEYWORD_MATCHER = KeywordMatcher(_category_keywords())
+
+# Size of each document chunk sent for AI analysis (about 10,000 characters)
+CASE_CHUNK_TOKENS = 2500
+
+# Characters of context kept around a keyword, and contexts kept per keyword per document
+KEYWORD_CONTEXT_WINDOW = 50
+KEYWORD_CONTEXT_LIMIT = 5
+
+# Changes whenever the keywords or context settings do, so stored artifacts are rebuilt
+KEYWORD_ARTIFACT_VERSION = hashlib.sha256(json.dumps(
+    [CATEGORY_KEYWORD_MATCHER.keywords, KEYWORD_CONTEXT_WINDOW, KEYWORD_CONTEXT_LIMIT]
+).encode('utf-8')).hexdigest()[:12]
+
+# A match spanning two documents lies within this many characters of the join,
+# plus one character on either side for the word-boundary checks
+_EDGE_CHARS = max(len(keyword) for keyword in CATEGORY_KEYWORD_MATCHER.keywords) + 1
+
+def document_keyword_artifact(text):
+    """
+    Keyword counts and contexts for one document, as analyze_case merges them
+    
+    Artifacts depend only on the document's text, so they can be stored and
+    reused until the text changes (see utils/case_artifacts.py).
+    
+    Args:
+        text (str): The document's extracted text
+        
+    Returns:
+        dict: version, text_sha256, keywords ({keyword: {'count', 'contexts'}})
+            and the head and tail of the text needed to find matches that
+            span into the neighbouring documents
+    """
+    text = text or ""
+    found = CATEGORY_KEYWORD_MATCHER.scan([text]).positions[0]
+    keywords = {}
+    for keyword, spans in found.items():
+        keywords[keyword] = {
+            'count': len(spans),
+            'contexts': [text[max(0, start - KEYWORD_CONTEXT_WINDOW):min(len(text), end + KEYWORD_CONTEXT_WINDOW)]
+                         for start, end in spans[:KEYWORD_CONTEXT_LIMIT]]
+        }
+    if len(text) <= 2 * _EDGE_CHARS:
+        head, tail = text, ""
+    else:
+        head, tail = text[:_EDGE_CHARS], text[-_EDGE_CHARS:]
+    return {
+        'version': KEYWORD_ARTIFACT_VERSION,
+        'text_sha256': hashlib.sha256(text.encode('utf-8')).hexdigest(),
+        'keywords': keywords,
+        'head': head,
+        'tail': tail
+    }
+
+def merge_keyword_artifacts(artifacts):
+    """
+    Combine per-document artifacts into case-wide keyword statistics
+    
+    Term counts equal a search of the documents' texts joined with spaces,
+    including the rare match that spans two adjacent documents.
+    
+    Args:
+        artifacts (list): document_keyword_artifact() results, in document order
+        
+    Returns:
+        tuple: (term_counts, document_frequency) Counters keyed by keyword
+    """
+    term_counts = Counter()
+    document_frequency = Counter()
+    for artifact in artifacts:
+        for keyword, found in artifact['keywords'].items():
+            term_counts[keyword] += found['count']
+            document_frequency[keyword] += 1
+    term_counts.update(spanning_keyword_counts(artifacts))
+    return term_counts, document_frequency
+
+def spanning_keyword_counts(artifacts):
+    """
+    Count keyword matches that span the join between two adjacent documents
+    
+    Args:
+        artifacts (list): document_keyword_artifact() results, in document order
+        
+    Returns:
+        Counter: Spanning matches per keyword (usually empty)
+    """
+    # Rebuild just the text around each join; matches found there that lie in a
+    # single document are already counted, the rest span a join
+    edges = [artifact['head'] + '\x00' + artifact['tail'] if artifact['tail'] else artifact['head']
+             for artifact in artifacts]
+    edge_scan = CATEGORY_KEYWORD_MATCHER.scan(edges)
+    spanning_counts = Counter()
+    for keyword, count in edge_scan.term_counts.items():
+        spanning = count - sum(len(found.get(keyword, ())) for found in edge_scan.positions)
+        if spanning:
+            spanning_counts[keyword] = spanning
+    return spanning_counts
+
+def score_categories(term_counts, keyword_freq, total_docs):
+    """
+    Score every legal category with a TF-IDF-like weighting of its keywords
+    
+    utils/category_scoring.py computes the same scores for many cases at once;
+    keep the two in step.
+    
+    Args:
+        term_counts: Occurrences of each keyword across the case's documents
+        keyword_freq: Number of the case's documents containing each keyword
+        total_docs (int): Number of documents in the case (at least 1)
+        
+    Returns:
+        dict: Score per category, rounded to 2 decimals
+    """
+    category_scores = {}
+    for category, data in LEGAL_CATEGORIES.items():
+        keywords = data['keywords']
+        score = 0
+        
+        # Calculate category score based on keyword frequency and document distribution
+        for keyword in keywords:
+            # Case-insensitive whole-word occurrences across all text
+            keyword_count = term_counts[keyword]
+            
+            # Document frequency component (how many docs contain this keyword)
+            doc_freq = keyword_freq.get(keyword, 0) / total_docs
+            
+            # Combined TF-IDF-like score
+            keyword_score = keyword_count * (1 + doc_freq) * 100
+            
+            # Give higher weight to specialized terms vs common terms
+            if len(keyword.split()) > 1:  # Multi-word terms are more specific
+                keyword_score *= 1.5
+            
+            score += keyword_score
+        
+        category_scores[category] = round(score, 2)
+    return category_scores
+
+def analyze_case(case, documents, keyword_artifacts=None, progress=None):
     """
     Analyze case based on documents to identify legal issues and relevant information
     
     Args:
         case: Case model instance
         documents: List of Document model instances
+        keyword_artifacts: Stored document_keyword_artifact() results, one per
+            document; computed from the documents' text when not given
+        progress: Optional callable receiving AI chunk progress events
+            (see utils/chunked_analysis.iter_chunked_analysis)
         
     Returns:
         dict: Analysis results
@@ -173,9 +330,9 @@ def analyze_case(case, documents):
             logger.error(f"Error initializing OpenAI client: {str(e)}")
             # Continue with rule-based analysis
         
-        # Combine text from all documents
-        all_texts = [doc.extracted_text or "" for doc in documents]
-        combined_text = " ".join(all_texts)
+        # Per-document keyword statistics; only documents without stored artifacts are read
+        if keyword_artifacts is None:
+            keyword_artifacts = [document_keyword_artifact(doc.extracted_text) for doc in documents]
         
         # Extract dates and names from document metadata
         all_dates = []
@@ -188,38 +345,43 @@ def analyze_case(case, documents):
         # Weight the document texts by recency and type
         weighted_docs = []
         for doc in documents:
-            doc_type = doc.file_type.lower() if doc.file_type else ""
+            # Stored files are named by content hash; the uploaded name carries the type and title
+            name = (doc.original_filename or doc.filename or "").lower()
+            doc_type = name.rsplit('.', 1)[1] if '.' in name else (doc.content_type or "").lower()
             # Give higher weight to recent documents and official forms
             weight = 1.0
-            if "official" in doc.filename.lower() or "form" in doc.filename.lower():
+            if "official" in name or "form" in name:
                 weight = 2.0
-            if "court" in doc.filename.lower() or "notice" in doc.filename.lower():
+            if "court" in name or "notice" in name:
                 weight = 2.5
             
             weighted_docs.append({
-                "text": doc.extracted_text or "",
                 "weight": weight,
                 "type": doc_type
             })
         
         # AI-enhanced analysis if available
         ai_insights = {}
-        if use_ai_enhanced_analysis and combined_text.strip() and client is not None:
+        if use_ai_enhanced_analysis and client is not None and any((doc.extracted_text or "").strip() for doc in documents):
             try:
-                # Prepare a concise version of the text for API limits
-                condensed_text = combined_text[:10000]  # Limit to first 10,000 chars for API limits
+                llm = CachingLLMClient(OpenAIChatProvider(client))
                 
-                # Query OpenAI for enhanced analysis
-                response = client.chat.completions.create(
-                    model="gpt-4o",  # Use the newest available model (released May 13, 2024)
-                    messages=[
-                        {"role": "system", "content": "You are a legal analysis assistant specializing in Canadian law. Analyze the provided document text and extract key legal issues, relevant laws, and case assessment."},
-                        {"role": "user", "content": f"Case category: {case.category}. Analyze the following document text to identify specific legal issues, applicable Canadian laws, and assess case strength: {condensed_text}"}
-                    ],
-                    response_format={"type": "json_object"}
-                )
+                def analyze_chunk(chunk):
+                    # Query OpenAI for enhanced analysis (answered from the cache for unchanged chunks)
+                    content = llm.complete(
+                        'case_analysis',
+                        model="gpt-4o",  # Use the newest available model (released May 13, 2024)
+                        messages=[
+                            {"role": "system", "content": "You are a legal analysis assistant specializing in Canadian law. Analyze the provided document text and extract key legal issues, relevant laws, and case assessment."},
+                            {"role": "user", "content": f"Case category: {case.category}. Analyze the following document text to identify specific legal issues, applicable Canadian laws, and assess case strength: {chunk}"}
+                        ],
+                        response_format={"type": "json_object"}
+                    )
+                    return json.loads(content)
                 
-                ai_analysis = json.loads(response.choices[0].message.content)
+                # Every document is analyzed, in section-aligned chunks sized for API limits, and the findings merged
+                chunks = split_sections([doc.extracted_text or "" for doc in documents], CASE_CHUNK_TOKENS)
+                ai_analysis = run_chunked_analysis(chunks, analyze_chunk, progress=progress)
                 
                 # Extract insights from AI analysis
                 if isinstance(ai_analysis, dict):
@@ -227,7 +389,8 @@ def analyze_case(case, documents):
                         "legal_issues": ai_analysis.get("legal_issues", []),
                         "applicable_laws": ai_analysis.get("applicable_laws", []),
                         "case_assessment": ai_analysis.get("case_assessment", {}),
-                        "suggested_actions": ai_analysis.get("suggested_actions", [])
+                        "suggested_actions": ai_analysis.get("suggested_actions", []),
+                        "coverage": ai_analysis.get("analysis_coverage", {})
                     }
                     logger.info("AI analysis successful")
             except Exception as ai_error:
@@ -250,46 +413,12 @@ def analyze_case(case, documents):
                 # Continue with rule-based analysis
         
         # Rule-based category and issue detection (enhanced)
-        category_scores = {}
-        # First pass: identify document frequency of keywords
-        keyword_freq = Counter()
-        for category, data in LEGAL_CATEGORIES.items():
-            keywords = data['keywords']
-            for keyword in keywords:
-                pattern = r'\b' + re.escape(keyword) + r'\b'
-                # Count documents containing this keyword
-                doc_count = sum(1 for doc in all_texts if re.search(pattern, doc, re.IGNORECASE))
-                if doc_count > 0:
-                    keyword_freq[keyword] = doc_count
-        
-        # Second pass: score categories with TF-IDF-like approach
-        total_docs = len(all_texts) or 1  # Avoid division by zero
-        for category, data in LEGAL_CATEGORIES.items():
-            keywords = data['keywords']
-            score = 0
-            
-            # Calculate category score based on keyword frequency and document distribution
-            for keyword in keywords:
-                # Search for keyword in case-insensitive manner across all text
-                matches = re.findall(r'\b' + re.escape(keyword) + r'\b', combined_text, re.IGNORECASE)
-                keyword_count = len(matches)
-                
-                # Document frequency component (how many docs contain this keyword)
-                doc_freq = keyword_freq.get(keyword, 0) / total_docs
-                
-                # Term frequency component (how often keyword appears overall)
-                term_freq = keyword_count / (len(combined_text.split()) or 1)  # Avoid division by zero
-                
-                # Combined TF-IDF-like score
-                keyword_score = keyword_count * (1 + doc_freq) * 100
-                
-                # Give higher weight to specialized terms vs common terms
-                if len(keyword.split()) > 1:  # Multi-word terms are more specific
-                    keyword_score *= 1.5
-                
-                score += keyword_score
-            
-            category_scores[category] = round(score, 2)
+        # Occurrences and document frequency of every category and form keyword
+        term_counts, keyword_freq = merge_keyword_artifacts(keyword_artifacts)
+        
+        # Score categories with TF-IDF-like approach
+        total_docs = len(documents) or 1  # Avoid division by zero
+        category_scores = score_categories(term_counts, keyword_freq, total_docs)
         
         # Find highest scoring categories
         sorted_categories = sorted(category_scores.items(), key=lambda x: x[1], reverse=True)
@@ -307,25 +436,20 @@ def analyze_case(case, documents):
                     issue_context = []
                     
                     for keyword in form_data['required_keywords']:
-                        pattern = re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE)
-                        
-                        # Check each document for contextual matches
-                        for doc_text in all_texts:
-                            for match in pattern.finditer(doc_text):
-                                # Get context window (50 chars before and after the match)
-                                start = max(0, match.start() - 50)
-                                end = min(len(doc_text), match.end() + 50)
-                                context = doc_text[start:end]
-                                issue_context.append(context)
-                                issue_score += 1
+                        # Context window (50 chars before and after) around each match, document by document
+                        for artifact in keyword_artifacts:
+                            found = artifact['keywords'].get(keyword)
+                            if found:
+                                issue_score += found['count']
+                                issue_context.extend(found['contexts'][:max(0, 5 - len(issue_context))])
                     
                     # Calculate confidence based on keyword matches and context
-                    keyword_match_count = len(issue_context)
+                    keyword_match_count = issue_score
                     
                     # Add additional confidence if multiple keywords are found close together
                     contextual_bonus = 0
-                    if len(issue_context) >= 2:
-                        contextual_bonus = len(issue_context) * 0.5
+                    if keyword_match_count >= 2:
+                        contextual_bonus = keyword_match_count * 0.5
                     
                     total_issue_score = issue_score + contextual_bonus
                     
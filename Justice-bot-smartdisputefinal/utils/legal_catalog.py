@@ -0,0 +1,252 @@
+"""
+Legal Document Catalog for SmartDispute.ai
+
+Compact SQLite catalog of scraped document metadata, stored next to the corpus
+store and written by LegalDataScraper.save_document. Pages that list recent
+updates, per-source counts or documents in a date range query its indexes
+instead of reading every document's metadata.
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import datetime
+import threading
+
+from utils.legal_corpus_store import get_corpus_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CATALOG_FILE = 'catalog.sqlite3'
+
+# Date formats produced by LegalDataScraper.extract_legal_metadata
+DOCUMENT_DATE_FORMATS = ['%Y-%m-%d', '%m/%d/%Y', '%B %d, %Y', '%b %d, %Y']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_key TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT,
+    date TEXT,
+    document_date TEXT,
+    document_type TEXT,
+    citation TEXT,
+    scraped_at TEXT,
+    metadata TEXT NOT NULL,
+    PRIMARY KEY (source_id, doc_key)
+);
+CREATE INDEX IF NOT EXISTS idx_documents_source_scraped ON documents (source_id, scraped_at);
+CREATE INDEX IF NOT EXISTS idx_documents_scraped_at ON documents (scraped_at);
+CREATE INDEX IF NOT EXISTS idx_documents_document_date ON documents (document_date);
+CREATE INDEX IF NOT EXISTS idx_documents_document_type ON documents (document_type);
+"""
+
+_build_lock = threading.Lock()
+
+
+def normalize_document_date(date_text):
+    """
+    Convert a scraped document date to ISO format
+
+    Args:
+        date_text (str): Date as found on the page
+
+    Returns:
+        str or None: YYYY-MM-DD, or None if the date is not recognised
+    """
+    if not date_text:
+        return None
+    for fmt in DOCUMENT_DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(date_text.strip(), fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+class LegalCatalog:
+    """
+    Indexed metadata catalog of scraped legal documents
+    """
+
+    def __init__(self, data_dir):
+        """
+        Open (creating if needed) the catalog stored in data_dir
+
+        Args:
+            data_dir (str): Directory containing scraped documents
+        """
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, CATALOG_FILE)
+        os.makedirs(data_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _upsert(self, conn, doc_key, source_id, metadata):
+        conn.execute(
+            'INSERT OR REPLACE INTO documents '
+            '(doc_key, source_id, url, title, date, document_date, document_type, citation, scraped_at, metadata) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (
+                doc_key,
+                source_id,
+                metadata.get('url', ''),
+                metadata.get('title', ''),
+                metadata.get('date', ''),
+                normalize_document_date(metadata.get('date', '')),
+                metadata.get('document_type', ''),
+                metadata.get('citation', ''),
+                metadata.get('scraped_at', ''),
+                json.dumps(metadata)
+            )
+        )
+
+    def record_document(self, doc_key, source_id, metadata):
+        """
+        Insert or replace the catalog entry for a document in one transaction
+
+        Args:
+            doc_key (str): Stable document identifier (the URL hash)
+            source_id (str): Identifier for the legal source
+            metadata (dict): Document metadata
+        """
+        with self._connect() as conn:
+            self._upsert(conn, doc_key, source_id, metadata)
+
+    def record_documents(self, documents):
+        """
+        Insert or replace catalog entries for a batch of documents in one transaction
+
+        Args:
+            documents (list): (doc_key, source_id, metadata) tuples
+        """
+        with self._connect() as conn:
+            for doc_key, source_id, metadata in documents:
+                self._upsert(conn, doc_key, source_id, metadata)
+
+    def rebuild(self):
+        """
+        Rebuild the catalog from the corpus store in data_dir
+
+        Returns:
+            int: Number of documents catalogued
+        """
+        count = 0
+        with self._connect() as conn:
+            conn.execute('DELETE FROM documents')
+            for source_id, doc_key, metadata, _ in get_corpus_store(self.data_dir).iter_documents():
+                self._upsert(conn, doc_key, source_id, metadata)
+                count += 1
+        logger.info(f"Rebuilt legal document catalog with {count} documents")
+        return count
+
+    def recent_documents(self, since, per_source=5):
+        """
+        Get the newest documents per source among those scraped since a cutoff
+
+        Args:
+            since (datetime.datetime): Only include documents scraped at or after this time
+            per_source (int): Maximum documents to return for each source
+
+        Returns:
+            dict: Lists of document metadata keyed by source ID
+        """
+        sql = (
+            "SELECT source_id, metadata FROM ("
+            "  SELECT source_id, metadata, ROW_NUMBER() OVER ("
+            "    PARTITION BY source_id"
+            "    ORDER BY document_date IS NULL, document_date DESC, date DESC"
+            "  ) AS rank"
+            "  FROM documents WHERE scraped_at >= ?"
+            ") WHERE rank <= ?"
+        )
+        results = {}
+        with self._connect() as conn:
+            for row in conn.execute(sql, (since.isoformat(), per_source)):
+                results.setdefault(row['source_id'], []).append(json.loads(row['metadata']))
+        return results
+
+    def source_counts(self, since=None):
+        """
+        Count catalogued documents per source
+
+        Args:
+            since (datetime.datetime): Only count documents scraped at or after this time
+
+        Returns:
+            dict: Document counts keyed by source ID
+        """
+        sql = "SELECT source_id, COUNT(*) FROM documents"
+        params = []
+        if since:
+            sql += " WHERE scraped_at >= ?"
+            params.append(since.isoformat())
+        sql += " GROUP BY source_id"
+        with self._connect() as conn:
+            return {source_id: count for source_id, count in conn.execute(sql, params)}
+
+    def find_documents(self, source_id=None, date_from=None, date_to=None,
+                       document_type=None, limit=50):
+        """
+        List documents filtered by source, document date range and type, newest first
+
+        Args:
+            source_id (str): Restrict to one legal source
+            date_from (str or datetime.date): Earliest document date (inclusive)
+            date_to (str or datetime.date): Latest document date (inclusive)
+            document_type (str): Restrict to one document type
+            limit (int): Maximum number of documents to return
+
+        Returns:
+            list: Document metadata dicts
+        """
+        clauses = []
+        params = []
+        if source_id:
+            clauses.append("source_id = ?")
+            params.append(source_id)
+        if date_from:
+            clauses.append("document_date >= ?")
+            params.append(str(date_from))
+        if date_to:
+            clauses.append("document_date <= ?")
+            params.append(str(date_to))
+        if document_type:
+            clauses.append("document_type = ?")
+            params.append(document_type)
+
+        sql = "SELECT metadata FROM documents"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY document_date IS NULL, document_date DESC, date DESC LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            return [json.loads(row['metadata']) for row in conn.execute(sql, params)]
+
+
+def get_catalog(data_dir):
+    """
+    Open the catalog for data_dir, building it from the corpus store on first use
+
+    Args:
+        data_dir (str): Directory containing scraped documents
+
+    Returns:
+        LegalCatalog: The catalog
+    """
+    with _build_lock:
+        needs_build = not os.path.exists(os.path.join(data_dir, CATALOG_FILE))
+        catalog = LegalCatalog(data_dir)
+        if needs_build:
+            catalog.rebuild()
+    return catalog
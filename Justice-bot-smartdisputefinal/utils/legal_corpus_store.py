@@ -0,0 +1,341 @@
+"""
+Legal Corpus Store for SmartDispute.ai
+
+Append-only segmented storage for the scraped legal corpus. Instead of a pair of
+<hash>.txt/<hash>.json files per document, each document is written as one
+compressed record appended to a segment file under <data_dir>/_segments. A
+small sidecar .idx file per segment records where each record starts, so a
+document can be read back with one dictionary lookup and one seek, and the whole
+corpus can be iterated by reading the segments sequentially.
+
+Record layout (big-endian):
+    4 bytes  magic b'LDS1'
+    1 byte   codec (0 = zlib, 1 = zstd)
+    4 bytes  payload length
+    payload  compressed UTF-8 JSON {"source_id", "doc_key", "metadata", "content"}
+
+Records are never rewritten; re-saving a document appends a new record and the
+offset index points at the newest one. Appends take an exclusive flock on the
+segment so several processes can share a store, and readers pick up records
+appended by other processes from the .idx files before each lookup.
+"""
+
+import os
+import json
+import zlib
+import fcntl
+import struct
+import logging
+import threading
+from pathlib import Path
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SEGMENTS_DIR = '_segments'
+SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+
+RECORD_MAGIC = b'LDS1'
+RECORD_HEADER = struct.Struct('>4sBI')
+
+CODEC_ZLIB = 0
+CODEC_ZSTD = 1
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _compress(data):
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=9).compress(data)
+    return CODEC_ZLIB, zlib.compress(data, 6)
+
+
+def _decompress(codec, payload):
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Segment record is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload)
+    return zlib.decompress(payload)
+
+
+class LegalCorpusStore:
+    """
+    Append-only, compressed, segmented store of scraped legal documents
+    """
+
+    def __init__(self, data_dir):
+        """
+        Open (creating if needed) the store under data_dir/_segments
+
+        Args:
+            data_dir (str): Directory containing scraped documents
+        """
+        self.data_dir = data_dir
+        self.segments_dir = os.path.join(data_dir, SEGMENTS_DIR)
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # (source_id, doc_key) -> (segment number, offset)
+        self._offsets = {}
+        # segment number -> bytes of its .idx file already loaded
+        self._index_positions = {}
+        self._active_segment = 1
+        self._load()
+
+    def _segment_path(self, number):
+        return os.path.join(self.segments_dir, f"segment-{number:06d}.seg")
+
+    def _index_path(self, number):
+        return os.path.join(self.segments_dir, f"segment-{number:06d}.idx")
+
+    def _segment_numbers(self):
+        return sorted(int(path.stem.split('-')[1]) for path in Path(self.segments_dir).glob('segment-*.seg'))
+
+    def _load(self):
+        for number in self._segment_numbers():
+            indexed_end = self._read_index(number)
+            # Recover records appended after the index was last written
+            if indexed_end < os.path.getsize(self._segment_path(number)):
+                self._recover_index(number, indexed_end)
+        self._active_segment = max(self._index_positions, default=1)
+
+    def _read_index(self, number):
+        """Load new lines from a segment's .idx file; return the end offset of the last record."""
+        indexed_end = 0
+        index_path = self._index_path(number)
+        if not os.path.exists(index_path):
+            self._index_positions.setdefault(number, 0)
+            return indexed_end
+        with open(index_path, 'r', encoding='utf-8') as f:
+            f.seek(self._index_positions.get(number, 0))
+            while True:
+                line = f.readline()
+                if not line.endswith('\n'):
+                    break  # partially written line; read it on the next refresh
+                self._index_positions[number] = f.tell()
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) != 4:
+                    continue
+                source_id, doc_key, offset, length = parts
+                self._offsets[(source_id, doc_key)] = (number, int(offset))
+                indexed_end = max(indexed_end, int(offset) + int(length))
+        return indexed_end
+
+    def _refresh(self):
+        """Pick up records other processes have appended since the last lookup."""
+        with self._lock:
+            for number in self._segment_numbers():
+                index_path = self._index_path(number)
+                if os.path.exists(index_path) and os.path.getsize(index_path) > self._index_positions.get(number, 0):
+                    self._read_index(number)
+            self._active_segment = max(self._index_positions, default=1)
+
+    def _recover_index(self, number, start):
+        segment_path = self._segment_path(number)
+        with open(segment_path, 'r+b') as seg, \
+                open(self._index_path(number), 'a', encoding='utf-8') as idx:
+            fcntl.flock(seg, fcntl.LOCK_EX)
+            seg.seek(start)
+            offset = start
+            while True:
+                record = self._read_record(seg)
+                if record is None:
+                    break
+                length = seg.tell() - offset
+                key = (record['source_id'], record['doc_key'])
+                self._offsets[key] = (number, offset)
+                idx.write(f"{key[0]}\t{key[1]}\t{offset}\t{length}\n")
+                offset = seg.tell()
+            # Drop a torn trailing record so the next append starts cleanly
+            if offset < os.path.getsize(segment_path):
+                logger.warning(f"Truncating incomplete record at end of segment {number}")
+                seg.truncate(offset)
+        self._index_positions[number] = os.path.getsize(self._index_path(number))
+
+    @staticmethod
+    def _read_record(f):
+        header = f.read(RECORD_HEADER.size)
+        if len(header) < RECORD_HEADER.size:
+            return None
+        magic, codec, length = RECORD_HEADER.unpack(header)
+        if magic != RECORD_MAGIC:
+            return None
+        payload = f.read(length)
+        if len(payload) < length:
+            return None
+        return json.loads(_decompress(codec, payload).decode('utf-8'))
+
+    def put(self, source_id, doc_key, metadata, content):
+        """
+        Append a document, superseding any earlier version
+
+        Args:
+            source_id (str): Identifier for the legal source
+            doc_key (str): Stable document identifier (the URL hash)
+            metadata (dict): Document metadata
+            content (str): Extracted document text
+        """
+        self.put_many([(source_id, doc_key, metadata, content)])
+
+    def put_many(self, documents):
+        """
+        Append a batch of documents with a single segment lock and index write
+
+        Args:
+            documents (list): (source_id, doc_key, metadata, content) tuples
+        """
+        records = []
+        for source_id, doc_key, metadata, content in documents:
+            body = json.dumps({
+                'source_id': source_id,
+                'doc_key': doc_key,
+                'metadata': metadata,
+                'content': content
+            }).encode('utf-8')
+            codec, payload = _compress(body)
+            records.append((source_id, doc_key, RECORD_HEADER.pack(RECORD_MAGIC, codec, len(payload)) + payload))
+
+        self._refresh()
+        with self._lock:
+            number = self._active_segment
+            segment_path = self._segment_path(number)
+            if os.path.exists(segment_path) and os.path.getsize(segment_path) >= SEGMENT_MAX_BYTES:
+                number = self._active_segment = number + 1
+                segment_path = self._segment_path(number)
+
+            with open(segment_path, 'ab') as seg:
+                fcntl.flock(seg, fcntl.LOCK_EX)
+                seg.seek(0, os.SEEK_END)
+                offset = seg.tell()
+                index_lines = []
+                locations = []
+                for source_id, doc_key, record in records:
+                    index_lines.append(f"{source_id}\t{doc_key}\t{offset}\t{len(record)}\n")
+                    locations.append(((source_id, doc_key), offset))
+                    offset += len(record)
+                seg.write(b''.join(record for _, _, record in records))
+                seg.flush()
+                with open(self._index_path(number), 'a', encoding='utf-8') as idx:
+                    idx.write(''.join(index_lines))
+            for key, record_offset in locations:
+                self._offsets[key] = (number, record_offset)
+
+    def contains(self, source_id, doc_key):
+        """Return True if the store holds a document."""
+        self._refresh()
+        return (source_id, doc_key) in self._offsets
+
+    def get(self, source_id, doc_key):
+        """
+        Read one document
+
+        Args:
+            source_id (str): Identifier for the legal source
+            doc_key (str): Stable document identifier (the URL hash)
+
+        Returns:
+            tuple or None: (metadata, content), or None if not stored
+        """
+        self._refresh()
+        location = self._offsets.get((source_id, doc_key))
+        if location is None:
+            return None
+        number, offset = location
+        with open(self._segment_path(number), 'rb') as seg:
+            seg.seek(offset)
+            record = self._read_record(seg)
+        if record is None:
+            return None
+        return record['metadata'], record['content']
+
+    def __len__(self):
+        self._refresh()
+        return len(self._offsets)
+
+    def iter_documents(self, source_id=None):
+        """
+        Iterate over the newest version of every document, reading segments sequentially
+
+        Args:
+            source_id (str): Only yield documents from this legal source
+
+        Yields:
+            tuple: (source_id, doc_key, metadata, content)
+        """
+        self._refresh()
+        live = {location: key for key, location in self._offsets.items()}
+        for number in self._segment_numbers():
+            with open(self._segment_path(number), 'rb') as seg:
+                while True:
+                    offset = seg.tell()
+                    record = self._read_record(seg)
+                    if record is None:
+                        break
+                    if (number, offset) not in live:
+                        continue  # superseded by a later record
+                    if source_id and record['source_id'] != source_id:
+                        continue
+                    yield record['source_id'], record['doc_key'], record['metadata'], record['content']
+
+    def import_directory_tree(self, delete_files=False):
+        """
+        Migrate <source>/<hash>.txt/.json pairs from data_dir into the store
+
+        Args:
+            delete_files (bool): Remove each pair once it has been stored
+
+        Returns:
+            int: Number of documents migrated
+        """
+        count = 0
+        for txt_file in sorted(Path(self.data_dir).glob('*/*.txt')):
+            if txt_file.parent.name.startswith('_'):
+                continue
+            metadata_file = txt_file.with_suffix('.json')
+            if not metadata_file.exists():
+                continue
+            try:
+                with open(metadata_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+                with open(txt_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+            except Exception as e:
+                logger.error(f"Error migrating document {txt_file}: {e}")
+                continue
+
+            source_id = metadata.get('source_id') or txt_file.parent.name
+            self.put(source_id, txt_file.stem, metadata, content)
+            count += 1
+
+            if delete_files:
+                txt_file.unlink()
+                metadata_file.unlink()
+
+        logger.info(f"Migrated {count} documents into {self.segments_dir}")
+        return count
+
+
+def get_corpus_store(data_dir):
+    """
+    Get the shared store for data_dir, migrating a file-per-document tree on first use
+
+    Args:
+        data_dir (str): Directory containing scraped documents
+
+    Returns:
+        LegalCorpusStore: The store
+    """
+    key = os.path.abspath(data_dir)
+    with _stores_lock:
+        if key not in _stores:
+            needs_import = not os.path.isdir(os.path.join(data_dir, SEGMENTS_DIR))
+            store = LegalCorpusStore(data_dir)
+            if needs_import:
+                store.import_directory_tree()
+            _stores[key] = store
+        return _stores[key]
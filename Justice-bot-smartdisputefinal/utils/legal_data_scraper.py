@@ -21,19 +21,27 @@ overwhelming the source websites.
 
 import os
 import re
-import json
 import time
 import logging
 import datetime
 import random
 import hashlib
+import sqlite3
 import urllib.parse
 import urllib.robotparser
-from pathlib import Path
+import threading
+from collections import Counter
 import requests
 from bs4 import BeautifulSoup
 import trafilatura
 
+from utils.crawl_manifest import CrawlManifest, content_digest
+from utils.crawl_frontier import CrawlFrontier, RobotsCache
+from utils.legal_corpus_store import get_corpus_store
+from utils.legal_search_index import get_search_index, cluster_key
+from utils.legal_catalog import get_catalog
+from utils.legal_fingerprints import get_fingerprint_index
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -46,6 +54,8 @@ USER_AGENT = 'SmartDispute.ai Legal Information Scraper (+https://smartdispute.a
 REQUEST_TIMEOUT = 30  # seconds
 MIN_DELAY = 2  # seconds
 MAX_DELAY = 5  # seconds
+MAX_CONNECTIONS = 8  # concurrent requests across all domains in concurrent mode
+CRAWL_STATE_DIR = '_crawl_state'  # per-source crawl manifests, kept outside source directories
 
 # Define legal sources
 LEGAL_SOURCES = {
@@ -566,32 +576,238 @@ LEGAL_SOURCES = {
 }
 
 
+def extract_text_content(html, url=""):
+    """
+    Extract cleaned text content from HTML
+    
+    Args:
+        html (str): HTML content
+        url (str): Source URL for reference
+        
+    Returns:
+        str: Cleaned text content
+    """
+    try:
+        # Try trafilatura first (best for article content)
+        extracted_text = trafilatura.extract(html)
+        
+        # Fall back to BeautifulSoup if trafilatura fails
+        if not extracted_text:
+            soup = BeautifulSoup(html, 'html.parser')
+            
+            # Remove script, style, and navigation elements
+            for element in soup(["script", "style", "nav", "footer", "header"]):
+                element.decompose()
+            
+            extracted_text = soup.get_text(separator='\n')
+            
+            # Clean up whitespace
+            extracted_text = re.sub(r'\n+', '\n', extracted_text)
+            extracted_text = re.sub(r'\s+', ' ', extracted_text)
+            extracted_text = extracted_text.strip()
+        
+        return extracted_text
+    except Exception as e:
+        logger.error(f"Error extracting text from {url}: {e}")
+        return ""
+
+def extract_legal_metadata(html, url, source_id):
+    """
+    Extract relevant metadata from legal documents
+    
+    Args:
+        html (str): HTML content
+        url (str): Source URL
+        source_id (str): Identifier for the legal source
+        
+    Returns:
+        dict: Extracted metadata
+    """
+    metadata = {
+        'url': url,
+        'source_id': source_id,
+        'title': '',
+        'date': '',
+        'document_type': '',
+        'citation': '',
+        'scraped_at': datetime.datetime.now().isoformat()
+    }
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Extract title - look for the most prominent heading
+    for heading in ['h1', 'h2', 'title']:
+        if soup.find(heading):
+            title_text = soup.find(heading).get_text().strip()
+            if title_text:
+                metadata['title'] = title_text
+                break
+    
+    # Source-specific extraction logic
+    if source_id == 'justice-laws':
+        # Look for act title
+        act_title = soup.find('span', class_='Title')
+        if act_title:
+            metadata['title'] = act_title.get_text().strip()
+            
+        # Look for date
+        date_span = soup.find('span', class_='CurrentToDate')
+        if date_span:
+            date_text = date_span.get_text().strip()
+            date_match = re.search(r'\d{4}-\d{2}-\d{2}', date_text)
+            if date_match:
+                metadata['date'] = date_match.group(0)
+    
+    elif source_id == 'scc':
+        # Look for judgment title
+        judgment_title = soup.find('h1', class_='judgmentTitle')
+        if judgment_title:
+            metadata['title'] = judgment_title.get_text().strip()
+            
+        # Look for citation
+        citation = soup.find('div', class_='citation')
+        if citation:
+            metadata['citation'] = citation.get_text().strip()
+            
+        # Look for date
+        date_div = soup.find('div', class_='dateDecision')
+        if date_div:
+            date_text = date_div.get_text().strip()
+            date_match = re.search(r'\d{4}-\d{2}-\d{2}', date_text)
+            if date_match:
+                metadata['date'] = date_match.group(0)
+    
+    # If no specific date found, try to find a date pattern in the HTML
+    if not metadata['date']:
+        # Look for dates in common formats
+        date_patterns = [
+            r'\d{4}-\d{2}-\d{2}',  # ISO format
+            r'\d{2}/\d{2}/\d{4}',  # MM/DD/YYYY
+            r'[A-Z][a-z]{2,8} \d{1,2}, \d{4}'  # Month Day, Year
+        ]
+        
+        for pattern in date_patterns:
+            matches = re.search(pattern, html)
+            if matches:
+                metadata['date'] = matches.group(0)
+                break
+    
+    return metadata
+
+def extract_document(html, url, source_id):
+    """
+    Extract text content and metadata from a fetched document
+    
+    Module-level so it can run in a worker process.
+    
+    Args:
+        html (str): HTML content
+        url (str): Source URL
+        source_id (str): Identifier for the legal source
+        
+    Returns:
+        tuple or None: (content, metadata), or None if no content was extracted
+    """
+    content = extract_text_content(html, url)
+    if not content:
+        return None
+    return content, extract_legal_metadata(html, url, source_id)
+
+
+def timed_extract_document(html, url, source_id):
+    """
+    Run extract_document and measure the CPU time it used
+    
+    Returns:
+        tuple: (extract_document result, CPU seconds spent by the calling thread)
+    """
+    started = time.thread_time()
+    extracted = extract_document(html, url, source_id)
+    return extracted, time.thread_time() - started
+
+
 class LegalDataScraper:
     """
     Main class for scraping legal information from various Canadian sources
     """
 
-    def __init__(self, data_dir="data/legal_source_data"):
+    def __init__(self, data_dir="data/legal_source_data", sources=None,
+                 min_delay=MIN_DELAY, max_delay=MAX_DELAY):
         """
         Initialize the scraper
         
         Args:
             data_dir (str): Directory to store scraped data
+            sources (dict): Source definitions to scrape (defaults to LEGAL_SOURCES)
+            min_delay (float): Minimum delay between requests to the same domain
+            max_delay (float): Maximum delay between requests to the same domain
         """
         self.data_dir = data_dir
+        self.sources = sources if sources is not None else LEGAL_SOURCES
+        self.min_delay = min_delay
+        self.max_delay = max_delay
         self.session = requests.Session()
         self.session.headers.update({'User-Agent': USER_AGENT})
         
         # Create source directories
         os.makedirs(data_dir, exist_ok=True)
-        for source_id in LEGAL_SOURCES:
+        for source_id in self.sources:
             os.makedirs(os.path.join(data_dir, source_id), exist_ok=True)
         
-        # Cache for robots.txt
+        # Cache for robots.txt: parsers in memory (base URL -> (parser, expiry)),
+        # backed by a persisted cache with a TTL
         self.robots_cache = {}
+        self.robots = RobotsCache(os.path.join(data_dir, CRAWL_STATE_DIR))
+        
+        # Discovered/in-flight/done URLs, so an interrupted scrape can resume
+        self.frontier = CrawlFrontier(os.path.join(data_dir, CRAWL_STATE_DIR))
         
         # Rate limiting tracking
         self.last_request_time = {}
+        
+        # Crawl manifests (ETag, Last-Modified, content digest) per source
+        self._manifests = {}
+        self._manifest_lock = threading.Lock()
+        
+        # New/changed/unchanged document counts and extraction CPU time for the current run
+        self.change_counts = Counter()
+        self.extract_cpu_seconds = 0.0
+        self._stats_lock = threading.Lock()
+        
+        # Per-stage throughput and queue depth from the last concurrent crawl
+        self.pipeline_stats = {}
+        
+        # Segmented document store, plus the near-duplicate fingerprints, search
+        # index and metadata catalog that are updated as documents are saved
+        self.store = get_corpus_store(data_dir)
+        self.fingerprints = get_fingerprint_index(data_dir)
+        self.search_index = get_search_index(data_dir)
+        self.catalog = get_catalog(data_dir)
+
+    def get_manifest(self, source_id):
+        """
+        Get the crawl manifest for a source, loading it from disk on first use
+        
+        Args:
+            source_id (str): Identifier for the legal source
+            
+        Returns:
+            CrawlManifest: Manifest for the source
+        """
+        with self._manifest_lock:
+            if source_id not in self._manifests:
+                path = os.path.join(self.data_dir, CRAWL_STATE_DIR, f"{source_id}.manifest.json")
+                self._manifests[source_id] = CrawlManifest(path)
+            return self._manifests[source_id]
+
+    def _count_change(self, status):
+        with self._stats_lock:
+            self.change_counts[status] += 1
+
+    def count_extract_cpu(self, seconds):
+        """Add CPU time spent extracting a document to the run's total."""
+        with self._stats_lock:
+            self.extract_cpu_seconds += seconds
 
     def _respect_robots_txt(self, url):
         """
@@ -606,19 +822,51 @@ class LegalDataScraper:
         parsed_url = urllib.parse.urlparse(url)
         base_url = f"{parsed_url.scheme}://{parsed_url.netloc}"
         
-        # Check if we already have the robots parser in cache
-        if base_url not in self.robots_cache:
-            try:
-                rp = urllib.robotparser.RobotFileParser()
-                rp.set_url(f"{base_url}/robots.txt")
-                rp.read()
-                self.robots_cache[base_url] = rp
-            except Exception as e:
-                logger.warning(f"Error reading robots.txt for {base_url}: {e}")
+        # Check if we already have an unexpired robots parser in cache
+        cached = self.robots_cache.get(base_url)
+        if cached is None or cached[1] < time.time():
+            rp = self._load_robots_txt(base_url)
+            if rp is None:
                 # Default to True (allowed) if we can't read robots.txt
                 return True
+            self.robots_cache[base_url] = (rp, time.time() + self.robots.ttl)
+            cached = self.robots_cache[base_url]
                 
-        return self.robots_cache[base_url].can_fetch(USER_AGENT, url)
+        return cached[0].can_fetch(USER_AGENT, url)
+
+    def _load_robots_txt(self, base_url):
+        """
+        Get a robots.txt parser for a site from the persisted cache, fetching it if expired
+        
+        Args:
+            base_url (str): scheme://netloc of the site
+            
+        Returns:
+            urllib.robotparser.RobotFileParser or None: Parser, or None if robots.txt is unavailable
+        """
+        entry = self.robots.get(base_url)
+        if entry is None:
+            try:
+                response = self.session.get(f"{base_url}/robots.txt", timeout=REQUEST_TIMEOUT)
+                self.robots.put(base_url, response.status_code, response.text)
+                entry = (response.status_code, response.text, time.time())
+            except requests.exceptions.RequestException as e:
+                logger.warning(f"Error reading robots.txt for {base_url}: {e}")
+                # Fall back to an expired copy rather than ignoring robots.txt
+                entry = self.robots.get(base_url, allow_stale=True)
+                if entry is None:
+                    return None
+        
+        status, body, _ = entry
+        rp = urllib.robotparser.RobotFileParser(f"{base_url}/robots.txt")
+        # Same status handling as RobotFileParser.read()
+        if status in (401, 403):
+            rp.disallow_all = True
+        elif status >= 400:
+            rp.allow_all = True
+        else:
+            rp.parse(body.splitlines())
+        return rp
 
     def _rate_limit_request(self, url):
         """
@@ -633,7 +881,7 @@ class LegalDataScraper:
         current_time = time.time()
         if domain in self.last_request_time:
             elapsed = current_time - self.last_request_time[domain]
-            delay = random.uniform(MIN_DELAY, MAX_DELAY)
+            delay = random.uniform(self.min_delay, self.max_delay)
             
             if elapsed < delay:
                 time.sleep(delay - elapsed)
@@ -658,131 +906,76 @@ class LegalDataScraper:
         # Apply rate limiting
         self._rate_limit_request(url)
         
-        try:
-            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-            return response.text
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching {url}: {e}")
-            return None
+        response = self._get(url)
+        return response.text if response is not None else None
 
-    def extract_text_content(self, html, url=""):
+    def fetch_document(self, url, source_id):
         """
-        Extract cleaned text content from HTML
+        Fetch a document, sending conditional headers from the source's crawl manifest
         
         Args:
-            html (str): HTML content
-            url (str): Source URL for reference
+            url (str): URL to fetch
+            source_id (str): Identifier for the legal source
             
         Returns:
-            str: Cleaned text content
+            requests.Response or None: Response (200 or 304), or None on error
         """
-        try:
-            # Try trafilatura first (best for article content)
-            extracted_text = trafilatura.extract(html)
-            
-            # Fall back to BeautifulSoup if trafilatura fails
-            if not extracted_text:
-                soup = BeautifulSoup(html, 'html.parser')
-                
-                # Remove script, style, and navigation elements
-                for element in soup(["script", "style", "nav", "footer", "header"]):
-                    element.decompose()
-                
-                extracted_text = soup.get_text(separator='\n')
-                
-                # Clean up whitespace
-                extracted_text = re.sub(r'\n+', '\n', extracted_text)
-                extracted_text = re.sub(r'\s+', ' ', extracted_text)
-                extracted_text = extracted_text.strip()
-            
-            return extracted_text
-        except Exception as e:
-            logger.error(f"Error extracting text from {url}: {e}")
-            return ""
+        if not self._respect_robots_txt(url):
+            logger.warning(f"URL disallowed by robots.txt: {url}")
+            return None
+        
+        self._rate_limit_request(url)
+        
+        return self._get(url, headers=self.conditional_headers(url, source_id))
 
-    def extract_legal_metadata(self, html, url, source_id):
+    def conditional_headers(self, url, source_id):
         """
-        Extract relevant metadata from legal documents
+        Build conditional request headers for a previously scraped document
+        
+        Headers are only sent while the saved copy is still in the corpus store,
+        so a 304 never leaves us without the document.
         
         Args:
-            html (str): HTML content
-            url (str): Source URL
+            url (str): URL of the document
             source_id (str): Identifier for the legal source
             
         Returns:
-            dict: Extracted metadata
+            dict: Request headers
         """
-        metadata = {
-            'url': url,
-            'source_id': source_id,
-            'title': '',
-            'date': '',
-            'document_type': '',
-            'citation': '',
-            'scraped_at': datetime.datetime.now().isoformat()
-        }
-        
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Extract title - look for the most prominent heading
-        for heading in ['h1', 'h2', 'title']:
-            if soup.find(heading):
-                title_text = soup.find(heading).get_text().strip()
-                if title_text:
-                    metadata['title'] = title_text
-                    break
-        
-        # Source-specific extraction logic
-        if source_id == 'justice-laws':
-            # Look for act title
-            act_title = soup.find('span', class_='Title')
-            if act_title:
-                metadata['title'] = act_title.get_text().strip()
-                
-            # Look for date
-            date_span = soup.find('span', class_='CurrentToDate')
-            if date_span:
-                date_text = date_span.get_text().strip()
-                date_match = re.search(r'\d{4}-\d{2}-\d{2}', date_text)
-                if date_match:
-                    metadata['date'] = date_match.group(0)
+        if not self.store.contains(source_id, self._document_key(url)):
+            return {}
+        return self.get_manifest(source_id).conditional_headers(url)
+
+    def _get(self, url, headers=None):
+        """
+        Perform the HTTP GET for a page without robots.txt or rate limit checks
         
-        elif source_id == 'scc':
-            # Look for judgment title
-            judgment_title = soup.find('h1', class_='judgmentTitle')
-            if judgment_title:
-                metadata['title'] = judgment_title.get_text().strip()
-                
-            # Look for citation
-            citation = soup.find('div', class_='citation')
-            if citation:
-                metadata['citation'] = citation.get_text().strip()
-                
-            # Look for date
-            date_div = soup.find('div', class_='dateDecision')
-            if date_div:
-                date_text = date_div.get_text().strip()
-                date_match = re.search(r'\d{4}-\d{2}-\d{2}', date_text)
-                if date_match:
-                    metadata['date'] = date_match.group(0)
-        
-        # If no specific date found, try to find a date pattern in the HTML
-        if not metadata['date']:
-            # Look for dates in common formats
-            date_patterns = [
-                r'\d{4}-\d{2}-\d{2}',  # ISO format
-                r'\d{2}/\d{2}/\d{4}',  # MM/DD/YYYY
-                r'[A-Z][a-z]{2,8} \d{1,2}, \d{4}'  # Month Day, Year
-            ]
+        Args:
+            url (str): URL to fetch
+            headers (dict): Extra request headers
             
-            for pattern in date_patterns:
-                matches = re.search(pattern, html)
-                if matches:
-                    metadata['date'] = matches.group(0)
-                    break
-        
-        return metadata
+        Returns:
+            requests.Response or None: Response, or None on error
+        """
+        try:
+            response = self.session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching {url}: {e}")
+            return None
+
+    def extract_text_content(self, html, url=""):
+        """
+        Extract cleaned text content from HTML (see module-level extract_text_content)
+        """
+        return extract_text_content(html, url)
+
+    def extract_legal_metadata(self, html, url, source_id):
+        """
+        Extract relevant metadata from legal documents (see module-level extract_legal_metadata)
+        """
+        return extract_legal_metadata(html, url, source_id)
 
     def save_document(self, content, metadata, source_id):
         """
@@ -794,28 +987,79 @@ class LegalDataScraper:
             source_id (str): Identifier for the legal source
             
         Returns:
-            str: Path to saved document
+            str: Document key (URL hash) the document was stored under
         """
-        # Create a unique identifier based on URL
-        url_hash = hashlib.md5(metadata['url'].encode()).hexdigest()
+        return self.save_documents([(content, metadata, source_id)])[0]
+
+    def save_documents(self, documents):
+        """
+        Save a batch of scraped documents
+        
+        The corpus store, catalog and search index are each written once for
+        the whole batch. A document whose text is a near-duplicate of one
+        already saved (typically the same statute or decision published by
+        another source) gets a ``duplicate_of`` entry in its metadata naming
+        the first copy, so search results can show the text once.
+        
+        Args:
+            documents (list): (content, metadata, source_id) tuples
+            
+        Returns:
+            list: Document keys (URL hashes), in input order
+        """
+        entries = [
+            (source_id, self._document_key(metadata['url']), metadata, content)
+            for content, metadata, source_id in documents
+        ]
+        
+        # Cluster near-duplicates
+        try:
+            clusters = self.fingerprints.assign_documents(
+                [(source_id, doc_key, content) for source_id, doc_key, _, content in entries]
+            )
+        except Exception as e:
+            logger.error(f"Error fingerprinting {len(entries)} documents: {e}")
+            clusters = [(source_id, doc_key) for source_id, doc_key, _, _ in entries]
+        
+        for (source_id, doc_key, metadata, _), cluster in zip(entries, clusters):
+            if cluster != (source_id, doc_key):
+                metadata['duplicate_of'] = {'source_id': cluster[0], 'doc_key': cluster[1]}
+                logger.info(f"Document {metadata['url']} is a near-duplicate of {cluster[0]}/{cluster[1]}")
+            else:
+                metadata.pop('duplicate_of', None)
         
-        # Create source directory if it doesn't exist
-        source_dir = os.path.join(self.data_dir, source_id)
-        os.makedirs(source_dir, exist_ok=True)
+        # Append content and metadata to the corpus store
+        self.store.put_many(entries)
         
-        # Prepare filenames
-        content_file = os.path.join(source_dir, f"{url_hash}.txt")
-        metadata_file = os.path.join(source_dir, f"{url_hash}.json")
+        # Update the metadata catalog
+        try:
+            self.catalog.record_documents(
+                [(doc_key, source_id, metadata) for source_id, doc_key, metadata, _ in entries]
+            )
+        except Exception as e:
+            logger.error(f"Error cataloguing {len(entries)} documents: {e}")
         
-        # Save content
-        with open(content_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Update the search index
+        try:
+            self.search_index.add_documents(
+                [(doc_key, source_id, metadata, content) for source_id, doc_key, metadata, content in entries]
+            )
+        except Exception as e:
+            logger.error(f"Error indexing {len(entries)} documents: {e}")
         
-        # Save metadata
-        with open(metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2)
+        return [doc_key for _, doc_key, _, _ in entries]
+
+    def _document_key(self, url):
+        """
+        Get the unique identifier a document is stored under
         
-        return content_file
+        Args:
+            url (str): URL of the document
+            
+        Returns:
+            str: MD5 hash of the URL
+        """
+        return hashlib.md5(url.encode()).hexdigest()
 
     def process_document(self, url, source_id):
         """
@@ -830,21 +1074,116 @@ class LegalDataScraper:
         """
         try:
             logger.info(f"Processing document: {url}")
+            self.frontier.mark_in_flight(source_id, url)
             
             # Fetch page
-            html = self.fetch_page(url)
-            if not html:
+            response = self.fetch_document(url, source_id)
+            if response is None:
                 logger.warning(f"Failed to fetch document: {url}")
                 return None
             
-            # Extract content
-            content = self.extract_text_content(html, url)
-            if not content:
+            metadata = self.process_response(response, url, source_id)
+            self.frontier.mark_done(source_id, url)
+            return metadata
+            
+        except Exception as e:
+            logger.error(f"Error processing document {url}: {e}")
+            return None
+
+    def process_response(self, response, url, source_id):
+        """
+        Process a fetched document unless the server or its digest says it is unchanged
+        
+        Unchanged documents (304 Not Modified, or a body whose digest matches the
+        crawl manifest) skip extraction and the disk write.
+        
+        Args:
+            response (requests.Response): Response from fetch_document
+            url (str): URL of the document
+            source_id (str): Identifier for the legal source
+            
+        Returns:
+            dict or None: Metadata of a new or changed document, None otherwise
+        """
+        status, digest = self.detect_change(response, url, source_id)
+        if status == 'unchanged':
+            return None
+        
+        metadata = self.process_html(response.text, url, source_id)
+        if metadata:
+            self.record_fetch(response, url, source_id, status, digest)
+        return metadata
+
+    def detect_change(self, response, url, source_id):
+        """
+        Classify a fetched document against the crawl manifest
+        
+        Unchanged documents are recorded in the manifest and counted here; new
+        and changed ones are recorded by record_fetch once they are saved.
+        
+        Args:
+            response (requests.Response): Response from fetch_document
+            url (str): URL of the document
+            source_id (str): Identifier for the legal source
+            
+        Returns:
+            tuple: (status, digest) where status is 'new', 'changed' or 'unchanged'
+        """
+        manifest = self.get_manifest(source_id)
+        
+        if response.status_code == 304:
+            manifest.record(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            self._count_change('unchanged')
+            logger.info(f"Document not modified: {url}")
+            return 'unchanged', None
+        
+        digest = content_digest(response.content)
+        entry = manifest.get(url)
+        stored = self.store.contains(source_id, self._document_key(url))
+        
+        if entry and entry.get('content_hash') == digest and stored:
+            self.record_fetch(response, url, source_id, 'unchanged', digest)
+            logger.info(f"Document content unchanged: {url}")
+            return 'unchanged', digest
+        
+        return ('changed' if entry else 'new'), digest
+
+    def record_fetch(self, response, url, source_id, status, digest):
+        """
+        Store a document's validators and digest in the manifest and count it
+        
+        Args:
+            response (requests.Response): Response the document came from
+            url (str): URL of the document
+            source_id (str): Identifier for the legal source
+            status (str): 'new', 'changed' or 'unchanged'
+            digest (str): Body digest
+        """
+        self.get_manifest(source_id).record(
+            url, response.headers.get('ETag'), response.headers.get('Last-Modified'), digest
+        )
+        self._count_change(status)
+
+    def process_html(self, html, url, source_id):
+        """
+        Extract content and metadata from a fetched document and save it
+        
+        Args:
+            html (str): HTML content of the document
+            url (str): URL of the document
+            source_id (str): Identifier for the legal source
+            
+        Returns:
+            dict or None: Document metadata if successful, None otherwise
+        """
+        try:
+            # Extract content and metadata
+            extracted, cpu_seconds = timed_extract_document(html, url, source_id)
+            self.count_extract_cpu(cpu_seconds)
+            if not extracted:
                 logger.warning(f"Failed to extract content from document: {url}")
                 return None
-            
-            # Extract metadata
-            metadata = self.extract_legal_metadata(html, url, source_id)
+            content, metadata = extracted
             
             # Save document
             self.save_document(content, metadata, source_id)
@@ -866,14 +1205,8 @@ class LegalDataScraper:
         Returns:
             list: List of document URLs
         """
-        source = LEGAL_SOURCES.get(source_id)
-        if not source:
-            logger.error(f"Unknown source: {source_id}")
-            return []
-        
-        recent_url = source.get('recent_url')
+        recent_url = self.get_recent_url(source_id)
         if not recent_url:
-            logger.error(f"No recent URL defined for source: {source_id}")
             return []
         
         # Fetch recent page
@@ -882,6 +1215,61 @@ class LegalDataScraper:
             logger.warning(f"Failed to fetch recent page for {source_id}: {recent_url}")
             return []
         
+        return self.parse_document_links(html, recent_url, source_id)
+
+    def plan_source(self, source_id):
+        """
+        Get the document URLs to crawl for a source, resuming an interrupted pass if there is one
+        
+        Args:
+            source_id (str): Identifier for the legal source
+            
+        Returns:
+            list: Document URLs that still need processing
+        """
+        remaining = self.frontier.resume(source_id)
+        if remaining is not None:
+            logger.info(f"Resuming interrupted scrape of {source_id}: {len(remaining)} documents left")
+            return remaining
+        
+        document_urls = self.discover_recent_documents(source_id)
+        self.frontier.discover(source_id, document_urls)
+        return document_urls
+
+    def get_recent_url(self, source_id):
+        """
+        Look up the "recent documents" listing URL for a legal source
+        
+        Args:
+            source_id (str): Identifier for the legal source
+            
+        Returns:
+            str or None: Listing URL, or None if the source is unknown
+        """
+        source = self.sources.get(source_id)
+        if not source:
+            logger.error(f"Unknown source: {source_id}")
+            return None
+        
+        recent_url = source.get('recent_url')
+        if not recent_url:
+            logger.error(f"No recent URL defined for source: {source_id}")
+            return None
+        
+        return recent_url
+
+    def parse_document_links(self, html, recent_url, source_id):
+        """
+        Parse document URLs out of a source's "recent documents" listing page
+        
+        Args:
+            html (str): HTML content of the listing page
+            recent_url (str): URL of the listing page
+            source_id (str): Identifier for the legal source
+            
+        Returns:
+            list: List of document URLs
+        """
         # Parse URLs
         soup = BeautifulSoup(html, 'html.parser')
         document_urls = []
@@ -949,33 +1337,49 @@ class LegalDataScraper:
         """
         logger.info(f"Scraping source: {source_id}")
         
-        if source_id not in LEGAL_SOURCES:
+        if source_id not in self.sources:
             logger.error(f"Unknown source: {source_id}")
             return []
         
-        # Discover recent document URLs
-        document_urls = self.discover_recent_documents(source_id)
+        # Discover recent document URLs, or pick up an interrupted pass
+        document_urls = self.plan_source(source_id)
         
         # Process each document
         results = []
-        for url in document_urls:
-            metadata = self.process_document(url, source_id)
-            if metadata:
-                results.append(metadata)
+        try:
+            for url in document_urls:
+                metadata = self.process_document(url, source_id)
+                if metadata:
+                    results.append(metadata)
+            self.frontier.complete(source_id)
+        finally:
+            self.get_manifest(source_id).save()
                 
         logger.info(f"Scraped {len(results)} documents from {source_id}")
         return results
 
-    def scrape_all_sources(self):
+    def scrape_all_sources(self, concurrent=False, max_connections=MAX_CONNECTIONS):
         """
         Scrape recent documents from all configured legal sources
         
+        Args:
+            concurrent (bool): Crawl sources in parallel with per-domain rate limiting
+            max_connections (int): Global cap on in-flight requests in concurrent mode
+            
         Returns:
             dict: Results organized by source
         """
+        if concurrent:
+            from utils.crawl_engine import CrawlEngine
+            
+            engine = CrawlEngine(self, max_connections=max_connections)
+            results = engine.run(list(self.sources))
+            self.pipeline_stats = engine.stage_report()
+            return results
+        
         results = {}
         
-        for source_id in LEGAL_SOURCES:
+        for source_id in self.sources:
             try:
                 source_results = self.scrape_source(source_id)
                 results[source_id] = source_results
@@ -985,19 +1389,25 @@ class LegalDataScraper:
         
         return results
 
-    def run_scheduled_scrape(self):
+    def run_scheduled_scrape(self, concurrent=True):
         """
         Run a scheduled scrape of all sources and report results
         
+        Args:
+            concurrent (bool): Crawl sources in parallel (see scrape_all_sources)
+            
         Returns:
             dict: Summary of scraping results
         """
         start_time = time.time()
         
         logger.info("Starting scheduled legal data scrape")
+        self.change_counts.clear()
+        self.extract_cpu_seconds = 0.0
+        self.pipeline_stats = {}
         
         # Run the scrape
-        results = self.scrape_all_sources()
+        results = self.scrape_all_sources(concurrent=concurrent)
         
         # Calculate summary
         total_documents = sum(len(docs) for docs in results.values())
@@ -1013,11 +1423,19 @@ class LegalDataScraper:
             'duration_seconds': duration_seconds,
             'total_documents': total_documents,
             'sources_scraped': sources_scraped,
-            'documents_by_source': documents_by_source
+            'documents_by_source': documents_by_source,
+            'new_documents': self.change_counts['new'],
+            'changed_documents': self.change_counts['changed'],
+            'unchanged_documents': self.change_counts['unchanged'],
+            'extract_cpu_seconds': round(self.extract_cpu_seconds, 3)
         }
+        if self.pipeline_stats:
+            summary['pipeline_stats'] = self.pipeline_stats
         
         logger.info(f"Scheduled scrape completed in {duration_seconds:.2f} seconds")
-        logger.info(f"Scraped {total_documents} documents from {sources_scraped} sources")
+        logger.info(f"Scraped {total_documents} documents from {sources_scraped} sources "
+                    f"({summary['new_documents']} new, {summary['changed_documents']} changed, "
+                    f"{summary['unchanged_documents']} unchanged)")
         
         return summary
 
@@ -1034,13 +1452,15 @@ class LegalDataScraper:
         start_time = time.time()
         
         logger.info(f"Starting targeted scrape of sources: {', '.join(source_ids)}")
+        self.change_counts.clear()
+        self.extract_cpu_seconds = 0.0
         
         results = {}
         
         for source_id in source_ids:
-            if source_id in LEGAL_SOURCES:
+            if source_id in self.sources:
                 try:
-                    logger.info(f"Scraping {LEGAL_SOURCES[source_id]['name']}")
+                    logger.info(f"Scraping {self.sources[source_id]['name']}")
                     documents = self.scrape_source(source_id)
                     results[source_id] = documents
                     logger.info(f"Scraped {len(documents)} documents from {source_id}")
@@ -1066,6 +1486,10 @@ class LegalDataScraper:
             'total_documents': total_documents,
             'sources_scraped': sources_scraped,
             'documents_by_source': documents_by_source,
+            'new_documents': self.change_counts['new'],
+            'changed_documents': self.change_counts['changed'],
+            'unchanged_documents': self.change_counts['unchanged'],
+            'extract_cpu_seconds': round(self.extract_cpu_seconds, 3),
             'targeted_sources': source_ids
         }
         
@@ -1093,43 +1517,51 @@ def run_one_time_scrape():
             print(f"  {LEGAL_SOURCES[source_id]['name']}: {count} documents")
 
 
-def find_documents_by_keyword(keyword, data_dir="data/legal_source_data", max_results=10):
+def find_documents_by_keyword(keyword, data_dir="data/legal_source_data", max_results=10, source_id=None):
     """
-    Search for documents containing a specific keyword
+    Search for documents matching a query, ranked by relevance
+    
+    Answers from the persistent BM25 search index. Multiple terms are all
+    required and "quoted text" is matched as a phrase.
     
     Args:
-        keyword (str): Keyword to search for
+        keyword (str): Search query
         data_dir (str): Directory containing scraped documents
         max_results (int): Maximum number of results to return
+        source_id (str): Restrict results to one legal source
         
     Returns:
         list: List of matching documents with metadata
     """
+    try:
+        return get_search_index(data_dir).search(keyword, max_results, source_id)
+    except sqlite3.Error as e:
+        logger.error(f"Search index unavailable, scanning corpus instead: {e}")
+    
+    return _scan_documents_by_keyword(keyword, data_dir, max_results, source_id)
+
+
+def _scan_documents_by_keyword(keyword, data_dir, max_results, source_id=None):
+    """
+    Search documents by substring scan, used when the search index is unavailable
+    """
     results = []
+    seen_clusters = set()
     keyword = keyword.lower()
     
-    # Recursively find all .txt files
-    for txt_file in Path(data_dir).glob('**/*.txt'):
+    # Read the corpus store sequentially
+    for doc_source_id, doc_key, metadata, content in get_corpus_store(data_dir).iter_documents(source_id):
         # Check if we've reached the maximum results
         if len(results) >= max_results:
             break
             
-        # Get corresponding metadata file
-        metadata_file = txt_file.with_suffix('.json')
-        if not metadata_file.exists():
-            continue
-            
         try:
-            # Load metadata
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                metadata = json.load(f)
-                
-            # Load content
-            with open(txt_file, 'r', encoding='utf-8') as f:
-                content = f.read().lower()
+            content = content.lower()
                 
-            # Check if keyword is in content
-            if keyword in content:
+            # Check if keyword is in content, showing each near-duplicate cluster once
+            cluster = cluster_key(doc_source_id, doc_key, metadata)
+            if keyword in content and cluster not in seen_clusters:
+                seen_clusters.add(cluster)
                 # Get a snippet around the keyword
                 snippet = get_text_snippet(content, keyword)
                 
@@ -1144,7 +1576,7 @@ def find_documents_by_keyword(keyword, data_dir="data/legal_source_data", max_re
                 results.append(result)
                 
         except Exception as e:
-            logger.error(f"Error searching document {txt_file}: {e}")
+            logger.error(f"Error searching document {doc_source_id}/{doc_key}: {e}")
     
     return results
 
@@ -1189,6 +1621,9 @@ def analyze_source_updates(data_dir="data/legal_source_data", days=7):
     """
     Analyze recent updates from legal sources
     
+    Answers from the metadata catalog's indexes rather than reading every
+    JSON sidecar.
+    
     Args:
         data_dir (str): Directory containing scraped documents
         days (int): Number of days to look back
@@ -1196,61 +1631,29 @@ def analyze_source_updates(data_dir="data/legal_source_data", days=7):
     Returns:
         dict: Analysis of recent updates by source
     """
-    analysis = {}
-    now = datetime.datetime.now()
-    cutoff_date = now - datetime.timedelta(days=days)
-    
     # Check if data directory exists
     if not os.path.exists(data_dir):
-        return {source_id: {'documents': []} for source_id in LEGAL_SOURCES}
+        return {source_id: {'documents': [], 'recent_count': 0} for source_id in LEGAL_SOURCES}
+    
+    cutoff_date = datetime.datetime.now() - datetime.timedelta(days=days)
+    
+    catalog = get_catalog(data_dir)
+    recent = catalog.recent_documents(cutoff_date, per_source=5)
+    recent_counts = catalog.source_counts(since=cutoff_date)
     
-    # Process each source
+    analysis = {}
     for source_id in LEGAL_SOURCES:
-        source_dir = os.path.join(data_dir, source_id)
-        if not os.path.exists(source_dir):
-            analysis[source_id] = {
-                'documents': []
-            }
-            continue
-            
-        # Get all metadata files
-        metadata_files = list(Path(source_dir).glob('*.json'))
-        
-        # Parse metadata files
-        documents = []
-        
-        for metadata_file in metadata_files:
-            try:
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                    
-                # Get and parse scraped_at datetime
-                scraped_at = metadata.get('scraped_at')
-                if scraped_at:
-                    try:
-                        scraped_dt = datetime.datetime.fromisoformat(scraped_at)
-                        
-                        # Add to documents if within cutoff
-                        if scraped_dt >= cutoff_date:
-                            documents.append({
-                                'title': metadata.get('title', 'Untitled'),
-                                'date': metadata.get('date', 'Unknown'),
-                                'url': metadata.get('url', ''),
-                                'description': metadata.get('document_type', '')
-                            })
-                    except (ValueError, TypeError):
-                        pass
-                        
-            except Exception as e:
-                logger.error(f"Error analyzing metadata file {metadata_file}: {e}")
-        
-        
-        # Sort documents by date (newest first)
-        documents.sort(key=lambda x: x.get('date', ''), reverse=True)
-        
-        # Store results
         analysis[source_id] = {
-            'documents': documents[:5]  # Limit to 5 most recent
+            'documents': [
+                {
+                    'title': metadata.get('title', 'Untitled'),
+                    'date': metadata.get('date', 'Unknown'),
+                    'url': metadata.get('url', ''),
+                    'description': metadata.get('document_type', '')
+                }
+                for metadata in recent.get(source_id, [])
+            ],
+            'recent_count': recent_counts.get(source_id, 0)
         }
     
-    return analysis
\ No newline at end of file
+    return analysis
@@ -0,0 +1,287 @@
+"""
+Near-Duplicate Detection for SmartDispute.ai
+
+The same statute or decision is often published by several LEGAL_SOURCES
+(justice-laws, CanLII, provincial mirrors). Each saved document gets a MinHash
+signature over its word 5-shingles, and the signatures are banded into a
+locality-sensitive hash (LSH) table stored in SQLite next to the corpus store.
+Looking a new document up costs one indexed query per band instead of a
+comparison against every stored document.
+
+Documents whose estimated Jaccard similarity reaches DUPLICATE_THRESHOLD join the
+cluster of the earliest copy. LegalDataScraper.save_documents records the
+cluster's first member in the document metadata as ``duplicate_of``, and the
+search index uses it to return each cluster once.
+
+Signatures use one-permutation hashing: every shingle is hashed once and the
+hash picks the signature slot it competes for, so building a signature is
+linear in the document length.
+"""
+
+import os
+import re
+import struct
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from utils.legal_corpus_store import get_corpus_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_FILE = 'fingerprints.sqlite3'
+
+SHINGLE_WORDS = 5
+SIGNATURE_SIZE = 128
+LSH_BANDS = 16
+LSH_ROWS = SIGNATURE_SIZE // LSH_BANDS
+
+# Estimated Jaccard similarity at which two documents count as the same text.
+# With 16 bands of 8 rows, pairs at this similarity share at least one bucket
+# with probability 0.95, and pairs below 0.5 rarely become candidates at all.
+DUPLICATE_THRESHOLD = 0.8
+
+EMPTY_SLOT = 2 ** 64 - 1
+
+_SIGNATURE = struct.Struct(f'>{SIGNATURE_SIZE}Q')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    source_id TEXT NOT NULL,
+    doc_key TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    cluster_source_id TEXT NOT NULL,
+    cluster_doc_key TEXT NOT NULL,
+    PRIMARY KEY (source_id, doc_key)
+);
+CREATE TABLE IF NOT EXISTS lsh_buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    source_id TEXT NOT NULL,
+    doc_key TEXT NOT NULL,
+    PRIMARY KEY (band, bucket, source_id, doc_key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_lsh_buckets_doc ON lsh_buckets (source_id, doc_key);
+"""
+
+_build_lock = threading.Lock()
+
+
+def _hash64(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+
+
+def minhash_signature(text):
+    """
+    Compute the MinHash signature of a document's text
+
+    Args:
+        text (str): Document text
+
+    Returns:
+        tuple: SIGNATURE_SIZE 64-bit slot values (EMPTY_SLOT where no shingle landed)
+    """
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < SHINGLE_WORDS:
+        shingles = {' '.join(words)}
+    else:
+        shingles = {' '.join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+    slots = [EMPTY_SLOT] * SIGNATURE_SIZE
+    for shingle in shingles:
+        value = _hash64(shingle.encode('utf-8'))
+        slot = value % SIGNATURE_SIZE
+        if value < slots[slot]:
+            slots[slot] = value
+    return tuple(slots)
+
+
+def estimate_similarity(signature_a, signature_b):
+    """
+    Estimate the Jaccard similarity of two documents' shingle sets
+
+    Args:
+        signature_a (tuple): Signature from minhash_signature
+        signature_b (tuple): Signature from minhash_signature
+
+    Returns:
+        float: Similarity between 0.0 and 1.0
+    """
+    filled = 0
+    matches = 0
+    for a, b in zip(signature_a, signature_b):
+        if a == EMPTY_SLOT and b == EMPTY_SLOT:
+            continue
+        filled += 1
+        if a == b:
+            matches += 1
+    return matches / filled if filled else 0.0
+
+
+def lsh_buckets(signature):
+    """
+    Split a signature into LSH bands and hash each band to a bucket
+
+    Bands in which no shingle landed are skipped so short documents do not all
+    collide on their empty slots.
+
+    Returns:
+        list: (band, bucket) pairs
+    """
+    buckets = []
+    for band in range(LSH_BANDS):
+        rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+        if all(row == EMPTY_SLOT for row in rows):
+            continue
+        bucket = _hash64(struct.pack(f'>{LSH_ROWS}Q', *rows))
+        # SQLite integers are signed 64-bit
+        buckets.append((band, bucket - 2 ** 63))
+    return buckets
+
+
+class LegalFingerprintIndex:
+    """
+    LSH index of MinHash signatures that groups near-duplicate documents into clusters
+    """
+
+    def __init__(self, data_dir):
+        """
+        Open (creating if needed) the fingerprint index stored in data_dir
+
+        Args:
+            data_dir (str): Directory containing scraped documents
+        """
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, FINGERPRINT_FILE)
+        os.makedirs(data_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def assign_documents(self, documents):
+        """
+        Fingerprint a batch of documents and place each in a near-duplicate cluster
+
+        Documents are assigned in order within one transaction, so a batch that
+        contains two copies of the same text clusters them together.
+
+        Args:
+            documents (list): (source_id, doc_key, content) tuples
+
+        Returns:
+            list: (source_id, doc_key) of each document's cluster, in input order;
+                a document that starts its own cluster gets its own key
+        """
+        with self._connect() as conn:
+            return [self._assign(conn, source_id, doc_key, content)
+                    for source_id, doc_key, content in documents]
+
+    def _assign(self, conn, source_id, doc_key, content):
+        signature = minhash_signature(content)
+        buckets = lsh_buckets(signature)
+
+        conn.execute('DELETE FROM lsh_buckets WHERE source_id = ? AND doc_key = ?', (source_id, doc_key))
+        cluster = self._best_match(conn, source_id, doc_key, signature, buckets) or (source_id, doc_key)
+
+        conn.execute(
+            'INSERT OR REPLACE INTO fingerprints '
+            '(source_id, doc_key, signature, cluster_source_id, cluster_doc_key) VALUES (?, ?, ?, ?, ?)',
+            (source_id, doc_key, _SIGNATURE.pack(*signature), cluster[0], cluster[1])
+        )
+        conn.executemany(
+            'INSERT OR IGNORE INTO lsh_buckets (band, bucket, source_id, doc_key) VALUES (?, ?, ?, ?)',
+            [(band, bucket, source_id, doc_key) for band, bucket in buckets]
+        )
+        return cluster
+
+    def _best_match(self, conn, source_id, doc_key, signature, buckets):
+        if not buckets:
+            return None
+
+        placeholders = ' OR '.join('(band = ? AND bucket = ?)' for _ in buckets)
+        params = [value for pair in buckets for value in pair]
+        candidates = conn.execute(
+            'SELECT f.source_id, f.doc_key, f.signature, f.cluster_source_id, f.cluster_doc_key '
+            'FROM fingerprints f JOIN ('
+            f'  SELECT DISTINCT source_id, doc_key FROM lsh_buckets WHERE {placeholders}'
+            ') c ON c.source_id = f.source_id AND c.doc_key = f.doc_key',
+            params
+        ).fetchall()
+
+        best = None
+        best_similarity = DUPLICATE_THRESHOLD
+        for cand_source_id, cand_doc_key, blob, cluster_source_id, cluster_doc_key in candidates:
+            if (cand_source_id, cand_doc_key) == (source_id, doc_key):
+                continue
+            # Never join a cluster this document leads; that would make it point at itself
+            if (cluster_source_id, cluster_doc_key) == (source_id, doc_key):
+                continue
+            similarity = estimate_similarity(signature, _SIGNATURE.unpack(blob))
+            if similarity >= best_similarity:
+                best = (cluster_source_id, cluster_doc_key)
+                best_similarity = similarity
+        return best
+
+    def clusters(self):
+        """
+        Map every fingerprinted document to its cluster
+
+        Returns:
+            dict: (source_id, doc_key) -> (cluster source_id, cluster doc_key)
+        """
+        with self._connect() as conn:
+            return {
+                (source_id, doc_key): (cluster_source_id, cluster_doc_key)
+                for source_id, doc_key, cluster_source_id, cluster_doc_key in conn.execute(
+                    'SELECT source_id, doc_key, cluster_source_id, cluster_doc_key FROM fingerprints'
+                )
+            }
+
+    def duplicate_count(self):
+        """Return the number of documents that are near-duplicates of another document."""
+        with self._connect() as conn:
+            return conn.execute(
+                'SELECT COUNT(*) FROM fingerprints '
+                'WHERE source_id != cluster_source_id OR doc_key != cluster_doc_key'
+            ).fetchone()[0]
+
+    def rebuild(self):
+        """
+        Rebuild the fingerprints from the corpus store in data_dir
+
+        Returns:
+            int: Number of documents fingerprinted
+        """
+        count = 0
+        with self._connect() as conn:
+            conn.execute('DELETE FROM fingerprints')
+            conn.execute('DELETE FROM lsh_buckets')
+            for source_id, doc_key, _, content in get_corpus_store(self.data_dir).iter_documents():
+                self._assign(conn, source_id, doc_key, content)
+                count += 1
+        logger.info(f"Fingerprinted {count} documents ({self.duplicate_count()} near-duplicates)")
+        return count
+
+
+def get_fingerprint_index(data_dir):
+    """
+    Open the fingerprint index for data_dir, building it from the corpus store on first use
+
+    Args:
+        data_dir (str): Directory containing scraped documents
+
+    Returns:
+        LegalFingerprintIndex: The index
+    """
+    with _build_lock:
+        needs_build = not os.path.exists(os.path.join(data_dir, FINGERPRINT_FILE))
+        index = LegalFingerprintIndex(data_dir)
+        if needs_build:
+            index.rebuild()
+    return index
@@ -0,0 +1,269 @@
+"""
+Legal Search Index for SmartDispute.ai
+
+Persistent full-text index over the scraped legal corpus. Documents are stored in
+an SQLite FTS5 inverted index next to the corpus store, kept up to date
+incrementally by LegalDataScraper.save_document, and queried with BM25 ranking.
+Near-duplicate copies of a document (see utils/legal_fingerprints.py) share a
+cluster and are returned once, with the other copies listed under
+``duplicates``.
+
+Query syntax:
+- Bare words are ANDed together: ``tenant eviction``
+- Double-quoted text is matched as a phrase: ``"notice of termination" tenant``
+"""
+
+import os
+import re
+import json
+import sqlite3
+import logging
+import threading
+
+from utils.legal_corpus_store import get_corpus_store
+from utils.legal_fingerprints import get_fingerprint_index
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_FILE = 'search_index.sqlite3'
+
+# BM25 column weights: a hit in the title counts five times a hit in the body
+TITLE_WEIGHT = 5.0
+CONTENT_WEIGHT = 1.0
+
+SNIPPET_TOKENS = 32
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    doc_key TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    url TEXT,
+    title TEXT,
+    date TEXT,
+    cluster TEXT,
+    UNIQUE (source_id, doc_key)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+    title, content, tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+_build_lock = threading.Lock()
+
+
+def build_match_query(query):
+    """
+    Translate a user query into an FTS5 MATCH expression
+
+    Every term is quoted so user input can never be parsed as FTS5 operators.
+
+    Args:
+        query (str): Raw search query
+
+    Returns:
+        str: MATCH expression, or an empty string if the query has no terms
+    """
+    parts = []
+    for phrase in re.findall(r'"([^"]*)"', query):
+        words = re.findall(r'\w+', phrase)
+        if words:
+            parts.append('"' + ' '.join(words) + '"')
+
+    remainder = re.sub(r'"[^"]*"?', ' ', query)
+    parts.extend(f'"{word}"' for word in re.findall(r'\w+', remainder))
+
+    return ' '.join(parts)
+
+
+def cluster_key(source_id, doc_key, metadata=None):
+    """
+    Get the search cluster a document belongs to
+
+    Args:
+        source_id (str): Identifier for the legal source
+        doc_key (str): Stable document identifier (the URL hash)
+        metadata (dict): Document metadata; its ``duplicate_of`` entry names the cluster
+
+    Returns:
+        str: "<source_id>/<doc_key>" of the cluster's first document
+    """
+    duplicate_of = (metadata or {}).get('duplicate_of')
+    if duplicate_of:
+        return f"{duplicate_of['source_id']}/{duplicate_of['doc_key']}"
+    return f"{source_id}/{doc_key}"
+
+
+class LegalSearchIndex:
+    """
+    BM25-ranked inverted index over scraped legal documents
+    """
+
+    def __init__(self, data_dir):
+        """
+        Open (creating if needed) the index stored in data_dir
+
+        Args:
+            data_dir (str): Directory containing scraped documents
+        """
+        self.data_dir = data_dir
+        self.path = os.path.join(data_dir, SEARCH_INDEX_FILE)
+        os.makedirs(data_dir, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(docs)')]
+            # Indexes built before near-duplicate clustering need the column and a rebuild
+            self.needs_rebuild = 'cluster' not in columns
+            if self.needs_rebuild:
+                conn.execute('ALTER TABLE docs ADD COLUMN cluster TEXT')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def add_document(self, doc_key, source_id, metadata, content):
+        """
+        Add a document to the index, replacing any previous version
+
+        Args:
+            doc_key (str): Stable document identifier (the URL hash)
+            source_id (str): Identifier for the legal source
+            metadata (dict): Document metadata
+            content (str): Extracted document text
+        """
+        with self._connect() as conn:
+            self._upsert(conn, doc_key, source_id, metadata, content)
+
+    def add_documents(self, documents):
+        """
+        Add a batch of documents to the index in one transaction
+
+        Args:
+            documents (list): (doc_key, source_id, metadata, content) tuples
+        """
+        with self._connect() as conn:
+            for doc_key, source_id, metadata, content in documents:
+                self._upsert(conn, doc_key, source_id, metadata, content)
+
+    def _upsert(self, conn, doc_key, source_id, metadata, content, cluster=None):
+        title = metadata.get('title', '')
+        cluster = cluster or cluster_key(source_id, doc_key, metadata)
+        row = conn.execute('SELECT id FROM docs WHERE source_id = ? AND doc_key = ?',
+                           (source_id, doc_key)).fetchone()
+        if row:
+            doc_id = row[0]
+            conn.execute('DELETE FROM docs_fts WHERE rowid = ?', (doc_id,))
+            conn.execute(
+                'UPDATE docs SET source_id = ?, url = ?, title = ?, date = ?, cluster = ? WHERE id = ?',
+                (source_id, metadata.get('url', ''), title, metadata.get('date', ''), cluster, doc_id)
+            )
+        else:
+            cursor = conn.execute(
+                'INSERT INTO docs (doc_key, source_id, url, title, date, cluster) VALUES (?, ?, ?, ?, ?, ?)',
+                (doc_key, source_id, metadata.get('url', ''), title, metadata.get('date', ''), cluster)
+            )
+            doc_id = cursor.lastrowid
+        conn.execute('INSERT INTO docs_fts (rowid, title, content) VALUES (?, ?, ?)',
+                     (doc_id, title, content))
+
+    def document_count(self):
+        """Return the number of indexed documents."""
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    def rebuild(self):
+        """
+        Rebuild the index from the corpus store in data_dir
+
+        Returns:
+            int: Number of documents indexed
+        """
+        count = 0
+        clusters = get_fingerprint_index(self.data_dir).clusters()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM docs')
+            conn.execute('DELETE FROM docs_fts')
+            for source_id, doc_key, metadata, content in get_corpus_store(self.data_dir).iter_documents():
+                cluster = clusters.get((source_id, doc_key), (source_id, doc_key))
+                self._upsert(conn, doc_key, source_id, metadata, content, '/'.join(cluster))
+                count += 1
+        logger.info(f"Rebuilt legal search index with {count} documents")
+        return count
+
+    def search(self, query, max_results=10, source_id=None):
+        """
+        Search the index, returning each cluster of near-duplicates once
+
+        Args:
+            query (str): Search query (terms and "quoted phrases")
+            max_results (int): Maximum number of results to return
+            source_id (str): Restrict results to one legal source
+
+        Returns:
+            list: Matching documents with metadata, BM25 score, highlighted snippet
+                and the other matching copies of the same text
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+
+        sql = (
+            "SELECT d.title, d.url, d.date, d.source_id, "
+            "COALESCE(d.cluster, d.source_id || '/' || d.doc_key) AS cluster, "
+            "snippet(docs_fts, 1, '**', '**', '...', ?) AS snippet, "
+            "bm25(docs_fts, ?, ?) AS score "
+            "FROM docs_fts JOIN docs d ON d.id = docs_fts.rowid "
+            "WHERE docs_fts MATCH ?"
+        )
+        params = [SNIPPET_TOKENS, TITLE_WEIGHT, CONTENT_WEIGHT, match]
+        if source_id:
+            sql += " AND d.source_id = ?"
+            params.append(source_id)
+        # Keep the best-scoring copy in each cluster and collect the others
+        sql = (
+            "SELECT title, url, date, source_id, snippet, score, duplicates FROM ("
+            "  SELECT *, ROW_NUMBER() OVER (PARTITION BY cluster ORDER BY score) AS rank,"
+            "    json_group_array(json_object('source_id', source_id, 'url', url))"
+            "      OVER (PARTITION BY cluster) AS duplicates"
+            f"  FROM ({sql})"
+            ") WHERE rank = 1 ORDER BY score LIMIT ?"
+        )
+        params.append(max_results)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        return [
+            {
+                'title': title or 'Untitled',
+                'url': url or '',
+                'date': date or '',
+                'source_id': doc_source_id,
+                'snippet': snippet,
+                # FTS5 reports BM25 as a negative number; lower is better
+                'score': round(-score, 4),
+                'duplicates': [copy for copy in json.loads(duplicates)
+                               if (copy['source_id'], copy['url']) != (doc_source_id, url)]
+            }
+            for title, url, date, doc_source_id, snippet, score, duplicates in rows
+        ]
+
+
+def get_search_index(data_dir):
+    """
+    Open the search index for data_dir, building it from the corpus store on first use
+
+    Args:
+        data_dir (str): Directory containing scraped documents
+
+    Returns:
+        LegalSearchIndex: The index
+    """
+    with _build_lock:
+        needs_build = not os.path.exists(os.path.join(data_dir, SEARCH_INDEX_FILE))
+        index = LegalSearchIndex(data_dir)
+        if needs_build or index.needs_rebuild:
+            index.rebuild()
+    return index
@@ -0,0 +1,454 @@
+"""
+LLM Response Cache for SmartDispute.ai
+
+Every AI call site sends its request through CachingLLMClient, which wraps a
+provider (OpenAI through the SDK or plain HTTP, Google Gemini, or a local fake
+for tests) and caches response text keyed by provider, model, the prompt with
+whitespace normalized, and the request parameters. Re-analyzing an unchanged
+case or asking the chat assistant a question it has already answered is then
+served without an API call.
+
+Responses are kept in two tiers: a small in-memory LRU per process in front of
+a size-bounded SQLite file shared by all workers. Each call site has its own
+time to live (CALL_SITE_TTLS, overridable with LLM_CACHE_TTL_<SITE>
+environment variables; 0 disables caching for that site), and hit, miss and
+provider-time metrics are kept per call site.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import Counter, OrderedDict
+
+import requests
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = 'llm_cache.sqlite3'
+DEFAULT_CACHE_DIR = os.path.join('data', 'llm_cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMORY_ENTRIES = 256
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+DEFAULT_TTL = DAY
+
+# Seconds a response stays valid, per call site
+CALL_SITE_TTLS = {
+    'case_analysis': 7 * DAY,             # utils/legal_analyzer.analyze_case
+    'legal_case_review': 7 * DAY,         # services/ai_service.analyze_legal_case
+    'evidence_analysis': 7 * DAY,         # evidence_analyzer.analyze_evidence
+    'gemini_evidence_analysis': 7 * DAY,  # gemini_analyzer.analyze_evidence_with_gemini
+    'chat': DAY,                          # utils/ai_chat.generate_openai_response
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    cache_key TEXT PRIMARY KEY,
+    call_site TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access);
+CREATE INDEX IF NOT EXISTS responses_expires_at ON responses (expires_at);
+"""
+
+_build_lock = threading.Lock()
+_cache = None
+
+
+class LLMProviderError(RuntimeError):
+    """A provider returned an error response"""
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+def normalize_prompt(text):
+    """Collapse whitespace so prompts differing only in indentation or line breaks share an entry"""
+    return ' '.join((text or '').split())
+
+
+def _param_value(value):
+    # Structured-output schemas are passed as pydantic classes; key on the schema they describe
+    if hasattr(value, 'model_json_schema'):
+        return value.model_json_schema()
+    return repr(value)
+
+
+def cache_key(provider, model, messages, params):
+    """
+    Build the key for one request
+
+    Args:
+        provider (str): Provider name
+        model (str): Model name
+        messages (list): Chat messages ({'role', 'content'})
+        params (dict): Other request parameters (temperature, max_tokens, ...)
+
+    Returns:
+        str: Hex SHA-256 of the normalized request
+    """
+    request = [
+        provider,
+        model,
+        [[message['role'], normalize_prompt(message['content'])] for message in messages],
+        params,
+    ]
+    encoded = json.dumps(request, sort_keys=True, default=_param_value)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def call_site_ttl(call_site):
+    """Seconds responses for a call site are cached; 0 means not cached"""
+    override = os.environ.get(f"LLM_CACHE_TTL_{call_site.upper()}")
+    if override is not None:
+        try:
+            return max(0, int(override))
+        except ValueError:
+            logger.warning(f"Ignoring invalid LLM_CACHE_TTL_{call_site.upper()}={override!r}")
+    return CALL_SITE_TTLS.get(call_site, DEFAULT_TTL)
+
+
+class LLMResponseCache:
+    """
+    Two-tier response store: a per-process LRU in front of a size-bounded SQLite file
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        """
+        Open (creating if needed) the cache stored in cache_dir
+
+        Args:
+            cache_dir (str): Directory for the cache database
+            max_bytes (int): Total compressed size disk entries may occupy
+            memory_entries (int): Responses kept in the in-memory tier
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, CACHE_FILE)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # (call_site, metric) -> count or seconds, for this process
+        self._metrics = Counter()
+        with _connect(self.path) as conn:
+            conn.executescript(_SCHEMA)
+
+    def record(self, call_site, metric, amount=1):
+        """Add to a per-call-site metric"""
+        with self._lock:
+            self._metrics[(call_site, metric)] += amount
+
+    def _remember(self, key, expires_at, text):
+        with self._lock:
+            self._memory[key] = (expires_at, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key, call_site):
+        """
+        Look up a response, counting where it was found
+
+        Args:
+            key (str): Key from cache_key()
+            call_site (str): Call site the metrics are recorded under
+
+        Returns:
+            str or None: The response text, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._metrics[(call_site, 'memory_hits')] += 1
+                    return entry[1]
+                del self._memory[key]
+
+        try:
+            with _connect(self.path) as conn:
+                row = conn.execute("SELECT payload, expires_at FROM responses WHERE cache_key = ? AND expires_at > ?",
+                                   (key, now)).fetchone()
+                if row is not None:
+                    conn.execute("UPDATE responses SET last_access = ? WHERE cache_key = ?", (now, key))
+            if row is not None:
+                text = zlib.decompress(row[0]).decode('utf-8')
+                self._remember(key, row[1], text)
+                self.record(call_site, 'disk_hits')
+                return text
+        except (sqlite3.Error, zlib.error, UnicodeDecodeError) as e:
+            logger.warning(f"LLM cache lookup failed: {str(e)}")
+        self.record(call_site, 'misses')
+        return None
+
+    def put(self, key, call_site, text, ttl):
+        """
+        Store a response in both tiers
+
+        Args:
+            key (str): Key from cache_key()
+            call_site (str): Call site that produced it
+            text (str): Response text
+            ttl (int): Seconds the response stays valid
+        """
+        now = time.time()
+        expires_at = now + ttl
+        self._remember(key, expires_at, text)
+        payload = zlib.compress(text.encode('utf-8'))
+        if len(payload) > self.max_bytes:
+            return
+        try:
+            with _connect(self.path) as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses "
+                    "(cache_key, call_site, payload, size, created_at, expires_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, call_site, payload, len(payload), now, expires_at, now)
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache store failed: {str(e)}")
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        evicted = []
+        for key, size in conn.execute("SELECT cache_key, size FROM responses ORDER BY last_access"):
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE cache_key = ?", evicted)
+        logger.info(f"Evicted {len(evicted)} LLM cache entries")
+
+    def clear(self):
+        """Remove every entry from both tiers and reset the metrics"""
+        with self._lock:
+            self._memory.clear()
+            self._metrics.clear()
+        with _connect(self.path) as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        """
+        Report cache effectiveness
+
+        Returns:
+            dict: Per call site memory_hits, disk_hits, misses, provider_calls,
+                provider_errors, provider_seconds and hit_rate (this process),
+                plus disk entries, bytes, max_bytes and memory_entries
+        """
+        with self._lock:
+            metrics = dict(self._metrics)
+            memory_entries = len(self._memory)
+        with _connect(self.path) as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+
+        call_sites = {}
+        for (call_site, metric), value in metrics.items():
+            call_sites.setdefault(call_site, Counter())[metric] = value
+        report = {}
+        for call_site, counts in sorted(call_sites.items()):
+            hits = counts['memory_hits'] + counts['disk_hits']
+            lookups = hits + counts['misses']
+            report[call_site] = {
+                'memory_hits': counts['memory_hits'],
+                'disk_hits': counts['disk_hits'],
+                'misses': counts['misses'],
+                'provider_calls': counts['provider_calls'],
+                'provider_errors': counts['provider_errors'],
+                'provider_seconds': round(counts['provider_seconds'], 3),
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+                'ttl': call_site_ttl(call_site),
+            }
+        return {
+            'call_sites': report,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'memory_entries': memory_entries,
+        }
+
+
+def get_llm_cache():
+    """
+    Open the process-wide LLM response cache
+
+    The location and limits come from the LLM_CACHE_DIR, LLM_CACHE_MAX_BYTES
+    and LLM_CACHE_MEMORY_ENTRIES environment variables.
+
+    Returns:
+        LLMResponseCache: The cache
+    """
+    global _cache
+    with _build_lock:
+        if _cache is None:
+            _cache = LLMResponseCache(
+                os.environ.get('LLM_CACHE_DIR', DEFAULT_CACHE_DIR),
+                int(os.environ.get('LLM_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+                int(os.environ.get('LLM_CACHE_MEMORY_ENTRIES', DEFAULT_MEMORY_ENTRIES))
+            )
+    return _cache
+
+
+class OpenAIChatProvider:
+    """Chat completions through an openai.OpenAI client"""
+    name = 'openai'
+
+    def __init__(self, client):
+        self.client = client
+
+    def complete(self, model, messages, **params):
+        response = self.client.chat.completions.create(model=model, messages=messages, **params)
+        return response.choices[0].message.content
+
+
+class OpenAIHTTPProvider:
+    """Chat completions through the OpenAI REST API, for callers without the SDK"""
+    name = 'openai'
+    url = "https://api.openai.com/v1/chat/completions"
+
+    def __init__(self, api_key, timeout=60):
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def complete(self, model, messages, **params):
+        response = requests.post(
+            self.url,
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {self.api_key}"},
+            json={"model": model, "messages": messages, **params},
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise LLMProviderError(f"OpenAI API error: {response.status_code} - {response.text}")
+        return response.json()['choices'][0]['message']['content']
+
+
+class GeminiProvider:
+    """
+    Content generation through a google.genai client
+
+    System messages become the system instruction; params are passed to GenerateContentConfig.
+    """
+    name = 'gemini'
+
+    def __init__(self, client):
+        self.client = client
+
+    def complete(self, model, messages, **params):
+        from google.genai import types
+
+        system = "\n\n".join(message['content'] for message in messages if message['role'] == 'system')
+        contents = [
+            types.Content(role='model' if message['role'] == 'assistant' else 'user',
+                          parts=[types.Part(text=message['content'])])
+            for message in messages if message['role'] != 'system'
+        ]
+        response = self.client.models.generate_content(
+            model=model,
+            contents=contents,
+            config=types.GenerateContentConfig(system_instruction=system or None, **params),
+        )
+        return response.text
+
+
+class FakeProvider:
+    """
+    Local stand-in provider for tests and benchmarks
+
+    Answers with reply(model, messages, params) if given, otherwise a fixed
+    response, after an optional simulated latency; every request is recorded in calls.
+    """
+    name = 'fake'
+
+    def __init__(self, response='{}', reply=None, latency=0.0):
+        self.response = response
+        self.reply = reply
+        self.latency = latency
+        self.calls = []
+
+    def complete(self, model, messages, **params):
+        self.calls.append((model, messages, params))
+        if self.latency:
+            time.sleep(self.latency)
+        if self.reply is not None:
+            return self.reply(model, messages, params)
+        return self.response
+
+
+class CachingLLMClient:
+    """
+    Sends requests to a provider, answering repeated ones from the response cache
+    """
+
+    def __init__(self, provider, cache=None):
+        """
+        Args:
+            provider: OpenAIChatProvider, OpenAIHTTPProvider, GeminiProvider or FakeProvider
+            cache (LLMResponseCache): Cache to use; the process-wide one by default
+        """
+        self.provider = provider
+        self._cache = cache
+
+    @property
+    def cache(self):
+        # Opened on first use, so importing a call site creates no files
+        return self._cache if self._cache is not None else get_llm_cache()
+
+    def complete(self, call_site, model, messages, **params):
+        """
+        Return the response text for a chat request
+
+        Args:
+            call_site (str): Name of the calling feature; selects the TTL and metrics
+            model (str): Model name
+            messages (list): Chat messages ({'role', 'content'})
+            **params: Provider request parameters (temperature, max_tokens, response_format, ...)
+
+        Returns:
+            str: Response text
+
+        Raises:
+            Exception: Whatever the provider raised; errors are never cached
+        """
+        ttl = call_site_ttl(call_site)
+        cache = self.cache
+        key = cache_key(self.provider.name, model, messages, params) if ttl else None
+        if key is not None:
+            cached = cache.get(key, call_site)
+            if cached is not None:
+                return cached
+
+        started = time.perf_counter()
+        try:
+            text = self.provider.complete(model, messages, **params)
+        except Exception:
+            cache.record(call_site, 'provider_errors')
+            raise
+        finally:
+            cache.record(call_site, 'provider_calls')
+            cache.record(call_site, 'provider_seconds', time.perf_counter() - started)
+
+        if key is not None and text:
+            cache.put(key, call_site, text, ttl)
+        return text
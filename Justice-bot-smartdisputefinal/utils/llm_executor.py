@@ -0,0 +1,470 @@
+"""
+AI Provider Executor for SmartDispute.ai
+
+Runs one request against several interchangeable AI providers (Gemini,
+OpenAI, ...) and returns the first good answer, instead of waiting for each
+provider to fail before trying the next:
+
+- 'hedge' starts the preferred provider and, if it has not answered within its
+  usual latency (a percentile of its recorded latencies), starts the next one
+  as well; a failure starts the next provider at once
+- 'race' starts every available provider together
+- 'sequential' tries providers one after another
+
+Every request has a deadline. Each provider has a circuit breaker: after
+repeated failures, or immediately on a rate-limit (429) response, the provider
+is skipped without being called until a cool-down has passed, then a single
+trial call decides whether it is healthy again. Latencies are recorded per
+provider in fixed-bucket histograms, which also drive the hedge delay.
+
+Executors register themselves by name so their state can be reported in one
+place (executor_stats()). StubProvider simulates latency and rate limiting for
+tests and benchmarks.
+"""
+
+import time
+import random
+import logging
+import threading
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+HEDGE = 'hedge'
+RACE = 'race'
+SEQUENTIAL = 'sequential'
+MODES = (HEDGE, RACE, SEQUENTIAL)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+# Samples needed before a provider's own latencies set its hedge delay
+MIN_HEDGE_SAMPLES = 10
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class ProviderExecutionError(RuntimeError):
+    """No provider produced a result"""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or {}
+
+
+class DeadlineExceeded(ProviderExecutionError):
+    """The request deadline passed before any provider answered"""
+
+
+class ProviderUnavailable(RuntimeError):
+    """A provider cannot be used for this request (not configured, no usable answer)"""
+
+
+class RateLimitedError(RuntimeError):
+    """A provider answered 429 / quota exceeded"""
+
+
+def is_rate_limited(error):
+    """Whether an exception from a provider SDK or HTTP call means rate limiting"""
+    if isinstance(error, RateLimitedError) or getattr(error, 'status_code', None) == 429:
+        return True
+    message = str(error).lower()
+    return '429' in message or 'rate limit' in message or 'quota' in message or 'resource_exhausted' in message
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        # One count per bucket plus the overflow bucket
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def percentile(self, fraction):
+        """
+        Estimate a latency percentile as the upper bound of the bucket it falls in
+
+        Args:
+            fraction (float): 0-1, e.g. 0.9 for p90
+
+        Returns:
+            float or None: Seconds, or None with no samples (or past the last bucket)
+        """
+        if not self.total:
+            return None
+        rank = fraction * self.total
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.buckets[index] if index < len(self.buckets) else None
+        return None
+
+    def snapshot(self):
+        labels = [f"<={bound}s" for bound in self.buckets] + [f">{self.buckets[-1]}s"]
+        return {
+            'count': self.total,
+            'mean': round(self.sum / self.total, 3) if self.total else None,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker
+
+    Closed: calls go through. Open: calls are skipped until the cool-down ends.
+    Half-open: one trial call is let through; success closes the circuit,
+    failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=3, reset_timeout=30.0, rate_limit_timeout=60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.rate_limit_timeout = rate_limit_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.open_until = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def available(self):
+        """Whether allow() could let a call through now, without reserving the half-open trial"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() < self.open_until:
+                return False
+            return self.state == OPEN or not self._trial_running
+
+    def allow(self):
+        """
+        Whether a call may be made now; in half-open state only one caller gets True
+
+        True in half-open state reserves the trial call, so only call this when
+        the call is about to be made.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() < self.open_until:
+                    return False
+                self.state = HALF_OPEN
+                self._trial_running = False
+            if self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def release_trial(self):
+        """Give back a half-open trial reservation without judging the provider's health"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self, rate_limited=False):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if rate_limited or self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = OPEN
+                self.open_until = time.monotonic() + (self.rate_limit_timeout if rate_limited else self.reset_timeout)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'open_for': round(max(0.0, self.open_until - time.monotonic()), 1) if self.state == OPEN else 0,
+            }
+
+
+class Provider:
+    """
+    One way of answering a request
+
+    Args:
+        name (str): Provider name, used in stats and logs
+        call (callable): Called with the request's arguments; returns the
+            result or raises (ProviderUnavailable, RateLimitedError or any error)
+        enabled (callable): Optional check, e.g. for an API key; disabled providers are skipped
+    """
+
+    def __init__(self, name, call, enabled=None):
+        self.name = name
+        self.call = call
+        self.enabled = enabled
+
+
+class ProviderExecutor:
+    """
+    Runs requests against a preference-ordered list of providers
+    """
+
+    def __init__(self, name, providers, mode=HEDGE, deadline=60.0, hedge_percentile=0.9,
+                 default_hedge_delay=5.0, failure_threshold=3, reset_timeout=30.0, rate_limit_timeout=60.0,
+                 max_workers=None):
+        """
+        Args:
+            name (str): Executor name for executor_stats()
+            providers (list): Provider instances, most preferred first
+            mode (str): 'hedge', 'race' or 'sequential'
+            deadline (float): Seconds a request may take in total
+            hedge_percentile (float): Latency percentile after which the next provider is started
+            default_hedge_delay (float): Hedge delay until a provider has enough latency samples
+            failure_threshold (int): Consecutive failures that open a provider's circuit
+            reset_timeout (float): Seconds a circuit stays open after failures
+            rate_limit_timeout (float): Seconds a circuit stays open after a rate-limit response
+            max_workers (int): Threads for provider calls; calls that lost a race or
+                missed the deadline hold theirs until they return
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.name = name
+        self.providers = list(providers)
+        self.mode = mode
+        self.deadline = deadline
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay = default_hedge_delay
+        self.breakers = {provider.name: CircuitBreaker(failure_threshold, reset_timeout, rate_limit_timeout)
+                         for provider in self.providers}
+        self.latency = {provider.name: LatencyHistogram() for provider in self.providers}
+        self.counts = {provider.name: {'calls': 0, 'wins': 0, 'failures': 0, 'rate_limited': 0,
+                                       'skipped_open': 0, 'hedged': 0}
+                       for provider in self.providers}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or 16 * len(self.providers),
+                                        thread_name_prefix=f"llm-{name}")
+        with _registry_lock:
+            _registry[name] = self
+
+    def _count(self, provider_name, metric):
+        with self._lock:
+            self.counts[provider_name][metric] += 1
+
+    def hedge_delay(self, provider):
+        """Seconds to wait for a provider before also starting the next one"""
+        histogram = self.latency[provider.name]
+        with self._lock:
+            if histogram.total < MIN_HEDGE_SAMPLES:
+                return self.default_hedge_delay
+            delay = histogram.percentile(self.hedge_percentile)
+        return delay if delay is not None else self.default_hedge_delay
+
+    def _call(self, provider, args, kwargs):
+        started = time.perf_counter()
+        try:
+            result = provider.call(*args, **kwargs)
+        except ProviderUnavailable:
+            # Not a health problem (e.g. nothing usable to return): neither close nor trip
+            # the breaker, only free the half-open trial for the next caller
+            self.breakers[provider.name].release_trial()
+            raise
+        except Exception as e:
+            rate_limited = is_rate_limited(e)
+            self.breakers[provider.name].record_failure(rate_limited=rate_limited)
+            self._count(provider.name, 'failures')
+            if rate_limited:
+                self._count(provider.name, 'rate_limited')
+            raise
+        elapsed = time.perf_counter() - started
+        self.breakers[provider.name].record_success()
+        with self._lock:
+            self.latency[provider.name].observe(elapsed)
+        return result
+
+    def _available(self):
+        available = []
+        for provider in self.providers:
+            if provider.enabled is not None and not provider.enabled():
+                continue
+            if not self.breakers[provider.name].available():
+                self._count(provider.name, 'skipped_open')
+                continue
+            available.append(provider)
+        return available
+
+    def run(self, *args, deadline=None, **kwargs):
+        """
+        Get a result from the first provider to answer successfully
+
+        Args:
+            *args, **kwargs: Passed to each provider's call
+            deadline (float): Seconds for this request, overriding the executor's
+
+        Returns:
+            tuple: (provider name, result)
+
+        Raises:
+            DeadlineExceeded: If no provider answered in time
+            ProviderExecutionError: If every available provider failed, or none was available
+        """
+        deadline_at = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        queue = self._available()
+        if not queue:
+            raise ProviderExecutionError(f"{self.name}: no provider available (disabled or circuit open)")
+
+        pending = {}
+        errors = {}
+        last_launch = {}
+
+        def launch(hedged=False):
+            # The breaker is only asked when the call is made, so a half-open trial is
+            # reserved by a provider that is actually called; another caller may have taken it since
+            while queue:
+                provider = queue.pop(0)
+                if self.breakers[provider.name].allow():
+                    break
+                self._count(provider.name, 'skipped_open')
+            else:
+                return False
+            self._count(provider.name, 'calls')
+            if hedged:
+                self._count(provider.name, 'hedged')
+            future = self._pool.submit(self._call, provider, args, kwargs)
+            pending[future] = provider
+            last_launch['provider'] = provider
+            last_launch['at'] = time.monotonic()
+            return True
+
+        if not launch():
+            raise ProviderExecutionError(f"{self.name}: no provider available (disabled or circuit open)")
+        if self.mode == RACE:
+            while queue:
+                launch()
+
+        try:
+            while pending:
+                now = time.monotonic()
+                remaining = deadline_at - now
+                if remaining <= 0:
+                    break
+                timeout = remaining
+                if self.mode == HEDGE and queue:
+                    hedge_at = last_launch['at'] + self.hedge_delay(last_launch['provider'])
+                    timeout = max(0.0, min(remaining, hedge_at - now))
+
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+                if not done:
+                    if self.mode == HEDGE and queue and time.monotonic() < deadline_at:
+                        logger.info(f"{self.name}: {last_launch['provider'].name} is slow, also trying {queue[0].name}")
+                        launch(hedged=True)
+                    continue
+
+                for future in done:
+                    provider = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        errors[provider.name] = e
+                        logger.warning(f"{self.name}: {provider.name} failed: {e}")
+                        continue
+                    self._count(provider.name, 'wins')
+                    return provider.name, result
+
+                # A failure hands over to the next provider immediately
+                if queue and (self.mode != SEQUENTIAL or not pending):
+                    launch()
+        finally:
+            # Losers still running finish in the background and are recorded in the stats
+            for future in pending:
+                future.cancel()
+
+        if pending:
+            raise DeadlineExceeded(f"{self.name}: no provider answered within the deadline", errors)
+        raise ProviderExecutionError(f"{self.name}: all providers failed", errors)
+
+    def stats(self):
+        """
+        Report per-provider health and latency
+
+        Returns:
+            dict: mode, deadline and, per provider, circuit state, counts and latency histogram
+        """
+        with self._lock:
+            latency = {name: histogram.snapshot() for name, histogram in self.latency.items()}
+            counts = {name: dict(values) for name, values in self.counts.items()}
+        return {
+            'mode': self.mode,
+            'deadline': self.deadline,
+            'providers': {
+                provider.name: {
+                    'circuit': self.breakers[provider.name].snapshot(),
+                    **counts[provider.name],
+                    'latency': latency[provider.name],
+                }
+                for provider in self.providers
+            },
+        }
+
+
+def executor_stats():
+    """Stats of every ProviderExecutor created in this process, by name"""
+    with _registry_lock:
+        executors = dict(_registry)
+    return {name: executor.stats() for name, executor in executors.items()}
+
+
+class StubProvider:
+    """
+    Local provider for tests and benchmarks
+
+    Sleeps for latency seconds (a number, a (low, high) range drawn uniformly,
+    or a function of a random.Random) and then returns result, raises RateLimitedError with
+    probability rate_limit_rate, or raises RuntimeError with probability
+    error_rate.
+    """
+
+    def __init__(self, name, result=None, latency=0.0, rate_limit_rate=0.0, error_rate=0.0, seed=None):
+        self.name = name
+        self.result = result if result is not None else {'ai_provider': name}
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.error_rate = error_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            if callable(self.latency):
+                delay = self.latency(self._random)
+            elif isinstance(self.latency, tuple):
+                delay = self._random.uniform(*self.latency)
+            else:
+                delay = self.latency
+            roll = self._random.random()
+        time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            raise RateLimitedError(f"{self.name}: 429 Too Many Requests")
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise RuntimeError(f"{self.name}: simulated failure")
+        return dict(self.result)
+
+    def provider(self):
+        """This stub as a Provider for a ProviderExecutor"""
+        return Provider(self.name, self)
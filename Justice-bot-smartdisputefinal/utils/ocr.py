@@ -1,5 +1,8 @@
 import os
+import time
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image
 import pytesseract
 import fitz  # PyMuPDF
@@ -7,35 +10,39 @@ import re
 import docx
 from datetime import datetime
 
+from utils.entity_extractor import entity_metadata
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def process_document(file_path, file_extension):
+# PDF processing: pages with less text than this are treated as scanned and OCR'd
+MIN_TEXT_LAYER_CHARS = 25
+OCR_DPI = 300
+# PDFs are split into page ranges of this size and processed in parallel
+PDF_PAGES_PER_TASK = 8
+# Smaller PDFs are processed in-process; starting worker processes costs more
+PDF_PARALLEL_MIN_PAGES = 16
+
+def process_document(file_path, file_extension, use_cache=True):
     """
     Process a document using OCR to extract text and metadata
     
+    Dispatches through the extraction registry in utils/text_extraction.py,
+    which picks the backend for the format and caches results by file content.
+    
     Args:
         file_path (str): Path to the document file
-        file_extension (str): File extension (pdf, jpg, png, doc, docx)
+        file_extension (str): File extension (pdf, jpg, png, doc, docx, txt)
+        use_cache (bool): Whether to read and populate the extraction cache
         
     Returns:
         tuple: (extracted_text, metadata)
             - extracted_text (str): Text extracted from the document
             - metadata (dict): Metadata extracted from the document
     """
-    try:
-        if file_extension in ['jpg', 'jpeg', 'png']:
-            return process_image(file_path)
-        elif file_extension == 'pdf':
-            return process_pdf(file_path)
-        elif file_extension in ['doc', 'docx']:
-            return process_word_document(file_path)
-        else:
-            logger.warning(f"Unsupported file type: {file_extension}")
-            return "", {}
-    except Exception as e:
-        logger.error(f"Error processing document: {str(e)}")
-        return "", {}
+    # Imported here: the registry imports this module for its backends
+    from utils.text_extraction import extract_document
+    return extract_document(file_path, file_extension, use_cache=use_cache)
 
 def process_image(file_path):
     """
@@ -58,11 +65,7 @@ def process_image(file_path):
             'image_format': image.format,
             'image_size': image.size,
             'image_mode': image.mode,
-            'dates': extract_dates(extracted_text),
-            'names': extract_names(extracted_text),
-            'addresses': extract_addresses(extracted_text),
-            'phone_numbers': extract_phone_numbers(extracted_text),
-            'email_addresses': extract_email_addresses(extracted_text),
+            **entity_metadata(extracted_text),
         }
         
         return extracted_text, metadata
@@ -70,47 +73,122 @@ def process_image(file_path):
         logger.error(f"Error processing image: {str(e)}")
         return "", {}
 
-def process_pdf(file_path):
+def process_pdf(file_path, ocr_dpi=OCR_DPI, max_workers=None):
     """
-    Process a PDF file using PyMuPDF
+    Process a PDF file using PyMuPDF, OCR'ing pages that have no text layer
+    
+    Long PDFs are split into page ranges processed in parallel worker processes.
+    Pages with a text layer use it directly; scanned pages are rendered at
+    ocr_dpi and sent to Tesseract. Page text is assembled in page order.
     
     Args:
         file_path (str): Path to the PDF file
+        ocr_dpi (int): Resolution at which scanned pages are rendered for OCR
+        max_workers (int): Worker processes for long PDFs (defaults to the CPU count)
         
     Returns:
         tuple: (extracted_text, metadata)
     """
     try:
+        started = time.perf_counter()
         document = fitz.open(file_path)
-        text = ""
+        page_count = len(document)
+        pdf_metadata = document.metadata or {}
+        document.close()
         
-        # Extract text from each page
-        for page in document:
-            text += page.get_text()
+        pages = _process_pdf_in_ranges(file_path, page_count, ocr_dpi, max_workers)
+        text = "".join(page_text for page_text, _ in pages)
+        page_timings = [timing for _, timing in pages]
         
         # Extract metadata
         metadata = {
-            'title': document.metadata.get('title', ''),
-            'author': document.metadata.get('author', ''),
-            'subject': document.metadata.get('subject', ''),
-            'creator': document.metadata.get('creator', ''),
-            'producer': document.metadata.get('producer', ''),
-            'creation_date': document.metadata.get('creationDate', ''),
-            'modification_date': document.metadata.get('modDate', ''),
-            'page_count': len(document),
-            'dates': extract_dates(text),
-            'names': extract_names(text),
-            'addresses': extract_addresses(text),
-            'phone_numbers': extract_phone_numbers(text),
-            'email_addresses': extract_email_addresses(text),
+            'title': pdf_metadata.get('title', ''),
+            'author': pdf_metadata.get('author', ''),
+            'subject': pdf_metadata.get('subject', ''),
+            'creator': pdf_metadata.get('creator', ''),
+            'producer': pdf_metadata.get('producer', ''),
+            'creation_date': pdf_metadata.get('creationDate', ''),
+            'modification_date': pdf_metadata.get('modDate', ''),
+            'page_count': page_count,
+            'ocr_pages': [timing['page'] for timing in page_timings if timing['method'] == 'ocr'],
+            'ocr_dpi': ocr_dpi,
+            'page_timings': page_timings,
+            'processing_seconds': round(time.perf_counter() - started, 3),
+            **entity_metadata(text),
         }
         
-        document.close()
         return text, metadata
     except Exception as e:
         logger.error(f"Error processing PDF: {str(e)}")
         return "", {}
 
+def _process_pdf_in_ranges(file_path, page_count, ocr_dpi, max_workers=None):
+    """
+    Extract every page of a PDF, in parallel page ranges when the PDF is long
+    
+    Returns:
+        list: (page_text, timing) per page, in page order
+    """
+    ranges = [(start, min(start + PDF_PAGES_PER_TASK, page_count))
+              for start in range(0, page_count, PDF_PAGES_PER_TASK)]
+    workers = min(max_workers or os.cpu_count() or 1, len(ranges))
+    
+    if page_count >= PDF_PARALLEL_MIN_PAGES and workers > 1:
+        try:
+            # spawn, not fork: uploads are processed in threads of the web server
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [pool.submit(process_pdf_pages, file_path, start, stop, ocr_dpi)
+                           for start, stop in ranges]
+                return [page for future in futures for page in future.result()]
+        except Exception as e:
+            logger.warning(f"Parallel PDF processing failed, processing pages in-process: {str(e)}")
+    
+    return [page for start, stop in ranges for page in process_pdf_pages(file_path, start, stop, ocr_dpi)]
+
+def process_pdf_pages(file_path, start, stop, ocr_dpi=OCR_DPI):
+    """
+    Extract text from a range of PDF pages, OCR'ing pages without a text layer
+    
+    Module-level so it can run in a worker process.
+    
+    Args:
+        file_path (str): Path to the PDF file
+        start (int): First page index (0-based, inclusive)
+        stop (int): Last page index (exclusive)
+        ocr_dpi (int): Resolution at which scanned pages are rendered for OCR
+        
+    Returns:
+        list: (page_text, timing) per page, where timing is a dict with the
+            1-based page number, extraction method ('text' or 'ocr') and seconds
+    """
+    results = []
+    document = fitz.open(file_path)
+    try:
+        for index in range(start, stop):
+            page_started = time.perf_counter()
+            page = document[index]
+            page_text = page.get_text()
+            method = 'text'
+            
+            if len(page_text.strip()) < MIN_TEXT_LAYER_CHARS and page.get_images():
+                method = 'ocr'
+                try:
+                    pixmap = page.get_pixmap(dpi=ocr_dpi, colorspace=fitz.csGRAY)
+                    image = Image.frombytes('L', (pixmap.width, pixmap.height), pixmap.samples)
+                    page_text = pytesseract.image_to_string(image)
+                except Exception as e:
+                    logger.warning(f"OCR failed for page {index + 1} of {file_path}: {str(e)}")
+            
+            results.append((page_text, {
+                'page': index + 1,
+                'method': method,
+                'seconds': round(time.perf_counter() - page_started, 3)
+            }))
+    finally:
+        document.close()
+    return results
+
 def process_word_document(file_path):
     """
     Process a Word document using python-docx
@@ -123,7 +201,7 @@ def process_word_document(file_path):
     """
     try:
         doc = docx.Document(file_path)
-        text = "\n".join([para.text for para in doc.paragraphs if para.text.strip()])
+        text = "\n".join(word_document_blocks(doc))
         
         # Extract metadata
         core_props = doc.core_properties
@@ -135,11 +213,7 @@ def process_word_document(file_path):
             'modified': core_props.modified.isoformat() if hasattr(core_props, 'modified') and core_props.modified else '',
             'last_modified_by': core_props.last_modified_by if hasattr(core_props, 'last_modified_by') else '',
             'paragraph_count': len(doc.paragraphs),
-            'dates': extract_dates(text),
-            'names': extract_names(text),
-            'addresses': extract_addresses(text),
-            'phone_numbers': extract_phone_numbers(text),
-            'email_addresses': extract_email_addresses(text),
+            **entity_metadata(text),
         }
         
         return text, metadata
@@ -147,6 +221,28 @@ def process_word_document(file_path):
         logger.error(f"Error processing Word document: {str(e)}")
         return "", {}
 
+def word_document_blocks(doc):
+    """
+    Yield the text of a Word document's non-empty paragraphs, then of its tables one row at a time
+    
+    Args:
+        doc (docx.Document): Opened document
+        
+    Yields:
+        str: Paragraph text, or a table row's non-empty cells joined with ' | '
+    """
+    for para in doc.paragraphs:
+        if para.text.strip():
+            yield para.text
+    for table in doc.tables:
+        for row in table.rows:
+            cells = [cell.text.strip() for cell in row.cells if cell.text.strip()]
+            if cells:
+                yield ' | '.join(cells)
+
+# The extract_* functions below scan for one entity type each. Upload processing
+# uses utils.entity_extractor, which finds all of them in a single pass.
+
 def extract_dates(text):
     """Extract dates from text"""
     # Various date formats
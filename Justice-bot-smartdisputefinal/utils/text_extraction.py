@@ -0,0 +1,268 @@
+"""
+Text Extraction Registry for SmartDispute.ai
+
+One place that turns an uploaded file into text. Every caller (upload
+processing in utils/ocr.py and the background workers, case creation in
+services/doc_service.py, evidence analysis and the legal document analyzer)
+goes through extract_document() / extract_text(), so they all get the same
+text for the same file and share the content-addressed extraction cache.
+
+Backends are registered per format, keyed by file extension and MIME type, in
+order of preference: the fastest backend measured by
+benchmark_text_extraction.py comes first, and slower ones are only used when a
+faster one is unavailable (its library is not installed) or fails on a file.
+Each backend extracts a whole document with metadata, and can also yield the
+text a page (or block) at a time through iter_pages() for callers that process
+long documents incrementally.
+"""
+
+import os
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from utils.entity_extractor import entity_metadata
+from utils.extraction_cache import get_extraction_cache, file_sha256, cache_key
+
+# PyMuPDF, Tesseract and python-docx based extraction; unavailable if any of them is not installed
+try:
+    from utils import ocr as _ocr
+except ImportError as e:
+    _ocr = None
+    logging.getLogger(__name__).warning(f"OCR extraction backends unavailable: {str(e)}")
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Bump whenever extraction output changes so cached results are not reused
+EXTRACTOR_VERSION = '4'
+
+# Text files are read in blocks of this many characters when streamed
+TEXT_BLOCK_CHARS = 64 * 1024
+
+MIME_TYPES = {
+    'application/pdf': 'pdf',
+    'text/plain': 'txt',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+    'application/msword': 'doc',
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+}
+
+
+@dataclass
+class ExtractionBackend:
+    """A way of extracting text from one or more file formats"""
+    name: str
+    extensions: List[str]
+    extract: Callable[[str], Tuple[str, Dict]]  # file_path -> (text, metadata), ("", {}) on failure
+    pages: Callable[[str], Iterator[str]]  # file_path -> text of each page or block
+    mime_types: List[str] = field(default_factory=list)
+
+
+# Extension -> backends, fastest first
+_registry: Dict[str, List[ExtractionBackend]] = {}
+
+
+def register_backend(backend):
+    """
+    Add a backend after the ones already registered for its formats
+
+    Args:
+        backend (ExtractionBackend): The backend
+    """
+    for extension in backend.extensions:
+        _registry.setdefault(extension, []).append(backend)
+    for mime_type in backend.mime_types:
+        MIME_TYPES.setdefault(mime_type, backend.extensions[0])
+
+
+def resolve_format(file_path, content_type=None):
+    """
+    Work out a file's format from its MIME type, falling back to its extension
+
+    Returns:
+        str: Registered extension such as 'pdf', or '' if the format is not supported
+    """
+    if content_type:
+        extension = MIME_TYPES.get(content_type.split(';')[0].strip().lower())
+        if extension:
+            return extension
+    extension = os.path.splitext(file_path)[1].lower().lstrip('.')
+    return extension if extension in _registry else ''
+
+
+def backends_for(extension):
+    """Return the registered backends for a format, fastest first"""
+    return list(_registry.get(extension, []))
+
+
+def extract_document(file_path, file_extension=None, content_type=None, use_cache=True):
+    """
+    Extract text and metadata from a document with the fastest working backend
+
+    Results are cached by file content (see utils/extraction_cache.py).
+
+    Args:
+        file_path (str): Path to the document file
+        file_extension (str): Format, if already known (pdf, jpg, png, doc, docx, txt)
+        content_type (str): MIME type reported for the upload, used when no extension is given
+        use_cache (bool): Whether to read and populate the extraction cache
+
+    Returns:
+        tuple: (extracted_text, metadata); ("", {}) if the file is unsupported
+            or no backend could read it. metadata includes 'extractor',
+            and, when the cache is used, 'content_sha256' and
+            'extraction_cache' ('hit' or 'miss').
+    """
+    extension = (file_extension or resolve_format(file_path, content_type)).lower()
+    backends = backends_for(extension)
+    if not backends:
+        logger.warning(f"Unsupported file type: {extension or file_path}")
+        return "", {}
+
+    try:
+        key = cache = content_sha256 = None
+        if use_cache:
+            content_sha256 = file_sha256(file_path)
+            key = cache_key(content_sha256, EXTRACTOR_VERSION, extension)
+            cache = get_extraction_cache()
+            cached = cache.get(key)
+            if cached is not None:
+                text, metadata = cached
+                metadata['extraction_cache'] = 'hit'
+                return text, metadata
+
+        for backend in backends:
+            text, metadata = backend.extract(file_path)
+            if metadata:
+                break
+            logger.warning(f"{backend.name} could not extract {file_path}, trying the next backend")
+        else:
+            # Failed extractions are not cached, so they are retried next time
+            return "", {}
+
+        metadata['extractor'] = backend.name
+        if cache is not None:
+            metadata['content_sha256'] = content_sha256
+            cache.put(key, text, metadata)
+            metadata['extraction_cache'] = 'miss'
+        return text, metadata
+    except Exception as e:
+        logger.error(f"Error extracting {file_path}: {str(e)}")
+        return "", {}
+
+
+def extract_text(file_path, content_type=None, file_extension=None):
+    """
+    Extract a document's text
+
+    Args:
+        file_path (str): Path to the document file
+        content_type (str): MIME type reported for the upload
+        file_extension (str): Format, if already known
+
+    Returns:
+        str: Extracted text, or None if the format is unsupported or extraction failed
+    """
+    text, metadata = extract_document(file_path, file_extension, content_type)
+    return text if metadata else None
+
+
+def iter_pages(file_path, content_type=None, file_extension=None):
+    """
+    Yield a document's text one page (PDF) or block (other formats) at a time
+
+    Uses the fastest available backend and does not consult the cache, so the
+    first page is available without waiting for the whole document.
+
+    Yields:
+        str: Text of each page or block, in order
+    """
+    extension = (file_extension or resolve_format(file_path, content_type)).lower()
+    backends = backends_for(extension)
+    if not backends:
+        logger.warning(f"Unsupported file type: {extension or file_path}")
+        return
+    yield from backends[0].pages(file_path)
+
+
+# Backends -----------------------------------------------------------------
+
+def _text_pages(file_path):
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for block in iter(lambda: f.read(TEXT_BLOCK_CHARS), ''):
+            yield block
+
+
+def _extract_plain_text(file_path):
+    try:
+        text = "".join(_text_pages(file_path))
+        return text, {'char_count': len(text), **entity_metadata(text)}
+    except OSError as e:
+        logger.error(f"Error reading text file: {str(e)}")
+        return "", {}
+
+
+def _pymupdf_pages(file_path):
+    with _ocr.fitz.open(file_path) as document:
+        page_count = document.page_count
+    for start in range(0, page_count, _ocr.PDF_PAGES_PER_TASK):
+        stop = min(start + _ocr.PDF_PAGES_PER_TASK, page_count)
+        for page_text, _ in _ocr.process_pdf_pages(file_path, start, stop):
+            yield page_text
+
+
+def _pypdf2_pages(file_path):
+    with open(file_path, 'rb') as f:
+        for page in PyPDF2.PdfReader(f).pages:
+            yield (page.extract_text() or '') + "\n"
+
+
+def _extract_pdf_pypdf2(file_path):
+    try:
+        pages = list(_pypdf2_pages(file_path))
+        text = "".join(pages)
+        return text, {'page_count': len(pages), **entity_metadata(text)}
+    except Exception as e:
+        logger.error(f"Error processing PDF with PyPDF2: {str(e)}")
+        return "", {}
+
+
+def _image_pages(file_path):
+    text, _ = _ocr.process_image(file_path)
+    yield text
+
+
+def _word_pages(file_path):
+    yield from _ocr.word_document_blocks(_ocr.docx.Document(file_path))
+
+
+register_backend(ExtractionBackend(
+    name='text', extensions=['txt'], extract=_extract_plain_text, pages=_text_pages,
+    mime_types=['text/plain']
+))
+if _ocr is not None:
+    register_backend(ExtractionBackend(
+        name='pymupdf', extensions=['pdf'], extract=_ocr.process_pdf, pages=_pymupdf_pages,
+        mime_types=['application/pdf']
+    ))
+    register_backend(ExtractionBackend(
+        name='tesseract', extensions=['jpg', 'jpeg', 'png'], extract=_ocr.process_image, pages=_image_pages,
+        mime_types=['image/jpeg', 'image/png']
+    ))
+    register_backend(ExtractionBackend(
+        name='python-docx', extensions=['docx', 'doc'], extract=_ocr.process_word_document, pages=_word_pages,
+        mime_types=['application/vnd.openxmlformats-officedocument.wordprocessingml.document', 'application/msword']
+    ))
+if PyPDF2 is not None:
+    # Several times slower than PyMuPDF and cannot OCR scanned pages; used only as a fallback
+    register_backend(ExtractionBackend(
+        name='pypdf2', extensions=['pdf'], extract=_extract_pdf_pypdf2, pages=_pypdf2_pages,
+        mime_types=['application/pdf']
+    ))